@@ -0,0 +1,196 @@
+"""Manifeste d'indexation incrémentale.
+
+Le manifeste garde, pour chaque fichier indexé, son ``mtime``, sa taille, le
+hash SHA-256 de son contenu, les identifiants des chunks produits et le modèle
+d'embedding utilisé. À la réindexation :
+
+- fichier inchangé (même ``mtime``/taille, ou même hash, et même modèle) : ignoré,
+  sans même être relu ;
+- fichier modifié : ses anciens chunks sont supprimés puis il est réindexé ;
+- fichier disparu : ses chunks sont supprimés de Qdrant et d'Elasticsearch.
+
+Le hash d'un fichier connu n'est calculé que si ``mtime`` ou la taille ont changé.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ingestion.metadata_utils import file_sha256
+
+LOGGER = logging.getLogger(__name__)
+
+INDEXATION_MANIFEST_PATH = os.getenv("INDEXATION_MANIFEST_PATH", "/state/index_manifest.json")
+MANIFEST_VERSION = 1
+
+
+@dataclass(slots=True)
+class FileState:
+    """Empreinte d'un fichier au moment de la découverte."""
+
+    path: str
+    mtime: float
+    size: int
+    content_hash: Optional[str] = None
+
+
+@dataclass(slots=True)
+class ManifestEntry:
+    """Ce qui a été indexé pour un fichier."""
+
+    path: str
+    mtime: float
+    size: int
+    content_hash: str
+    chunk_ids: List[str]
+    embedding_model: str
+
+
+@dataclass(slots=True)
+class IndexPlan:
+    """Travail à effectuer pour une réindexation incrémentale."""
+
+    # (connecteur, élément découvert, empreinte ; None hors fichiers, ex. MariaDB)
+    to_index: List[Tuple[Any, Any, Optional[FileState]]] = field(default_factory=list)
+    unchanged: int = 0
+    # Entrées des fichiers disparus
+    removed: List[ManifestEntry] = field(default_factory=list)
+    # source -> chunks à supprimer des deux index (fichiers modifiés ou disparus)
+    stale_chunks: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def stale_chunk_ids(self) -> List[str]:
+        return [chunk_id for chunk_ids in self.stale_chunks.values() for chunk_id in chunk_ids]
+
+    @property
+    def sources(self) -> set[str]:
+        """Sources à signaler à la Gateway (réindexées ou supprimées)."""
+        sources = {state.path for _, _, state in self.to_index if state is not None}
+        sources.update(entry.path for entry in self.removed)
+        return sources
+
+
+class IndexManifest:
+    """Manifeste JSON persistant (une entrée par fichier indexé)."""
+
+    def __init__(self, path: Optional[Path] = None, entries: Optional[Dict[str, ManifestEntry]] = None) -> None:
+        self.path = Path(path or INDEXATION_MANIFEST_PATH)
+        self.entries: Dict[str, ManifestEntry] = dict(entries or {})
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> "IndexManifest":
+        manifest = cls(path)
+        if not manifest.path.exists():
+            LOGGER.info("No index manifest at %s, every file will be indexed", manifest.path)
+            return manifest
+        try:
+            data = json.loads(manifest.path.read_text(encoding="utf-8"))
+            if data.get("version") != MANIFEST_VERSION:
+                raise ValueError(f"version {data.get('version')!r}")
+            for raw in data.get("files", []):
+                entry = ManifestEntry(**raw)
+                manifest.entries[entry.path] = entry
+        except Exception as exc:
+            LOGGER.warning("Unreadable index manifest %s (%s), starting from scratch", manifest.path, exc)
+            manifest.entries.clear()
+        return manifest
+
+    def save(self) -> None:
+        """Écrit le manifeste de façon atomique (fichier temporaire + ``os.replace``)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "version": MANIFEST_VERSION,
+            "files": [asdict(self.entries[key]) for key in sorted(self.entries)],
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def plan(
+        self,
+        items: Iterable[Tuple[Any, Any]],
+        embedding_model: str,
+        incremental: bool = True,
+    ) -> IndexPlan:
+        """Compare les éléments découverts au manifeste.
+
+        Avec ``incremental=False`` tout est réindexé, mais les anciens chunks
+        connus du manifeste sont quand même supprimés (pas de doublons).
+        """
+        plan = IndexPlan()
+        seen: set[str] = set()
+        for connector, item in items:
+            if not isinstance(item, Path):
+                plan.to_index.append((connector, item, None))
+                continue
+            key = str(item)
+            if key in seen:
+                continue
+            seen.add(key)
+            try:
+                state = self._file_state(item, embedding_model, incremental, plan)
+            except OSError as exc:
+                LOGGER.warning("Unable to read %s: %s", item, exc)
+                continue
+            if state is not None:
+                plan.to_index.append((connector, item, state))
+
+        for key in sorted(set(self.entries) - seen):
+            entry = self.entries[key]
+            plan.removed.append(entry)
+            plan.stale_chunks[key] = entry.chunk_ids
+        return plan
+
+    def _file_state(
+        self, path: Path, embedding_model: str, incremental: bool, plan: IndexPlan
+    ) -> Optional[FileState]:
+        """Empreinte de ``path`` s'il doit être (ré)indexé, ``None`` s'il est inchangé."""
+        stat = path.stat()
+        state = FileState(path=str(path), mtime=stat.st_mtime, size=stat.st_size)
+        entry = self.entries.get(state.path)
+        if incremental and entry is not None and entry.embedding_model == embedding_model:
+            if (entry.mtime, entry.size) == (state.mtime, state.size):
+                plan.unchanged += 1
+                return None
+            state.content_hash = file_sha256(path)
+            if state.content_hash == entry.content_hash:
+                # Simple "touch" : on retient le nouveau mtime sans réindexer
+                entry.mtime, entry.size = state.mtime, state.size
+                plan.unchanged += 1
+                return None
+        if entry is not None:
+            plan.stale_chunks[state.path] = entry.chunk_ids
+        # Hash pris avant le parsing : une modification en cours d'indexation
+        # sera vue comme un changement au prochain passage
+        if state.content_hash is None:
+            state.content_hash = file_sha256(path)
+        return state
+
+    def record(self, state: FileState, chunk_ids: List[str], embedding_model: str) -> None:
+        """Enregistre l'indexation d'un fichier."""
+        self.entries[state.path] = ManifestEntry(
+            path=state.path,
+            mtime=state.mtime,
+            size=state.size,
+            content_hash=state.content_hash or file_sha256(Path(state.path)),
+            chunk_ids=chunk_ids,
+            embedding_model=embedding_model,
+        )
+
+    def forget(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            self.entries.pop(path, None)
+
+
+__all__ = [
+    "FileState",
+    "INDEXATION_MANIFEST_PATH",
+    "IndexManifest",
+    "IndexPlan",
+    "ManifestEntry",
+    "file_sha256",
+]
@@ -1,19 +1,34 @@
-"""Service d'indexation Qdrant orchestré par LlamaIndex."""
-from __future__ import annotations
+"""Service d'indexation Qdrant orchestré par LlamaIndex.
 
-print("DEBUG: qdrant_indexer script early start", flush=True)
+Les chunks produits par ``IngestionPipeline.run()`` sont consommés au fil de
+l'eau par lots de ``INDEXATION_BATCH_SIZE`` : chaque lot est vectorisé, poussé
+dans Qdrant puis dans Elasticsearch avant de lire le suivant, si bien que la
+mémoire reste bornée quelle que soit la taille du corpus. Le manifeste est
+sauvegardé après chaque lot : un arrêt en cours de route ne fait réindexer (et
+donc dupliquer dans Qdrant) que les fichiers du lot interrompu.
+"""
+from __future__ import annotations
 
+import logging
 import os
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional, Sequence
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
 
 import typer
 from ingestion.cli import _load_config as load_ingestion_config
 from ingestion.config import IngestionConfig
 from ingestion.pipeline import IngestionPipeline
+from indexation.manifest import IndexManifest, IndexPlan
 from llm_pipeline.elastic_client import (
-    index_document as es_index_document,
+    ALL_SOURCES_STAMP,
+    BulkIndexReport,
+    bulk_index_documents as es_bulk_index,
+    bulk_loading as es_bulk_loading,
+    delete_documents as es_delete_documents,
     delete_index as es_delete_index,
+    record_index_stamps,
 )
 from llama_index.core import Document, StorageContext, VectorStoreIndex
 # Import corrigé pour HuggingFaceEmbedding
@@ -26,8 +41,25 @@ except ImportError:
         # Fallback pour les versions plus récentes
         from llama_index.core.embeddings import HuggingFaceEmbedding
 from llama_index.vector_stores.qdrant import QdrantVectorStore
+from llm_pipeline.config import INFERENCE_BACKEND
+from llm_pipeline.inference_backend import build_embedding
+from llm_pipeline.logging_utils import configure_logging
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
+from qdrant_client.http.models import (
+    Distance,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    MatchAny,
+    MatchValue,
+    VectorParams,
+)
+
+
+LOGGER = logging.getLogger(__name__)
+
+# Chunks vectorisés et indexés ensemble (borne la mémoire de l'indexeur)
+INDEXATION_BATCH_SIZE = int(os.getenv("INDEXATION_BATCH_SIZE", "256"))
 
 
 class QdrantIndexer:
@@ -42,13 +74,19 @@ class QdrantIndexer:
         model_name = embedding_model or os.getenv(
             "HF_EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
         )
+        self.model_name = model_name
+        self.collection_name = collection_name
         self.client = QdrantClient(url=qdrant_url)
         self.vector_store = QdrantVectorStore(
             client=self.client,
             collection_name=collection_name,
             vector_name="text-dense",
         )
-        self.embed_model = HuggingFaceEmbedding(model_name=model_name)
+        if INFERENCE_BACKEND == "torch":
+            self.embed_model = HuggingFaceEmbedding(model_name=model_name)
+        else:
+            # Même backend que la Gateway pour que documents et questions restent comparables
+            self.embed_model = build_embedding(model_name)
 
     def index_documents(self, documents: Sequence[Document]) -> None:
         storage_context = StorageContext.from_defaults(vector_store=self.vector_store)
@@ -58,6 +96,81 @@ class QdrantIndexer:
             embed_model=self.embed_model,
         )
 
+    def delete_chunks(self, source: str, chunk_ids: Sequence[str], batch_size: int = 512) -> None:
+        """Supprime les points de ``source`` issus de ces chunks (``doc_id`` LlamaIndex = id du chunk).
+
+        Le filtre sur ``source`` protège les fichiers homonymes (les ids dérivent du nom).
+        """
+        for start in range(0, len(chunk_ids), batch_size):
+            batch = list(chunk_ids[start:start + batch_size])
+            conditions = [
+                FieldCondition(key="source", match=MatchValue(value=source)),
+                FieldCondition(key="doc_id", match=MatchAny(any=batch)),
+            ]
+            try:
+                self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=FilterSelector(filter=Filter(must=conditions)),
+                )
+            except Exception as exc:
+                LOGGER.warning("Unable to delete %d Qdrant chunks of %s: %s", len(batch), source, exc)
+
+
+@dataclass(slots=True)
+class StreamingIndexReport:
+    """Bilan d'une indexation par lots."""
+
+    chunks: int = 0
+    documents: int = 0
+    batches: int = 0
+    sources: set[str] = field(default_factory=set)
+    elastic: BulkIndexReport = field(default_factory=BulkIndexReport)
+
+
+def _batched(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def index_stream(
+    chunks: Iterable,
+    indexer: QdrantIndexer,
+    batch_size: int = INDEXATION_BATCH_SIZE,
+    on_batch: Optional[Callable[[], None]] = None,
+) -> StreamingIndexReport:
+    """Indexe les chunks par lots dans Qdrant et Elasticsearch.
+
+    ``chunks`` est consommé paresseusement : seul le lot courant (chunks,
+    ``Document`` et embeddings) est conservé en mémoire. Le rafraîchissement
+    Elasticsearch reste suspendu pour l'ensemble du chargement. ``on_batch``
+    est appelé une fois chaque lot poussé dans les deux index.
+    """
+    report = StreamingIndexReport()
+    with es_bulk_loading():
+        for batch in _batched(chunks, max(1, batch_size)):
+            documents = _build_documents(batch)
+            if documents:
+                indexer.index_documents(documents)
+            # Elasticsearch absent : inutile de retenter la connexion à chaque lot
+            if not report.elastic.skipped:
+                report.elastic.merge(
+                    es_bulk_index(
+                        ((str(chunk.id), _build_es_body(chunk)) for chunk in batch),
+                        suspend_refresh=False,
+                    )
+                )
+            report.chunks += len(batch)
+            report.documents += len(documents)
+            report.batches += 1
+            report.sources.update(_chunk_sources(batch))
+            LOGGER.info(
+                "Batch %d indexed (%d chunks, %d total)", report.batches, len(batch), report.chunks
+            )
+            if on_batch is not None:
+                on_batch()
+    return report
+
 
 def _build_documents(chunks: Sequence) -> List[Document]:
     return [
@@ -99,19 +212,19 @@ def _is_truthy(value: str | None) -> bool:
 
 def _purge_vector_and_keyword_stores(qdrant_url: str, collection_name: str) -> None:
     """Supprime les donn'es existantes pour 'viter les doublons massifs."""
-    print(f"DEBUG: Purging Qdrant collection '{collection_name}'", flush=True)
+    LOGGER.info("Purging Qdrant collection '%s'", collection_name)
     client = QdrantClient(url=qdrant_url)
     existing_vectors: VectorParams | dict[str, VectorParams] | None = None
     try:
         info = client.get_collection(collection_name)
         existing_vectors = info.config.params.vectors
     except Exception as exc:
-        print(f"DEBUG: Unable to read existing collection config: {exc}", flush=True)
+        LOGGER.warning("Unable to read existing collection config: %s", exc)
     try:
         client.delete_collection(collection_name)
-        print(f"DEBUG: Qdrant collection '{collection_name}' deleted", flush=True)
+        LOGGER.info("Qdrant collection '%s' deleted", collection_name)
     except Exception as exc:
-        print(f"DEBUG: Unable to delete Qdrant collection '{collection_name}': {exc}", flush=True)
+        LOGGER.warning("Unable to delete Qdrant collection '%s': %s", collection_name, exc)
     else:
         # Recréer immédiatement la collection avec un vecteur nommé 'text-dense'
         vectors_config: dict[str, VectorParams]
@@ -129,12 +242,14 @@ def _purge_vector_and_keyword_stores(qdrant_url: str, collection_name: str) -> N
                 vectors_config=vectors_config,
                 on_disk_payload=True,
             )
-            print(f"DEBUG: Qdrant collection '{collection_name}' recreated", flush=True)
+            LOGGER.info("Qdrant collection '%s' recreated", collection_name)
         except Exception as exc:
-            print(f"DEBUG: Unable to recreate collection '{collection_name}': {exc}", flush=True)
+            LOGGER.warning("Unable to recreate collection '%s': %s", collection_name, exc)
 
-    print("DEBUG: Purging Elasticsearch BM25 index", flush=True)
+    LOGGER.info("Purging Elasticsearch BM25 index")
     es_delete_index()
+    # Les Gateways vident leurs caches de réponses
+    record_index_stamps([ALL_SOURCES_STAMP])
 
 
 @app.command()
@@ -149,9 +264,19 @@ def main(
         is_flag=True,
         help="Supprime les données existantes avant réindexation pour éviter les doublons.",
     ),
+    batch_size: int = typer.Option(
+        INDEXATION_BATCH_SIZE, help="Chunks vectorisés et indexés par lot (borne la mémoire)"
+    ),
+    incremental: bool = typer.Option(
+        True,
+        "--incremental/--full",
+        help="Ne réindexe que les fichiers modifiés depuis le dernier passage (manifeste).",
+    ),
+    manifest_path: Optional[Path] = typer.Option(None, help="Manifeste d'indexation incrémentale"),
 ) -> None:
     """Exécute l'ingestion puis indexe les documents dans Qdrant."""
-    print("DEBUG: qdrant_indexer script started", flush=True)
+    configure_logging()
+    LOGGER.info("qdrant_indexer script started")
     env_path = os.getenv("INGESTION_CONFIG_PATH")
     if config_path is None and env_path:
         config_path = Path(env_path)
@@ -163,41 +288,94 @@ def main(
     purge_env = os.getenv("INDEXATION_PURGE")
     if purge_env is not None:
         purge = _is_truthy(purge_env)
-        print(f"DEBUG: INDEXATION_PURGE env detected -> purge={purge}", flush=True)
+        LOGGER.info("INDEXATION_PURGE env detected -> purge=%s", purge)
+    incremental_env = os.getenv("INDEXATION_INCREMENTAL")
+    if incremental_env is not None:
+        incremental = _is_truthy(incremental_env)
 
     if purge:
         _purge_vector_and_keyword_stores(qdrant_url, collection_name)
 
+    # Après une purge, les index sont vides : on repart d'un manifeste vierge
+    manifest = IndexManifest(manifest_path) if purge else IndexManifest.load(manifest_path)
     pipeline = IngestionPipeline(ingestion_config)
-    chunks = list(pipeline.run())
-    if not chunks:
+    indexer = QdrantIndexer(
+        qdrant_url=qdrant_url, collection_name=collection_name, embedding_model=embedding_model
+    )
+    plan = manifest.plan(pipeline.discover(), indexer.model_name, incremental=incremental)
+    if not plan.to_index and not plan.unchanged and not plan.removed:
         typer.echo("Aucun document détecté durant l'ingestion. Vérifiez la configuration.")
         raise typer.Exit(code=0)
+    typer.echo(
+        f"{len(plan.to_index)} élément(s) à indexer, {plan.unchanged} inchangé(s), "
+        f"{len(plan.removed)} supprimé(s)."
+    )
 
-    # Indexation Qdrant
-    documents = _build_documents(chunks)
-    indexer = QdrantIndexer(
-        qdrant_url=qdrant_url, collection_name=collection_name, embedding_model=embedding_model
+    # Les anciens chunks des fichiers modifiés ou disparus sont retirés des deux index
+    for source, chunk_ids in plan.stale_chunks.items():
+        indexer.delete_chunks(source, chunk_ids)
+    if plan.stale_chunks:
+        es_delete_documents(plan.stale_chunk_ids)
+
+    report = index_stream(
+        _track_chunks(pipeline, plan, manifest, indexer.model_name),
+        indexer,
+        batch_size=batch_size,
+        on_batch=manifest.save,
     )
-    indexer.index_documents(documents)
-    typer.echo(f"{len(documents)} documents indexés dans la collection '{collection_name}'.")
+    manifest.forget(entry.path for entry in plan.removed)
+    manifest.save()
 
-    # Indexation Elasticsearch (BM25)
-    failures = 0
-    for chunk in chunks:
-        body = _build_es_body(chunk)
-        try:
-            print(f"DEBUG: Indexing chunk {chunk.id} into Elasticsearch", flush=True)
-            es_index_document(str(chunk.id), body=body)
-            print(f"DEBUG: Successfully indexed chunk {chunk.id}", flush=True)
-        except Exception as exc:  # pragma: no cover - dépend de la dispo ES
-            failures += 1
-            typer.echo(f"[AVERTISSEMENT] Indexation Elasticsearch échouée pour {chunk.id}: {exc}")
-
-    if failures:
-        typer.echo(f"{failures} fragments n'ont pas pu être indexés dans Elasticsearch.")
+    typer.echo(
+        f"{report.documents} documents indexés dans la collection '{collection_name}' "
+        f"({report.batches} lot(s) de {batch_size} chunks max)."
+    )
+    if report.chunks:
+        _echo_bulk_report(report.elastic)
+
+    # Signale les sources réindexées ou supprimées pour invalider les caches de la Gateway
+    record_index_stamps(plan.sources | report.sources)
+
+
+def _track_chunks(
+    pipeline: IngestionPipeline, plan: IndexPlan, manifest: IndexManifest, embedding_model: str
+) -> Iterator:
+    """Chunks des éléments du plan ; chaque fichier parsé avec succès est inscrit au manifeste.
+
+    Un fichier en échec n'est pas inscrit : il sera retenté au prochain passage.
+    Un fichier n'est inscrit qu'à la lecture du chunk suivant son dernier, donc
+    pendant la constitution du lot qui contient ce dernier chunk : une sauvegarde
+    après l'indexation de ce lot ne référence que des chunks déjà indexés.
+    """
+    parsed_items = pipeline.parse((connector, item) for connector, item, _ in plan.to_index)
+    for (_, _, state), parsed in zip(plan.to_index, parsed_items):
+        # Les chunks d'un parsing séquentiel ne se lisent qu'une fois
+        chunk_ids = []
+        for chunk in parsed.chunks:
+            chunk_ids.append(str(chunk.id))
+            yield chunk
+        if state is not None and parsed.error is None:
+            manifest.record(state, chunk_ids, embedding_model)
+
+
+def _echo_bulk_report(report) -> None:
+    if report.skipped:
+        typer.echo("[AVERTISSEMENT] Elasticsearch indisponible : index BM25 non alimenté.")
+        return
+    if report.failed_ids:
+        more = report.failed - len(report.failed_ids)
+        suffix = f" (+{more})" if more > 0 else ""
+        typer.echo(f"[AVERTISSEMENT] Fragments rejetés par Elasticsearch : {', '.join(report.failed_ids)}{suffix}")
+    for error in report.errors:
+        typer.echo(f"  {error}")
+    if report.failed:
+        typer.echo(f"{report.failed} fragments n'ont pas pu être indexés dans Elasticsearch.")
     else:
-        typer.echo("Indexation Elasticsearch terminée.")
+        typer.echo(f"Indexation Elasticsearch terminée ({report.indexed} fragments).")
+
+
+def _chunk_sources(chunks: Iterable) -> set[str]:
+    return {str(chunk.metadata["source"]) for chunk in chunks if chunk.metadata.get("source")}
 
 
 if __name__ == "__main__":
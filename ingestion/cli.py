@@ -8,7 +8,13 @@ from typing import Optional
 
 import typer
 
-from ingestion.config import ExcelConnectorOptions, IngestionConfig, MariaDBConfig, SourceCredentials
+from ingestion.config import (
+    ExcelConnectorOptions,
+    IngestionConfig,
+    MariaDBConfig,
+    PDFConnectorOptions,
+    SourceCredentials,
+)
 from ingestion.pipeline import IngestionPipeline
 
 
@@ -75,6 +81,15 @@ def _load_config(path: Path) -> IngestionConfig:
             sheet_whitelist=options.get("sheet_whitelist", config.excel_options.sheet_whitelist),
         )
 
+    if "pdf_options" in data:
+        options = data["pdf_options"]
+        config.pdf_options = PDFConnectorOptions(
+            backend=options.get("backend", config.pdf_options.backend),
+            page_workers=options.get("page_workers", config.pdf_options.page_workers),
+            pages_per_task=options.get("pages_per_task", config.pdf_options.pages_per_task),
+            table_path_threshold=options.get("table_path_threshold", config.pdf_options.table_path_threshold),
+        )
+
     if "mariadb" in data:
         db_cfg = data["mariadb"]
         config.mariadb = MariaDBConfig(
@@ -88,6 +103,7 @@ def _load_config(path: Path) -> IngestionConfig:
     config.chunk_size = data.get("chunk_size", config.chunk_size)
     config.chunk_overlap = data.get("chunk_overlap", config.chunk_overlap)
     config.language = data.get("language", config.language)
+    config.workers = data.get("workers", config.workers)
 
     return config
 
@@ -1,6 +1,7 @@
 """Configuration de l'ingestion pour la plateforme RAG."""
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -46,6 +47,21 @@ class ExcelConnectorOptions:
     sheet_whitelist: Optional[List[str]] = None
 
 
+@dataclass(slots=True)
+class PDFConnectorOptions:
+    """Options spécifiques aux PDF."""
+
+    # "auto" : pypdfium2 (rapide) et pdfplumber pour les pages à tableaux ;
+    # "pdfplumber" : pdfplumber pour toutes les pages
+    backend: str = field(default_factory=lambda: os.getenv("PDF_TEXT_BACKEND", "auto"))
+    # Processus d'extraction des pages d'un même PDF (1 = séquentiel)
+    page_workers: int = field(default_factory=lambda: int(os.getenv("PDF_PAGE_WORKERS", "1")))
+    # Pages extraites par tâche (et gardées en mémoire à la fois par processus)
+    pages_per_task: int = 16
+    # Tracés vectoriels (traits, cadres) au-delà desquels une page est traitée comme un tableau
+    table_path_threshold: int = 40
+
+
 @dataclass(slots=True)
 class MariaDBConfig:
     """Paramètres de connexion à MariaDB."""
@@ -66,11 +82,14 @@ class IngestionConfig:
     pdf: ConnectorConfig = field(default_factory=lambda: ConnectorConfig(enabled=True))
     excel: ConnectorConfig = field(default_factory=lambda: ConnectorConfig(enabled=True))
     excel_options: ExcelConnectorOptions = field(default_factory=ExcelConnectorOptions)
+    pdf_options: PDFConnectorOptions = field(default_factory=PDFConnectorOptions)
     mariadb: MariaDBConfig = field(default_factory=MariaDBConfig)
     mariadb_source: ConnectorConfig = field(default_factory=lambda: ConnectorConfig(enabled=False))
     chunk_size: int = 1200  # Augmenté de 600 à 1200
     chunk_overlap: int = 200  # Augmenté de 80 à 200
     language: str = "fr"
+    # Processus de parsing en parallèle (1 = séquentiel dans le processus courant)
+    workers: int = field(default_factory=lambda: int(os.getenv("INGESTION_WORKERS", "1")))
 
 
 DEFAULT_CONFIG = IngestionConfig()
@@ -80,6 +99,7 @@ __all__ = [
     "SourceCredentials",
     "ConnectorConfig",
     "ExcelConnectorOptions",
+    "PDFConnectorOptions",
     "MariaDBConfig",
     "IngestionConfig",
     "DEFAULT_CONFIG",
@@ -4,7 +4,7 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Mapping, Protocol
+from typing import Iterable, Mapping, Protocol, Tuple
 
 from ingestion.config import ConnectorConfig
 
@@ -30,13 +30,23 @@ class BaseConnector(ABC):
     """Spécifie l'interface minimale d'un connecteur d'ingestion."""
 
     document_type: str
+    # Extensions prises en charge ; les connecteurs fichiers sont alimentés par
+    # le parcours partagé de ``ingestion.discovery``
+    extensions: Tuple[str, ...] = ()
 
     def __init__(self, config: ConnectorConfig) -> None:
         self.config = config
 
-    @abstractmethod
+    def accepts(self, path: Path) -> bool:
+        """Vrai si ``path`` relève de ce connecteur (hors règles d'exclusion)."""
+        return path.suffix.lower() in self.extensions
+
     def discover(self) -> Iterable[Path]:
         """Retourne la liste des fichiers à ingérer."""
+        from ingestion.discovery import discover_files
+
+        for _, path in discover_files([self]):
+            yield path
 
     @abstractmethod
     def load(self, path: Path) -> Iterable[DocumentChunk]:
@@ -6,31 +6,18 @@ from typing import Iterable
 
 from ingestion.config import ConnectorConfig
 from ingestion.connectors.base import BaseConnector, DocumentChunk
-from ingestion.metadata_utils import extract_ao_metadata, should_exclude_path
+from ingestion.metadata_utils import extract_ao_metadata
 
 
 class DocxConnector(BaseConnector):
     """Découpe les documents DOCX par paragraphe."""
 
     document_type = "docx"
+    extensions = (".docx",)
 
-    def _iter_docx_files(self, directory: Path) -> Iterable[Path]:
-        iterator = directory.rglob("*.docx") if self.config.recursive else directory.glob("*.docx")
-        for candidate in iterator:
-            if candidate.name.startswith("~$"):
-                continue
-            yield candidate
-
-    def discover(self) -> Iterable[Path]:
-        for path in self.config.paths:
-            if path.is_dir():
-                for candidate in self._iter_docx_files(path):
-                    if should_exclude_path(candidate, self.config):
-                        continue
-                    yield candidate
-            elif path.suffix.lower() == ".docx" and not path.name.startswith("~$"):
-                if not should_exclude_path(path, self.config):
-                    yield path
+    def accepts(self, path: Path) -> bool:
+        # Fichiers verrous de Word (~$nom.docx)
+        return super().accepts(path) and not path.name.startswith("~$")
 
     def load(self, path: Path) -> Iterable[DocumentChunk]:
         try:
@@ -1,75 +1,93 @@
 """Connecteur Excel multi-onglets."""
 from __future__ import annotations
 
+import logging
+import re
 from pathlib import Path
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable
 
 from ingestion.config import ConnectorConfig, ExcelConnectorOptions
 from ingestion.connectors.base import BaseConnector, DocumentChunk
-from ingestion.metadata_utils import extract_ao_metadata, should_exclude_path
+from ingestion.metadata_utils import extract_ao_metadata
 
 try:
+    import numpy as np
     import pandas as pd
 except ImportError:
+    np = None
     pd = None  # Sera vérifié dans load()
 
+if TYPE_CHECKING:  # pragma: no cover
+    from ingestion.sheet_cells import SheetCells
+
+LOGGER = logging.getLogger(__name__)
+
+SECTION_KEYWORDS = (
+    "section", "chapitre", "partie", "lot",
+    "fourniture", "main", "matériel", "travaux",
+    "sous-traitance", "prestation",
+)
+SUBTOTAL_KEYWORDS = ("sous-total", "sous total", "subtotal", "total partiel")
+TOTAL_KEYWORDS = ("total", "montant total", "total général", "total ht", "total ttc")
+SECTION_PATTERN = "|".join(re.escape(keyword) for keyword in SECTION_KEYWORDS)
+SUBTOTAL_PATTERN = "|".join(re.escape(keyword) for keyword in SUBTOTAL_KEYWORDS)
+TOTAL_PATTERN = "|".join(re.escape(keyword) for keyword in TOTAL_KEYWORDS)
+
+
+def _format_amount(value) -> str:
+    return f"{value:,.2f} EUR".replace(",", " ")
 
 
 class ExcelConnector(BaseConnector):
     """Découpe les classeurs Excel par onglet et par bloc tabulaire."""
 
     document_type = "excel"
+    extensions = (".xls", ".xlsx")
 
     def __init__(self, config: ConnectorConfig, options: ExcelConnectorOptions) -> None:
         super().__init__(config)
         self.options = options
 
-    def discover(self) -> Iterable[Path]:
-        patterns = ("*.xls", "*.xlsx")
-        for path in self.config.paths:
-            if path.is_dir():
-                for pattern in patterns:
-                    iterator = path.rglob(pattern) if self.config.recursive else path.glob(pattern)
-                    for candidate in iterator:
-                        if should_exclude_path(candidate, self.config):
-                            continue
-                        yield candidate
-            elif path.suffix.lower() in {".xls", ".xlsx"} and not should_exclude_path(path, self.config):
-                yield path
-
     def load(self, path: Path) -> Iterable[DocumentChunk]:
         try:
             import pandas as pd
         except ImportError as exc:  # pragma: no cover - dépendance optionnelle
             raise ImportError("pandas doit être installé pour utiliser le connecteur Excel") from exc
 
-        excel_file = pd.ExcelFile(path)
+        from ingestion.sheet_cells import SheetCells
+        from ingestion.workbooks import load_workbook
+
+        workbook = load_workbook(path)
         sheet_names = (
             self.options.sheet_whitelist
             if self.options.sheet_whitelist
-            else excel_file.sheet_names
+            else workbook.sheet_names
         )
         
-        print(f"DEBUG: ExcelConnector.load path={path} (semantic chunking enabled)", flush=True)
+        LOGGER.debug("ExcelConnector.load path=%s (semantic chunking enabled)", path)
         
         for sheet_name in sheet_names:
-            dataframe = excel_file.parse(sheet_name)
+            dataframe = workbook.sheet(sheet_name)
             dataframe = self._truncate(dataframe)
             if dataframe.empty:
                 continue
             
+            # Cellules, masques et textes calculés une fois pour toute la feuille
+            cells = SheetCells(dataframe)
+            row_texts = cells.row_texts()
+
             # Détecter le total général s'il existe
-            global_total = self._extract_global_total(dataframe, sheet_name)
+            global_total = self._extract_global_total(cells, row_texts, sheet_name)
             
             # Détecter les sections dans le tableau
-            sections = self._detect_sections(dataframe)
+            sections = self._detect_sections(cells, row_texts)
             
             if sections:
                 # Chunking par section sémantique
-                print(f"DEBUG: Found {len(sections)} sections in {sheet_name}", flush=True)
+                LOGGER.debug("Found %d sections in %s", len(sections), sheet_name)
                 for chunk_idx, section in enumerate(sections):
                     chunk_text = self._format_section_chunk(
-                        dataframe, 
+                        cells, 
                         section, 
                         sheet_name, 
                         global_total
@@ -98,13 +116,13 @@ class ExcelConnector(BaseConnector):
                         )
             else:
                 # Fallback: chunking par blocs de lignes (amélioré)
-                print(f"DEBUG: No sections detected in {sheet_name}, using row-based chunking", flush=True)
+                LOGGER.debug("No sections detected in %s, using row-based chunking", sheet_name)
                 chunk_size = getattr(self.options, "chunk_size", 20)  # Augmenté de 10 à 20
                 
                 for chunk_idx, start_row in enumerate(range(0, len(dataframe), chunk_size)):
                     end_row = min(start_row + chunk_size, len(dataframe))
                     chunk_text = self._format_row_chunk(
-                        dataframe, 
+                        cells, 
                         start_row, 
                         end_row, 
                         sheet_name, 
@@ -127,195 +145,125 @@ class ExcelConnector(BaseConnector):
                             metadata=metadata,
                         )
 
-    def _extract_global_total(self, dataframe: "pd.DataFrame", sheet_name: str) -> str:
+    def _extract_global_total(self, cells: "SheetCells", row_texts: "pd.Series", sheet_name: str) -> str:
         """Extrait le total général du tableau s'il existe."""
-        import pandas as pd
-        
         # Chercher dans les dernières lignes
-        for idx in range(max(0, len(dataframe) - 5), len(dataframe)):
-            row = dataframe.iloc[idx]
-            row_text = " ".join([str(v) for v in row if pd.notna(v)]).lower()
-            
-            # Patterns de totaux
-            if any(keyword in row_text for keyword in ["total", "montant total", "total général", "total ht", "total ttc"]):
-                # Extraire les valeurs numériques
-                for val in row:
-                    if pd.notna(val) and isinstance(val, (int, float)) and val > 0:
-                        return f"{val:,.2f} EUR".replace(",", " ")
-        
+        tail = row_texts.iloc[max(0, len(cells) - 5):].str.lower()
+        for position in np.flatnonzero(tail.str.contains(TOTAL_PATTERN).to_numpy(dtype=bool)):
+            # Extraire les valeurs numériques
+            value = cells.first_positive_number(max(0, len(cells) - 5) + position)
+            if value is not None:
+                return _format_amount(value)
         return ""
 
-    def _detect_sections(self, dataframe: "pd.DataFrame") -> list:
+    def _detect_sections(self, cells: "SheetCells", row_texts: "pd.Series") -> list:
         """Détecte les sections dans le tableau (titres, sous-totaux)."""
-        import pandas as pd
-        import re
-        
+        texts = row_texts.str.strip().str.lower()
+
+        # Titre de section : ligne avec 1-3 colonnes remplies, contient des mots-clés
+        non_empty = cells.filled.sum(axis=1)
+        is_section_header = (
+            (non_empty <= 3)
+            & (texts.str.len() > 3).to_numpy(dtype=bool)
+            & texts.str.contains(SECTION_PATTERN).to_numpy(dtype=bool)
+        )
+        # Sous-total
+        is_subtotal = texts.str.contains(SUBTOTAL_PATTERN).to_numpy(dtype=bool)
+
         sections = []
         current_section = None
-        
-        for idx, row in dataframe.iterrows():
-            row_text = " ".join([str(v) for v in row if pd.notna(v)]).strip().lower()
-            
-            # Détecter un titre de section (ligne avec peu de colonnes remplies, texte en majuscules)
-            non_empty = sum(1 for v in row if pd.notna(v) and str(v).strip())
-            
-            # Pattern de section : ligne avec 1-3 colonnes remplies, contient des mots-clés
-            is_section_header = (
-                non_empty <= 3 and 
-                len(row_text) > 3 and
-                any(keyword in row_text for keyword in [
-                    "section", "chapitre", "partie", "lot", 
-                    "fourniture", "main", "matériel", "travaux",
-                    "sous-traitance", "prestation"
-                ])
-            )
-            
-            # Détecter un sous-total
-            is_subtotal = any(keyword in row_text for keyword in [
-                "sous-total", "sous total", "subtotal", "total partiel"
-            ])
-            
-            if is_section_header:
+        for position in np.flatnonzero(is_section_header | is_subtotal):
+            idx = cells.index[position]
+            if is_section_header[position]:
                 # Sauvegarder la section précédente
                 if current_section:
                     current_section["end_row"] = idx - 1
                     sections.append(current_section)
-                
+
                 # Nouvelle section
-                section_name = row_text.title()
                 current_section = {
-                    "name": section_name,
+                    "name": texts.iloc[position].title(),
                     "start_row": idx,
-                    "end_row": len(dataframe) - 1,  # Par défaut jusqu'à la fin
+                    "end_row": len(cells) - 1,  # Par défaut jusqu'à la fin
                     "total": None
                 }
-            
-            elif is_subtotal and current_section:
+
+            elif current_section:
                 # Extraire le montant du sous-total
-                for val in row:
-                    if pd.notna(val) and isinstance(val, (int, float)) and val > 0:
-                        current_section["total"] = f"{val:,.2f} EUR".replace(",", " ")
-                        break
-        
+                value = cells.first_positive_number(position)
+                if value is not None:
+                    current_section["total"] = _format_amount(value)
+
         # Sauvegarder la dernière section
         if current_section:
             sections.append(current_section)
-        
+
         return sections
 
     def _format_section_chunk(
-        self, 
-        dataframe: "pd.DataFrame", 
-        section: dict, 
-        sheet_name: str, 
+        self,
+        cells: "SheetCells",
+        section: dict,
+        sheet_name: str,
         global_total: str
     ) -> str:
         """Formate un chunk pour une section sémantique."""
-        import pandas as pd
-        
         lines = []
         lines.append(f"Sheet: {sheet_name}")
-        
+
         if global_total:
             lines.append(f"TOTAL GÉNÉRAL: {global_total}")
-        
+
         lines.append("")
         lines.append(f"Section: {section['name']}")
         lines.append(f"Rows {section['start_row'] + 1}-{section['end_row'] + 1}")
         lines.append("")
-        
+
         # Extraire les données de la section
-        section_df = dataframe.iloc[section["start_row"]:section["end_row"] + 1]
-        headers = dataframe.columns.tolist()
-        
-        for row_idx, row in section_df.iterrows():
-            row_lines = []
-            for col_name in headers:
-                value = row[col_name]
-                if pd.notna(value) and str(value).strip():
-                    header_str = str(col_name)
-                    is_unnamed = header_str.startswith("Unnamed")
-                    
-                    # Formatage des nombres
-                    val_str = str(value)
-                    if isinstance(value, (int, float)):
-                        try:
-                            if value > 999:
-                                space_fmt = f"{int(value):_}".replace("_", " ")
-                                val_str = f"{value} (lisible: {space_fmt})"
-                        except Exception:
-                            pass
-                    
-                    if not is_unnamed:
-                        row_lines.append(f"{header_str}: {val_str}")
-                    else:
-                        row_lines.append(val_str)
-            
+        for position in range(section["start_row"], min(section["end_row"] + 1, len(cells))):
+            row_lines = cells.row_items(position)
             if row_lines:
                 lines.append(f"  • {', '.join(row_lines)}")
-        
+
         if section.get("total"):
             lines.append("")
             lines.append(f"SOUS-TOTAL {section['name']}: {section['total']}")
-        
+
         return "\n".join(lines) if len(lines) > 5 else ""
 
     def _format_row_chunk(
-        self, 
-        dataframe: "pd.DataFrame", 
-        start_row: int, 
-        end_row: int, 
-        sheet_name: str, 
+        self,
+        cells: "SheetCells",
+        start_row: int,
+        end_row: int,
+        sheet_name: str,
         global_total: str
     ) -> str:
         """Formate un chunk basé sur des lignes (fallback)."""
-        import pandas as pd
-        
-        chunk_df = dataframe.iloc[start_row:end_row]
-        headers = dataframe.columns.tolist()
-        
         lines = []
         lines.append(f"Sheet: {sheet_name}")
-        
+
         if global_total:
             lines.append(f"TOTAL GÉNÉRAL: {global_total}")
-        
-        lines.append(f"Rows {start_row + 1}-{end_row} of {len(dataframe)}")
+
+        lines.append(f"Rows {start_row + 1}-{end_row} of {len(cells)}")
         lines.append("")
-        
-        for row_idx, row in chunk_df.iterrows():
-            row_lines = []
-            for col_name in headers:
-                value = row[col_name]
-                if pd.notna(value) and str(value).strip():
-                    header_str = str(col_name)
-                    is_unnamed = header_str.startswith("Unnamed")
-                    
-                    val_str = str(value)
-                    if isinstance(value, (int, float)):
-                        try:
-                            if value > 999:
-                                space_fmt = f"{int(value):_}".replace("_", " ")
-                                val_str = f"{value} (lisible: {space_fmt})"
-                        except Exception:
-                            pass
-                    
-                    if not is_unnamed:
-                        row_lines.append(f"{header_str}: {val_str}")
-                    else:
-                        row_lines.append(val_str)
-            
+
+        for position in range(start_row, end_row):
+            row_lines = cells.row_items(position)
             if row_lines:
-                lines.append(f"Row {row_idx + 1}:")
+                lines.append(f"Row {cells.index[position] + 1}:")
                 lines.extend([f"  - {line}" for line in row_lines])
                 lines.append("")
-        
-        return "\n".join(lines) if len(lines) > 3 else ""
 
+        return "\n".join(lines) if len(lines) > 3 else ""
 
     def _truncate(self, dataframe: "pd.DataFrame") -> "pd.DataFrame":
         rows = self.options.max_rows
         cols = self.options.max_columns
+        if rows is None and cols is None:
+            # Frame partagé par le cache de classeurs : .attrs ne doit pas le modifier
+            dataframe = dataframe.copy(deep=False)
         if rows is not None:
             dataframe = dataframe.head(rows)
         if cols is not None:
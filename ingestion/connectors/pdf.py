@@ -1,53 +1,87 @@
-"""Connecteur PDF basé sur pdfplumber (licence MIT)."""
+"""Connecteur PDF : extraction page par page, pypdfium2 avec repli pdfplumber.
+
+- Le texte des pages est extrait par pypdfium2 (PDFium, rapide) ; les pages
+  chargées de tracés vectoriels (tableaux, cadres) passent par pdfplumber, dont
+  l'analyse de mise en page restitue mieux les cellules. ``backend="pdfplumber"``
+  force pdfplumber partout (comportement historique).
+- Chaque page produit son propre ``DocumentChunk`` (métadonnée ``page``, à
+  partir de 1) : les chunks en aval gardent leur numéro de page et le document
+  n'est jamais concaténé en mémoire.
+- Avec ``page_workers > 1``, les pages d'un même PDF sont réparties par blocs de
+  ``pages_per_task`` sur un pool de processus, restituées dans l'ordre.
+"""
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from ingestion.config import ConnectorConfig
+from ingestion.config import ConnectorConfig, PDFConnectorOptions
 from ingestion.connectors.base import BaseConnector, DocumentChunk
-from ingestion.metadata_utils import extract_ao_metadata, should_exclude_path
+from ingestion.metadata_utils import extract_ao_metadata
+
+try:
+    import pypdfium2 as pdfium
+    import pypdfium2.raw as pdfium_c
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    pdfium = None
+    pdfium_c = None
+
+PageText = Tuple[int, str]
 
 
 class PDFConnector(BaseConnector):
     """Découpe les PDF page par page."""
 
     document_type = "pdf"
+    extensions = (".pdf",)
 
-    def discover(self) -> Iterable[Path]:
-        for path in self.config.paths:
-            if path.is_dir():
-                iterator = path.rglob("*.pdf") if self.config.recursive else path.glob("*.pdf")
-                for candidate in iterator:
-                    if should_exclude_path(candidate, self.config):
-                        continue
-                    yield candidate
-            elif path.suffix.lower() == ".pdf" and not should_exclude_path(path, self.config):
-                yield path
+    def __init__(self, config: ConnectorConfig, options: Optional[PDFConnectorOptions] = None) -> None:
+        super().__init__(config)
+        self.options = options or PDFConnectorOptions()
 
     def load(self, path: Path) -> Iterable[DocumentChunk]:
-        try:
-            import pdfplumber
-        except ImportError as exc:  # pragma: no cover
-            raise ImportError("pdfplumber doit être installé pour utiliser le connecteur PDF") from exc
-
-        with pdfplumber.open(str(path)) as pdf:
-            doc_metadata = pdf.metadata or {}
-            full_text = []
-            for page in pdf.pages:
-                text = page.extract_text() or ""
-                if text:
-                    full_text.append(text)
+        use_pdfium = self.options.backend != "pdfplumber" and pdfium is not None
+        page_count, doc_metadata = _document_info(str(path), use_pdfium)
 
-            if not full_text:
-                return
+        base_metadata = self._build_metadata(path, 0, doc_metadata)
+        base_metadata["parent_id"] = path.stem
+        base_metadata.update(extract_ao_metadata(path))
 
-            joined_text = "\n".join(full_text)
-            metadata = self._build_metadata(path, 0, doc_metadata)
-            # On retire 'page' des métadonnées car c'est tout le document
-            metadata.pop("page", None)
-            metadata.update(extract_ao_metadata(path))
-            yield DocumentChunk(id=path.stem, text=joined_text, metadata=metadata)
+        for index, text in self._iter_pages(str(path), page_count, use_pdfium):
+            if not text.strip():
+                continue
+            metadata = dict(base_metadata)
+            metadata["page"] = index + 1
+            yield DocumentChunk(id=f"{path.stem}-page{index + 1}", text=text, metadata=metadata)
+
+    def _iter_pages(self, path: str, page_count: int, use_pdfium: bool) -> Iterator[PageText]:
+        """Texte des pages dans l'ordre, au plus quelques blocs en mémoire."""
+        step = max(1, self.options.pages_per_task)
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        threshold = self.options.table_path_threshold
+        workers = min(max(1, self.options.page_workers), len(ranges))
+        if workers <= 1:
+            for start, stop in ranges:
+                yield from _extract_range(path, start, stop, use_pdfium, threshold)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending: Deque[Any] = deque()
+            tasks = iter(ranges)
+            try:
+                for start, stop in islice(tasks, workers * 2):
+                    pending.append(executor.submit(_extract_range, path, start, stop, use_pdfium, threshold))
+                while pending:
+                    pages = pending.popleft().result()
+                    for start, stop in islice(tasks, 1):
+                        pending.append(executor.submit(_extract_range, path, start, stop, use_pdfium, threshold))
+                    yield from pages
+            finally:
+                for future in pending:
+                    future.cancel()
 
     def _build_metadata(self, path: Path, index: int, info: dict) -> dict:
         metadata: dict = {
@@ -62,4 +96,65 @@ class PDFConnector(BaseConnector):
         return metadata
 
 
+def _document_info(path: str, use_pdfium: bool) -> Tuple[int, Dict[str, Any]]:
+    """Nombre de pages et métadonnées du document."""
+    if use_pdfium:
+        document = pdfium.PdfDocument(path)
+        try:
+            return len(document), document.get_metadata_dict()
+        finally:
+            document.close()
+    pdfplumber = _import_pdfplumber()
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages), pdf.metadata or {}
+
+
+def _extract_range(path: str, start: int, stop: int, use_pdfium: bool, table_threshold: int) -> List[PageText]:
+    """Texte des pages ``[start, stop)`` ; exécuté aussi dans les processus du pool."""
+    pages: List[PageText] = []
+    document = pdfium.PdfDocument(path) if use_pdfium else None
+    plumber = None
+    try:
+        for index in range(start, stop):
+            text = _pdfium_page_text(document, index, table_threshold) if document is not None else None
+            if text is None:
+                if plumber is None:
+                    plumber = _import_pdfplumber().open(path)
+                page = plumber.pages[index]
+                text = page.extract_text() or ""
+                # Libère les objets mis en cache par pdfplumber pour cette page
+                page.close()
+            pages.append((index, text))
+    finally:
+        if document is not None:
+            document.close()
+        if plumber is not None:
+            plumber.close()
+    return pages
+
+
+def _pdfium_page_text(document: Any, index: int, table_threshold: int) -> Optional[str]:
+    """Texte PDFium de la page, ou ``None`` si elle ressemble à un tableau."""
+    page = document[index]
+    try:
+        paths = page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_PATH], max_depth=1)
+        if sum(1 for _ in islice(paths, table_threshold)) >= table_threshold:
+            return None
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range().replace("\r\n", "\n")
+        finally:
+            textpage.close()
+    finally:
+        page.close()
+
+
+def _import_pdfplumber():
+    try:
+        import pdfplumber
+    except ImportError as exc:  # pragma: no cover
+        raise ImportError("pdfplumber doit être installé pour utiliser le connecteur PDF") from exc
+    return pdfplumber
+
+
 __all__ = ["PDFConnector"]
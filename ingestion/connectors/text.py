@@ -6,30 +6,20 @@ from typing import Iterable
 
 from ingestion.config import ConnectorConfig
 from ingestion.connectors.base import BaseConnector, DocumentChunk
-from ingestion.metadata_utils import extract_ao_metadata, should_exclude_path
+from ingestion.metadata_utils import extract_ao_metadata
 
 
 class TextConnector(BaseConnector):
     """Découpe les fichiers texte en fragments basés sur la taille."""
 
     document_type = "txt"
+    extensions = (".txt",)
 
     def __init__(self, config: ConnectorConfig, chunk_size: int, chunk_overlap: int) -> None:
         super().__init__(config)
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
 
-    def discover(self) -> Iterable[Path]:
-        for path in self.config.paths:
-            if path.is_dir():
-                iterator = path.rglob("*.txt") if self.config.recursive else path.glob("*.txt")
-                for candidate in iterator:
-                    if should_exclude_path(candidate, self.config):
-                        continue
-                    yield candidate
-            elif path.suffix.lower() == ".txt" and not should_exclude_path(path, self.config):
-                yield path
-
     def load(self, path: Path) -> Iterable[DocumentChunk]:
         # Lecture robuste des fichiers texte : on essaie UTF-8 puis un fallback latin-1
         try:
@@ -0,0 +1,145 @@
+"""Découverte des fichiers en un seul parcours de l'arborescence.
+
+Au lieu d'un ``rglob`` par connecteur (et par extension), chaque racine est
+parcourue une seule fois avec ``os.scandir`` :
+
+- les dossiers exclus (``sauvegarde``, ``backup``…) sont élagués dès qu'aucun
+  connecteur ne les accepte, sans descendre dedans ;
+- chaque fichier est confié aux connecteurs qui déclarent son extension
+  (``BaseConnector.extensions``), selon leurs propres règles d'exclusion ;
+- l'ordre est déterministe (entrées triées par nom, fichiers avant sous-dossiers) ;
+- comme ``rglob``, les liens symboliques vers des dossiers ne sont pas suivis
+  (un lien vers un parent bouclerait), les liens vers des fichiers le sont.
+
+:func:`list_files` fournit en plus un listage brut mis en cache, partagé par
+l'inventaire et l'extraction d'insights.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from ingestion.metadata_utils import ExclusionRules, compile_exclusion_rules
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ingestion.connectors.base import BaseConnector
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class _ConnectorRules:
+    """Règles d'un connecteur, calculées une fois par parcours."""
+
+    connector: "BaseConnector"
+    exclusion: ExclusionRules
+    recursive: bool
+
+    def accepts(self, path: Path) -> bool:
+        """Fichier d'un dossier déjà accepté : seuls son extension et son nom comptent."""
+        return (
+            path.suffix.lower() not in self.exclusion.extensions
+            and not self.exclusion.excludes_name(path.name)
+            and self.connector.accepts(path)
+        )
+
+
+def _rules_for(connector: "BaseConnector") -> _ConnectorRules:
+    return _ConnectorRules(
+        connector=connector,
+        exclusion=compile_exclusion_rules(connector.config),
+        recursive=connector.config.recursive,
+    )
+
+
+def _sorted_entries(directory: Path) -> List[os.DirEntry]:
+    try:
+        with os.scandir(directory) as iterator:
+            return sorted(iterator, key=lambda entry: entry.name)
+    except OSError as exc:
+        LOGGER.warning("Unable to list %s: %s", directory, exc)
+        return []
+
+
+def discover_files(connectors: Sequence["BaseConnector"]) -> Iterator[Tuple["BaseConnector", Path]]:
+    """Parcourt une fois chaque racine configurée et répartit les fichiers par connecteur."""
+    roots: Dict[Path, List[_ConnectorRules]] = {}
+    for connector in connectors:
+        rules = _rules_for(connector)
+        for root in connector.config.paths:
+            root = Path(root)
+            # Racine elle-même dans un dossier exclu : rien à prendre pour ce connecteur
+            if any(rules.exclusion.excludes_name(part) for part in root.parts):
+                continue
+            roots.setdefault(root, []).append(rules)
+
+    for root, rules in roots.items():
+        if root.is_dir():
+            yield from _walk(root, rules)
+        elif root.is_file():
+            for rule in rules:
+                if rule.accepts(root):
+                    yield rule.connector, root
+
+
+def _walk(root: Path, rules: List[_ConnectorRules]) -> Iterator[Tuple["BaseConnector", Path]]:
+    stack: List[Tuple[Path, List[_ConnectorRules]]] = [(root, rules)]
+    while stack:
+        directory, active = stack.pop()
+        subdirs: List[Tuple[Path, List[_ConnectorRules]]] = []
+        for entry in _sorted_entries(directory):
+            if entry.is_dir(follow_symlinks=False):
+                name = entry.name
+                children = [rule for rule in active if rule.recursive and not rule.exclusion.excludes_name(name)]
+                if children:
+                    subdirs.append((Path(entry.path), children))
+            elif entry.is_file():
+                path = Path(entry.path)
+                for rule in active:
+                    if rule.accepts(path):
+                        yield rule.connector, path
+        stack.extend(reversed(subdirs))
+
+
+def list_files(root: Path, recursive: bool = True) -> Tuple[Path, ...]:
+    """Tous les fichiers sous ``root`` (sans filtre), mis en cache pour le processus.
+
+    Appeler :func:`clear_listing_cache` si l'arborescence a changé.
+    """
+    return _list_files(Path(root), bool(recursive))
+
+
+@lru_cache(maxsize=32)
+def _list_files(root: Path, recursive: bool) -> Tuple[Path, ...]:
+    if not root.is_dir():
+        return ()
+    files: List[Path] = []
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        subdirs: List[Path] = []
+        for entry in _sorted_entries(directory):
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    subdirs.append(Path(entry.path))
+            elif entry.is_file():
+                files.append(Path(entry.path))
+        stack.extend(reversed(subdirs))
+    return tuple(files)
+
+
+def clear_listing_cache() -> None:
+    _list_files.cache_clear()
+
+
+def iter_files(roots: Iterable[Path], recursive: bool = True) -> Iterator[Path]:
+    """Enchaîne :func:`list_files` sur plusieurs racines (sans doublon de racine)."""
+    for root in dict.fromkeys(Path(root) for root in roots):
+        yield from list_files(root, recursive)
+
+
+__all__ = ["clear_listing_cache", "discover_files", "iter_files", "list_files"]
@@ -6,12 +6,16 @@ import logging
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence
+from typing import Dict, List, Sequence
 
 import mariadb
+import numpy as np
 import pandas as pd
 
 from ingestion.config import IngestionConfig, DEFAULT_CONFIG, MariaDBConfig
+from ingestion.discovery import iter_files
+from ingestion.sheet_cells import SheetCells
+from ingestion.workbooks import load_workbook
 
 LOGGER = logging.getLogger(__name__)
 
@@ -100,7 +104,8 @@ class DQETotalExtractor:
     def extract(self, path: Path) -> List[DocumentInsight]:
         records: List[DocumentInsight] = []
         try:
-            sheets = pd.read_excel(path, sheet_name=None, header=None, engine="openpyxl")
+            # Même lecture (et même cache) que le connecteur Excel
+            sheets = load_workbook(path).sheets(header=False)
         except Exception as exc:  # pragma: no cover - dépend des fichiers fournis
             LOGGER.warning("Impossible de lire %s (%s)", path, exc)
             return records
@@ -111,32 +116,28 @@ class DQETotalExtractor:
 
     def _extract_from_sheet(self, path: Path, sheet_name: str, df: pd.DataFrame) -> List[DocumentInsight]:
         insights: List[DocumentInsight] = []
-        for row_idx, row in df.iterrows():
-            labels = [str(cell).strip().lower() for cell in row if pd.notna(cell)]
-            if not labels:
+        cells = SheetCells(df)
+        # Seules les lignes contenant "total" sont examinées cellule par cellule
+        has_total = cells.row_texts().str.lower().str.contains("total", regex=False)
+        for position in np.flatnonzero(has_total.to_numpy(dtype=bool)):
+            numeric_values = cells.numbers(position)
+            if not numeric_values:
                 continue
-            if any("total" in label for label in labels):
-                numeric_values = [
-                    float(cell)
-                    for cell in row
-                    if isinstance(cell, (int, float)) and pd.notna(cell) and abs(cell) > 0
-                ]
-                if not numeric_values:
-                    continue
-                value = max(numeric_values, key=abs)
-                insights.append(
-                    DocumentInsight(
-                        source_path=str(path),
-                        insight_type="dqe_total",
-                        label=f"{Path(path).name}::{sheet_name}::ligne_{row_idx}",
-                        value=value,
-                        unit="EUR",
-                        metadata={
-                            "sheet": sheet_name,
-                            "row_index": str(row_idx),
-                        },
-                    )
+            row_idx = cells.index[position]
+            value = max(numeric_values, key=abs)
+            insights.append(
+                DocumentInsight(
+                    source_path=str(path),
+                    insight_type="dqe_total",
+                    label=f"{Path(path).name}::{sheet_name}::ligne_{row_idx}",
+                    value=value,
+                    unit="EUR",
+                    metadata={
+                        "sheet": sheet_name,
+                        "row_index": str(row_idx),
+                    },
                 )
+            )
         return insights
 
 
@@ -159,19 +160,11 @@ class InsightExtractor:
                 LOGGER.info("→ %s : %s insights enregistrés", path.name, len(insights))
 
     def _discover_excel_paths(self) -> List[Path]:
-        paths: List[Path] = []
-        for root in self.config.excel.paths:
-            path_obj = Path(root)
-            if not path_obj.exists():
-                continue
-            iterator: Iterable[Path]
-            if self.config.excel.recursive:
-                iterator = path_obj.rglob("*.xlsx")
-            else:
-                iterator = path_obj.glob("*.xlsx")
-            for file_path in iterator:
-                paths.append(file_path)
-        return paths
+        return [
+            file_path
+            for file_path in iter_files(self.config.excel.paths, self.config.excel.recursive)
+            if file_path.suffix == ".xlsx"
+        ]
 
 
 __all__ = ["InsightExtractor", "DocumentInsight"]
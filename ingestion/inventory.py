@@ -9,6 +9,7 @@ from typing import Iterable, List, Sequence, Set
 import mariadb
 
 from ingestion.config import DEFAULT_CONFIG, ConnectorConfig, IngestionConfig, MariaDBConfig
+from ingestion.discovery import list_files
 
 
 @dataclass(slots=True)
@@ -92,9 +93,7 @@ class InventoryBuilder:
             base_path = Path(base)
             if not base_path.exists():
                 continue
-            for file_path in base_path.rglob("*"):
-                if not file_path.is_file():
-                    continue
+            for file_path in list_files(base_path):
                 if not self._is_supported(file_path):
                     continue
                 relative = file_path.relative_to(base_path)
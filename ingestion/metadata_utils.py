@@ -1,9 +1,12 @@
 """Utilitaires pour enrichir les métadonnées d'ingestion."""
 from __future__ import annotations
 
+import hashlib
 import re
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, Mapping
+from typing import Dict, FrozenSet, Iterable, Mapping, Tuple
 
 from ingestion.config import ConnectorConfig
 
@@ -63,31 +66,62 @@ SPIGAO_PATTERN = re.compile(r"DIE\s*-\s*([0-9a-fA-F-]{8,})")
 SIGNATURE_PATTERN = re.compile(r"signature\s*(?P<label>[0-9]+)", re.IGNORECASE)
 PROOF_KEYWORDS = ("preuve_de_depot", "confirmation de la cloture", "confirmation de dépôt")
 
+_HASH_BLOCK_SIZE = 1 << 20
 
-def should_exclude_path(path: Path, config: ConnectorConfig) -> bool:
-    """Renvoie True si le fichier doit être ignoré selon son extension ou son dossier."""
-    ext = path.suffix.lower()
-    excluded_exts = {e.lower() for e in config.excluded_extensions}
-    excluded_exts.update(DEFAULT_EXCLUDED_EXTENSIONS)
-    if ext in excluded_exts:
-        return True
-
-    lowered_parts = [part.lower() for part in path.parts]
-    keywords = set(DEFAULT_EXCLUDED_KEYWORDS)
+
+@dataclass(slots=True, frozen=True)
+class ExclusionRules:
+    """Règles d'exclusion d'un connecteur, compilées une fois (cf. :func:`compile_exclusion_rules`)."""
+
+    extensions: FrozenSet[str]
+    keywords: FrozenSet[str]
+
+    def excludes(self, path: Path) -> bool:
+        if path.suffix.lower() in self.extensions:
+            return True
+        return any(part.lower() in self.keywords for part in path.parts)
+
+    def excludes_name(self, name: str) -> bool:
+        """Vrai si un dossier ou fichier de ce nom est ignoré (sans regarder l'extension)."""
+        return name.lower() in self.keywords
+
+
+def compile_exclusion_rules(config: ConnectorConfig) -> ExclusionRules:
+    """Règles d'exclusion de ``config`` (défauts + ``excluded_extensions`` / ``extra['excluded_keywords']``)."""
     custom_keywords = config.extra.get("excluded_keywords")
     if isinstance(custom_keywords, str):
-        keywords.add(custom_keywords.lower())
+        custom: Tuple[str, ...] = (custom_keywords,)
     elif isinstance(custom_keywords, Iterable):
-        keywords.update(str(keyword).lower() for keyword in custom_keywords)
+        custom = tuple(str(keyword) for keyword in custom_keywords)
+    else:
+        custom = ()
+    return _compile_exclusion_rules(tuple(config.excluded_extensions), custom)
+
 
-    if any(keyword in lowered_parts for keyword in keywords):
-        return True
+@lru_cache(maxsize=64)
+def _compile_exclusion_rules(extensions: Tuple[str, ...], keywords: Tuple[str, ...]) -> ExclusionRules:
+    return ExclusionRules(
+        extensions=frozenset(DEFAULT_EXCLUDED_EXTENSIONS | {ext.lower() for ext in extensions}),
+        keywords=frozenset(DEFAULT_EXCLUDED_KEYWORDS | {keyword.lower() for keyword in keywords}),
+    )
 
-    return False
+
+def should_exclude_path(path: Path, config: ConnectorConfig) -> bool:
+    """Renvoie True si le fichier doit être ignoré selon son extension ou son dossier."""
+    return compile_exclusion_rules(config).excludes(path)
 
 
 def extract_ao_metadata(path: Path) -> Dict[str, object]:
-    """Extrait les métadonnées spécifiques aux dossiers AO à partir du chemin."""
+    """Extrait les métadonnées spécifiques aux dossiers AO à partir du chemin.
+
+    Le résultat est mémoïsé par fichier (les connecteurs l'appellent pour chaque
+    chunk d'un même fichier) ; l'appelant reçoit une copie modifiable.
+    """
+    return dict(_ao_metadata(Path(path)))
+
+
+@lru_cache(maxsize=8192)
+def _ao_metadata(path: Path) -> Dict[str, object]:
     metadata: Dict[str, object] = {}
     ao_root = _find_ao_root(path)
     if ao_root:
@@ -147,14 +181,33 @@ def extract_ao_metadata(path: Path) -> Dict[str, object]:
 
 def _find_ao_root(path: Path) -> Path | None:
     """Retourne le dossier parent correspondant à AO/<ID - Commune - Objet>."""
-    for ancestor in path.parents:
-        if ancestor.parent.name.upper() == "AO":
-            return ancestor
-    return None
+    return _directory_ao_root(path.parent)
+
+
+@lru_cache(maxsize=4096)
+def _directory_ao_root(directory: Path) -> Path | None:
+    # Mémoïsé par dossier : les fichiers voisins ne remontent plus l'arborescence
+    if directory.parent.name.upper() == "AO":
+        return directory
+    if directory.parent == directory:
+        return None
+    return _directory_ao_root(directory.parent)
+
+
+def file_sha256(path: Path) -> str:
+    """Hash SHA-256 du contenu d'un fichier (lu par blocs)."""
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while block := handle.read(_HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
 
 
 __all__ = [
     "DEFAULT_EXCLUDED_EXTENSIONS",
+    "ExclusionRules",
+    "compile_exclusion_rules",
+    "file_sha256",
     "should_exclude_path",
     "extract_ao_metadata",
 ]
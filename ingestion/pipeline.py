@@ -1,7 +1,24 @@
-"""Pipeline d'ingestion orchestrée par LlamaIndex."""
+"""Pipeline d'ingestion orchestrée par LlamaIndex.
+
+Le parsing (pdfplumber, pandas/openpyxl) est limité par le CPU : avec
+``IngestionConfig.workers > 1`` les fichiers sont parsés dans un pool de
+processus. Chaque worker renvoie tous les chunks d'un fichier d'un bloc : la
+mémoire retenue est bornée par la fenêtre de ``2 × workers`` fichiers en vol,
+pas par la taille du corpus. En séquentiel (``workers == 1``), les chunks sont
+produits au fil du parsing, sans liste par fichier. L'ordre de sortie et les identifiants de chunks restent ceux du mode
+séquentiel, et l'échec d'un fichier est journalisé sans interrompre le reste.
+Un worker qui meurt (mémoire, crash natif) casse le pool : il est recréé et les
+fichiers en cours sont reparsés un par un dans un processus isolé, ce qui
+désigne le fichier fautif sans perdre les autres.
+"""
 from __future__ import annotations
 
-from typing import Iterable, List, Optional
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Deque, Iterable, Iterator, List, Optional, Tuple
 
 from ingestion.config import DEFAULT_CONFIG, IngestionConfig
 from ingestion.connectors.base import BaseConnector, DocumentChunk
@@ -9,6 +26,7 @@ from ingestion.connectors.docx import DocxConnector
 from ingestion.connectors.excel import ExcelConnector
 from ingestion.connectors.pdf import PDFConnector
 from ingestion.connectors.text import TextConnector
+from ingestion.discovery import discover_files
 
 # Import optionnel de MariaDB
 try:
@@ -21,6 +39,23 @@ from ingestion.structure_detector import StructureDetector
 from ingestion.metadata_enricher import MetadataEnricher
 from ingestion.quality_filter import QualityFilter
 
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class ParsedItem:
+    """Chunks d'un élément découvert, ou l'erreur qui a empêché son parsing.
+
+    En séquentiel, ``chunks`` est un générateur à consommer une seule fois, avant
+    de passer à l'élément suivant ; ``error`` n'est connu qu'après sa consommation
+    et les chunks produits avant l'erreur ont déjà été émis.
+    """
+
+    connector: BaseConnector
+    item: Any
+    chunks: Iterable[DocumentChunk]
+    error: Optional[str] = None
+
 
 class IngestionPipeline:
     """Pipeline orchestrant la découverte, le chunking et l'envoi vers LlamaIndex."""
@@ -36,7 +71,7 @@ class IngestionPipeline:
         if config.docx.enabled:
             connectors.append(DocxConnector(config.docx))
         if config.pdf.enabled:
-            connectors.append(PDFConnector(config.pdf))
+            connectors.append(PDFConnector(config.pdf, config.pdf_options))
         if config.excel.enabled:
             connectors.append(ExcelConnector(config.excel, config.excel_options))
         if config.mariadb_source.enabled and MariaDBConnector is not None:
@@ -145,11 +180,127 @@ class IngestionPipeline:
         for chunk_obj in flush_general():
             yield chunk_obj
 
-    def run(self) -> Iterable[DocumentChunk]:
+    def discover(self) -> Iterator[Tuple[BaseConnector, Any]]:
+        """Énumère les éléments à ingérer (fichiers ou requêtes) avec leur connecteur.
+
+        Les connecteurs fichiers partagent un seul parcours de l'arborescence ;
+        les autres (MariaDB…) gardent leur propre ``discover``.
+        """
+        file_connectors = [connector for connector in self.connectors if connector.extensions]
+        yield from discover_files(file_connectors)
         for connector in self.connectors:
+            if connector.extensions:
+                continue
             for item in connector.discover():
-                for chunk in connector.load(item):  # type: ignore[arg-type]
-                    yield from self._chunk_document(chunk)
+                yield connector, item
+
+    def load(self, connector: BaseConnector, item: Any) -> Iterator[DocumentChunk]:
+        """Charge et découpe un seul élément découvert."""
+        for chunk in connector.load(item):  # type: ignore[arg-type]
+            yield from self._chunk_document(chunk)
+
+    def parse(self, items: Optional[Iterable[Tuple[BaseConnector, Any]]] = None) -> Iterator[ParsedItem]:
+        """Parse chaque élément (par défaut, tout ce qui est découvert), dans l'ordre.
+
+        Un :class:`ParsedItem` est produit par élément, y compris en cas d'échec.
+        """
+        items = self.discover() if items is None else items
+        workers = max(1, self.config.workers)
+        if workers == 1:
+            for connector, item in items:
+                parsed = ParsedItem(connector=connector, item=item, chunks=[])
+                parsed.chunks = self._stream(parsed)
+                yield parsed
+            return
+
+        executor = self._new_executor(workers)
+        # Fenêtre bornée : au plus 2 fichiers en attente par worker, résultats dans l'ordre
+        pending: Deque[Tuple[BaseConnector, Any, Any]] = deque()
+        try:
+            for connector, item in items:
+                try:
+                    future = executor.submit(_parse_in_worker, connector, item)
+                except BrokenProcessPool:
+                    # Un worker est mort : les fichiers en vol seront reparsés isolément par _collect
+                    LOGGER.warning("Worker process died, restarting the parsing pool")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = self._new_executor(workers)
+                    future = executor.submit(_parse_in_worker, connector, item)
+                pending.append((connector, item, future))
+                if len(pending) >= workers * 2:
+                    yield self._collect(*pending.popleft())
+            while pending:
+                yield self._collect(*pending.popleft())
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def run(self, items: Optional[Iterable[Tuple[BaseConnector, Any]]] = None) -> Iterable[DocumentChunk]:
+        """Produit les chunks de ``items`` (par défaut, de tout ce qui est découvert)."""
+        for parsed in self.parse(items):
+            yield from parsed.chunks
+
+    def _stream(self, parsed: ParsedItem) -> Iterator[DocumentChunk]:
+        """Chunks d'un élément au fil du parsing ; une erreur arrête l'élément et renseigne ``parsed.error``."""
+        try:
+            yield from self.load(parsed.connector, parsed.item)
+        except Exception as exc:
+            parsed.error = f"{type(exc).__name__}: {exc}"
+            LOGGER.warning("Parsing failed for %s: %s", parsed.item, parsed.error)
+
+    def _new_executor(self, workers: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,))
+
+    def _collect(self, connector: BaseConnector, item: Any, future) -> ParsedItem:
+        try:
+            chunks, error = future.result()
+        except BrokenProcessPool:
+            # Le pool a perdu un worker : on ne sait pas quel fichier l'a tué
+            chunks, error = self._parse_quarantined(connector, item)
+        except Exception as exc:  # résultat non picklable...
+            chunks, error = [], f"{type(exc).__name__}: {exc}"
+        return self._parsed(connector, item, chunks, error)
+
+    def _parse_quarantined(self, connector: BaseConnector, item: Any) -> Tuple[List[DocumentChunk], Optional[str]]:
+        """Reparse un élément seul dans un processus dédié ; s'il meurt encore, l'élément est fautif."""
+        with self._new_executor(1) as executor:
+            try:
+                return executor.submit(_parse_in_worker, connector, item).result()
+            except BrokenProcessPool as exc:
+                return [], f"{type(exc).__name__}: worker process died while parsing this item"
+            except Exception as exc:
+                return [], f"{type(exc).__name__}: {exc}"
+
+    @staticmethod
+    def _parsed(connector: BaseConnector, item: Any, chunks: List[DocumentChunk], error: Optional[str]) -> ParsedItem:
+        if error:
+            LOGGER.warning("Parsing failed for %s: %s", item, error)
+        return ParsedItem(connector=connector, item=item, chunks=chunks, error=error)
+
+
+def _parse_isolated(
+    pipeline: IngestionPipeline, connector: BaseConnector, item: Any
+) -> Tuple[List[DocumentChunk], Optional[str]]:
+    """Parse un élément ; une erreur est retournée au lieu d'interrompre l'ingestion."""
+    try:
+        return list(pipeline.load(connector, item)), None
+    except Exception as exc:
+        return [], f"{type(exc).__name__}: {exc}"
+
+
+_worker_pipeline: Optional[IngestionPipeline] = None
+
+
+def _init_worker(pipeline: IngestionPipeline) -> None:
+    global _worker_pipeline
+    _worker_pipeline = pipeline
+    # Le QueueHandler hérité n'a pas de listener dans le worker : écriture directe sur stderr
+    root = logging.getLogger()
+    logging.basicConfig(level=root.level, format="%(asctime)s %(levelname)s %(name)s: %(message)s", force=True)
+
+
+def _parse_in_worker(connector: BaseConnector, item: Any) -> Tuple[List[DocumentChunk], Optional[str]]:
+    assert _worker_pipeline is not None
+    return _parse_isolated(_worker_pipeline, connector, item)
 
 
-__all__ = ["IngestionPipeline"]
+__all__ = ["IngestionPipeline", "ParsedItem"]
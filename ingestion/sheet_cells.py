@@ -0,0 +1,89 @@
+"""Vue vectorisée des cellules d'une feuille Excel.
+
+Remplace les boucles ``dataframe.iterrows()`` (un ``Series`` par ligne, un
+``pd.notna``/``str()`` par cellule) du connecteur Excel et de l'extraction des
+totaux DQE. Les cellules sont exactement celles que ``iterrows`` produirait
+(même tableau ``DataFrame.to_numpy()``, donc mêmes types : un ``int`` d'une
+feuille mêlant entiers et flottants y devient ``float``), mais les masques, les
+conversions en texte et les recherches de mots-clés sont calculés une seule
+fois pour toute la feuille.
+"""
+from __future__ import annotations
+
+from typing import Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+_to_str = np.frompyfunc(str, 1, 1)
+
+
+class SheetCells:
+    """Cellules d'une feuille, avec leurs masques et leur texte précalculés."""
+
+    def __init__(self, dataframe: pd.DataFrame) -> None:
+        values = dataframe.to_numpy()
+        if values.dtype.kind in "mM":
+            # iterrows boxe les datetime64/timedelta64 en Timestamp/Timedelta
+            values = pd.Series(values.ravel()).astype(object).to_numpy().reshape(values.shape)
+        self.values = values
+        self.index = dataframe.index
+        self.columns = dataframe.columns
+        self.headers: List[str] = [str(column) for column in dataframe.columns]
+        self.unnamed = [header.startswith("Unnamed") for header in self.headers]
+
+        self.notna: np.ndarray = np.asarray(pd.notna(values), dtype=bool)
+        text = np.full(values.shape, "", dtype=object)
+        if values.size:
+            text[self.notna] = _to_str(values[self.notna])
+        # str(v) pour les cellules renseignées, "" sinon
+        self.text: np.ndarray = text
+        blank = pd.Series(text.ravel(), dtype=object).str.strip().eq("").to_numpy(dtype=bool)
+        # Cellule renseignée et non blanche (``pd.notna(v) and str(v).strip()``)
+        self.filled: np.ndarray = self.notna & ~blank.reshape(values.shape)
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def row_texts(self) -> pd.Series:
+        """``" ".join(str(v) for v in row if pd.notna(v))`` pour chaque ligne."""
+        return pd.Series(
+            [" ".join(row[mask]) for row, mask in zip(self.text, self.notna)],
+            dtype=object,
+        )
+
+    def first_positive_number(self, position: int) -> Optional[Any]:
+        """Première valeur numérique strictement positive de la ligne (ordre des colonnes)."""
+        for value, present in zip(self.values[position], self.notna[position]):
+            if present and isinstance(value, (int, float)) and value > 0:
+                return value
+        return None
+
+    def numbers(self, position: int) -> List[float]:
+        """Valeurs numériques non nulles de la ligne, converties en ``float``."""
+        return [
+            float(value)
+            for value, present in zip(self.values[position], self.notna[position])
+            if present and isinstance(value, (int, float)) and abs(value) > 0
+        ]
+
+    def row_items(self, position: int) -> List[str]:
+        """Cellules renseignées de la ligne, formatées ``en-tête: valeur`` (ou valeur seule)."""
+        items: List[str] = []
+        row = self.values[position]
+        text = self.text[position]
+        for column in np.flatnonzero(self.filled[position]):
+            value = row[column]
+            val_str = text[column]
+            if isinstance(value, (int, float)):
+                try:
+                    if value > 999:
+                        space_fmt = f"{int(value):_}".replace("_", " ")
+                        val_str = f"{value} (lisible: {space_fmt})"
+                except Exception:
+                    pass
+            items.append(val_str if self.unnamed[column] else f"{self.headers[column]}: {val_str}")
+        return items
+
+
+__all__ = ["SheetCells"]
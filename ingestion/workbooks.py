@@ -0,0 +1,237 @@
+"""Lecture partagée des classeurs Excel.
+
+Un même ``.xlsx`` était relu par le connecteur Excel (``pd.ExcelFile`` puis un
+``parse`` par onglet) puis par l'extraction des totaux DQE
+(``pd.read_excel(sheet_name=None)``). Ici chaque classeur est lu une seule
+fois :
+
+- les cellules brutes de chaque onglet sont extraites en une passe (openpyxl en
+  lecture seule, ou calamine si ``INGESTION_EXCEL_ENGINE=calamine``), sans
+  conversion de types ni détection des valeurs manquantes ;
+- les ``DataFrame`` (avec ou sans ligne d'en-tête) en sont dérivés en mémoire
+  par le ``TextParser`` de pandas, exactement comme ``read_excel`` ;
+- le résultat est mis en cache par version de fichier (chemin, date de
+  modification, taille : aucune relecture pour hacher le contenu) : en mémoire
+  (LRU, ``INGESTION_WORKBOOK_CACHE_SIZE`` classeurs) et, si
+  ``INGESTION_WORKBOOK_CACHE_DIR`` est défini, sur disque, ce qui le partage
+  entre les jobs (indexation, insights) montant le même volume.
+
+Le cache disque est en JSON (dates et durées balisées), jamais en pickle : un
+volume partagé ne doit pas pouvoir faire exécuter du code. Il est limité à
+``INGESTION_WORKBOOK_CACHE_MAX_MB`` : au-delà, les fichiers les moins récemment
+utilisés sont supprimés, dont ceux des versions périmées des classeurs.
+"""
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+LOGGER = logging.getLogger(__name__)
+
+INGESTION_EXCEL_ENGINE = os.getenv("INGESTION_EXCEL_ENGINE", "openpyxl")
+WORKBOOK_CACHE_SIZE = int(os.getenv("INGESTION_WORKBOOK_CACHE_SIZE", "8"))
+WORKBOOK_CACHE_DIR = os.getenv("INGESTION_WORKBOOK_CACHE_DIR", "")
+WORKBOOK_CACHE_MAX_MB = float(os.getenv("INGESTION_WORKBOOK_CACHE_MAX_MB", "512"))
+
+# Formats qu'openpyxl sait lire ; les autres (.xls) passent par le moteur par défaut de pandas
+_OPENPYXL_SUFFIXES = {".xlsx", ".xlsm", ".xltx", ".xltm"}
+
+CellGrid = List[List[Any]]
+
+_cache: "OrderedDict[Tuple[str, str], Workbook]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@dataclass(slots=True)
+class Workbook:
+    """Cellules brutes d'un classeur et ``DataFrame`` dérivés (mémoïsés).
+
+    Les ``DataFrame`` renvoyés sont partagés entre appelants : ne pas les modifier.
+    """
+
+    # empreinte de la version lue (chemin, date de modification, taille)
+    fingerprint: str
+    engine: str
+    # onglet -> lignes de cellules, dans l'ordre du classeur
+    grids: Dict[str, CellGrid]
+    _frames: Dict[Tuple[str, bool], pd.DataFrame] = field(default_factory=dict, repr=False)
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return list(self.grids)
+
+    def sheet(self, name: str, header: bool = True) -> pd.DataFrame:
+        """Onglet ``name`` comme ``pd.read_excel(header=0)`` (ou ``header=None``)."""
+        key = (name, header)
+        frame = self._frames.get(key)
+        if frame is None:
+            if name not in self.grids:
+                raise ValueError(f"Worksheet named '{name}' not found")
+            frame = _to_frame(self.grids[name], 0 if header else None)
+            self._frames[key] = frame
+        return frame
+
+    def sheets(self, header: bool = True) -> Dict[str, pd.DataFrame]:
+        """Tous les onglets, comme ``pd.read_excel(sheet_name=None)``."""
+        return {name: self.sheet(name, header) for name in self.grids}
+
+
+def load_workbook(path: Path, engine: Optional[str] = None) -> Workbook:
+    """Classeur ``path``, lu au plus une fois par version (cache mémoire puis disque)."""
+    path = Path(path)
+    engine = engine or INGESTION_EXCEL_ENGINE
+    key = (_fingerprint(path), engine)
+    with _cache_lock:
+        workbook = _cache.get(key)
+        if workbook is not None:
+            _cache.move_to_end(key)
+            return workbook
+
+    grids = _load_cached_grids(key)
+    if grids is None:
+        grids = _read_grids(path, engine)
+        _store_cached_grids(key, grids)
+    workbook = Workbook(fingerprint=key[0], engine=engine, grids=grids)
+
+    with _cache_lock:
+        _cache[key] = workbook
+        while len(_cache) > max(WORKBOOK_CACHE_SIZE, 1):
+            _cache.popitem(last=False)
+    return workbook
+
+
+def clear_workbook_cache() -> None:
+    """Vide le cache mémoire (le cache disque est conservé)."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _fingerprint(path: Path) -> str:
+    stat = path.stat()
+    identity = f"{path.resolve()}|{stat.st_mtime_ns}|{stat.st_size}"
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def _read_grids(path: Path, engine: str) -> Dict[str, CellGrid]:
+    if engine == "openpyxl" and path.suffix.lower() not in _OPENPYXL_SUFFIXES:
+        engine = None
+    # dtype=object et na_filter=False : cellules telles que lues par le moteur
+    # (entiers, dates, "" pour les cases vides), sans inférence ni NaN
+    raw = pd.read_excel(path, sheet_name=None, header=None, dtype=object, na_filter=False, engine=engine)
+    return {name: frame.to_numpy().tolist() for name, frame in raw.items()}
+
+
+def _to_frame(grid: CellGrid, header: Optional[int]) -> pd.DataFrame:
+    # Mêmes options que pandas.read_excel pour une feuille
+    if not grid:
+        return pd.DataFrame()
+    try:
+        return TextParser(grid, header=header, skip_blank_lines=False).read()
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame()
+
+
+def _cache_file(key: Tuple[str, str]) -> Optional[Path]:
+    if not WORKBOOK_CACHE_DIR:
+        return None
+    fingerprint, engine = key
+    return Path(WORKBOOK_CACHE_DIR) / f"{fingerprint}-{engine}.json"
+
+
+def _load_cached_grids(key: Tuple[str, str]) -> Optional[Dict[str, CellGrid]]:
+    cache_file = _cache_file(key)
+    if cache_file is None or not cache_file.exists():
+        return None
+    try:
+        with cache_file.open("r", encoding="utf-8") as handle:
+            # Liste de paires : un nom d'onglet ne peut pas être pris pour une balise
+            grids = dict(json.load(handle, object_hook=_decode_cell))
+        # La date de modification sert d'horodatage LRU pour l'éviction
+        os.utime(cache_file)
+        return grids
+    except Exception as exc:
+        LOGGER.warning("Unreadable workbook cache %s (%s), re-reading workbook", cache_file, exc)
+        return None
+
+
+def _store_cached_grids(key: Tuple[str, str], grids: Dict[str, CellGrid]) -> None:
+    cache_file = _cache_file(key)
+    if cache_file is None:
+        return
+    tmp_path = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(list(grids.items()), handle, default=_encode_cell, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, cache_file)
+    except (OSError, TypeError, ValueError) as exc:
+        LOGGER.warning("Unable to write workbook cache %s: %s", cache_file, exc)
+        tmp_path.unlink(missing_ok=True)
+        return
+    _evict_disk_cache(cache_file.parent)
+
+
+def _evict_disk_cache(cache_dir: Path) -> None:
+    """Supprime les fichiers les moins récemment utilisés au-delà de ``WORKBOOK_CACHE_MAX_MB``."""
+    entries = []
+    for cache_file in cache_dir.glob("*.json"):
+        try:
+            stat = cache_file.stat()
+        except OSError:  # supprimé par un autre job
+            continue
+        entries.append((stat.st_mtime, stat.st_size, cache_file))
+    budget = WORKBOOK_CACHE_MAX_MB * 1024 * 1024
+    total = sum(size for _, size, _ in entries)
+    for _, size, cache_file in sorted(entries):
+        if total <= budget:
+            break
+        cache_file.unlink(missing_ok=True)
+        total -= size
+        LOGGER.debug("Evicted workbook cache %s", cache_file)
+
+
+# Types de cellules absents de JSON, balisés par une clé unique
+def _encode_cell(value: Any) -> Dict[str, Any]:
+    if isinstance(value, datetime.datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {"$time": value.isoformat()}
+    if isinstance(value, datetime.timedelta):
+        return {"$timedelta": value.total_seconds()}
+    raise TypeError(f"Unsupported cell type {type(value).__name__}")
+
+
+def _decode_cell(obj: Dict[str, Any]) -> Any:
+    if len(obj) != 1:
+        return obj
+    (tag, value), = obj.items()
+    if tag == "$datetime":
+        return datetime.datetime.fromisoformat(value)
+    if tag == "$date":
+        return datetime.date.fromisoformat(value)
+    if tag == "$time":
+        return datetime.time.fromisoformat(value)
+    if tag == "$timedelta":
+        return datetime.timedelta(seconds=value)
+    return obj
+
+
+__all__ = [
+    "INGESTION_EXCEL_ENGINE",
+    "Workbook",
+    "clear_workbook_cache",
+    "load_workbook",
+]
@@ -0,0 +1,267 @@
+"""Cache de réponses RAG (niveau exact + niveau sémantique).
+
+Les questions récurrentes (montants DQE, prix unitaires...) paient sinon le
+routage, la recherche, le reranking et une génération complète à chaque fois.
+
+- Niveau exact : question normalisée + "portée" (modèle, filtres résolus, mode
+  hybride, type de question).
+- Niveau sémantique (optionnel, désactivé par défaut) : à portée identique et
+  avec les mêmes nombres et identifiants (``lot 1`` ≠ ``lot 2``, ``ED25123``), une
+  question dont l'embedding a une similarité cosinus >= ``similarity_threshold``
+  avec une des ``semantic_scan`` entrées les plus récentes réutilise sa réponse.
+  Les cosinus sont calculés hors du verrou.
+
+Les entrées expirent (TTL), sont évincées en LRU et sont invalidées quand
+l'indexeur signale la réindexation d'une des sources citées. Une réponse bâtie
+sur une recherche dégradée (branche hybride hors budget ou en échec, cf.
+:func:`retrieval_degraded`) n'est pas mise en cache.
+"""
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from llm_pipeline.config import (
+    ANSWER_CACHE_ENABLED,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_SEMANTIC_SCAN,
+    ANSWER_CACHE_SIMILARITY,
+    ANSWER_CACHE_TTL,
+)
+from llm_pipeline.elastic_client import ALL_SOURCES_STAMP
+from llm_pipeline.metrics import is_tracked
+
+
+def normalize_question(question: str) -> str:
+    """Normalise une question pour la clé de cache (casse, espaces, ponctuation finale)."""
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip(" ?!.;:")
+
+
+def question_anchors(question: str) -> frozenset:
+    """Nombres et identifiants (jetons contenant un chiffre) qui doivent coïncider pour un hit sémantique."""
+    return frozenset(re.findall(r"\w*\d\w*", normalize_question(question)))
+
+
+def cache_scope(model_id: str, filters: Any, use_hybrid: bool, question_type: str) -> str:
+    """Décrit tout ce qui, en dehors de la question, change la réponse."""
+    filter_items = []
+    for f in getattr(filters, "filters", None) or []:
+        value = getattr(f, "value", None)
+        if isinstance(value, (list, tuple)):
+            value = sorted(str(v) for v in value)
+        operator = getattr(f, "operator", "")
+        filter_items.append([str(getattr(f, "key", "")), str(getattr(operator, "value", operator)), value])
+    filter_items.sort(key=lambda item: (item[0], item[1], json.dumps(item[2], default=str)))
+    return json.dumps(
+        {"model": model_id, "filters": filter_items, "hybrid": bool(use_hybrid), "type": question_type},
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+
+
+@dataclass(slots=True)
+class CachedAnswer:
+    answer: str
+    citations: List[Dict[str, Any]]
+    hits: Optional[List[Dict[str, Any]]]
+
+
+def retrieval_degraded(hits: Optional[Sequence[Dict[str, Any]]]) -> bool:
+    """Vrai si une branche de la recherche hybride a dépassé son budget ou échoué.
+
+    Les branches signalent ``<branche>_timed_out`` / ``<branche>_failed`` dans
+    ``hit["timings"]``.
+    """
+    for hit in hits or ():
+        timings = hit.get("timings") or {}
+        if any(value for key, value in timings.items() if key.endswith(("_timed_out", "_failed"))):
+            return True
+    return False
+
+
+@dataclass(slots=True)
+class _Entry:
+    value: CachedAnswer
+    scope: str
+    embedding: Optional[List[float]]
+    anchors: frozenset
+    sources: Set[str]
+    expires_at: float
+
+
+class AnswerCache:
+    """Cache LRU + TTL des réponses, avec un niveau de similarité sémantique."""
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = ANSWER_CACHE_TTL,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY,
+        semantic_scan: int = ANSWER_CACHE_SEMANTIC_SCAN,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.semantic_scan = max(1, semantic_scan)
+        self._entries: "OrderedDict[tuple[str, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "invalidations": 0}
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return 0.0 < self.similarity_threshold < 1.0
+
+    def get(
+        self, question: str, scope: str, embedding: Optional[Sequence[float]] = None
+    ) -> Optional[CachedAnswer]:
+        if not is_tracked():
+            return None
+        key = (scope, normalize_question(question))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return entry.value
+            if entry is not None:
+                del self._entries[key]
+
+            candidates = []
+            if embedding is not None and self.semantic_enabled:
+                candidates = self._semantic_candidates(scope, question_anchors(question), now)
+
+        match = _best_semantic_match(embedding, candidates, self.similarity_threshold) if candidates else None
+        with self._lock:
+            entry = self._entries.get(match) if match is not None else None
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(match)
+                self.stats["semantic_hits"] += 1
+                return entry.value
+            self.stats["misses"] += 1
+            return None
+
+    def put(
+        self,
+        question: str,
+        scope: str,
+        value: CachedAnswer,
+        embedding: Optional[Sequence[float]] = None,
+    ) -> None:
+        if not is_tracked():
+            return
+        key = (scope, normalize_question(question))
+        sources = {str(c.get("source")) for c in value.citations if c.get("source")}
+        entry = _Entry(
+            value=value,
+            scope=scope,
+            embedding=_unit_vector(embedding) if embedding is not None else None,
+            anchors=question_anchors(question),
+            sources=sources,
+            expires_at=time.time() + self.ttl_seconds,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_sources(self, sources: Iterable[str]) -> int:
+        """Supprime les réponses citant une des sources (``"*"`` vide le cache)."""
+        targets = set(sources)
+        with self._lock:
+            if ALL_SOURCES_STAMP in targets:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                stale = [key for key, entry in self._entries.items() if entry.sources & targets]
+                for key in stale:
+                    del self._entries[key]
+                removed = len(stale)
+            self.stats["invalidations"] += removed
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _semantic_candidates(self, scope: str, anchors: frozenset, now: float) -> List[Tuple[Tuple[str, str], List[float]]]:
+        """Entrées comparables, des plus récentes aux plus anciennes (appelé sous le verrou)."""
+        candidates = []
+        for key in reversed(self._entries):
+            entry = self._entries[key]
+            if entry.scope != scope or entry.embedding is None or entry.expires_at <= now or entry.anchors != anchors:
+                continue
+            candidates.append((key, entry.embedding))
+            if len(candidates) >= self.semantic_scan:
+                break
+        return candidates
+
+
+def _best_semantic_match(
+    embedding: Sequence[float], candidates: Sequence[Tuple[Tuple[str, str], List[float]]], threshold: float
+) -> Optional[Tuple[str, str]]:
+    query = _unit_vector(embedding)
+    best_key = None
+    best_score = threshold
+    for key, vector in candidates:
+        score = sum(a * b for a, b in zip(query, vector))
+        if score >= best_score:
+            best_key, best_score = key, score
+    return best_key
+
+
+def _unit_vector(values: Sequence[float]) -> List[float]:
+    vector = [float(v) for v in values]
+    norm = sum(v * v for v in vector) ** 0.5
+    if norm == 0:
+        return vector
+    return [v / norm for v in vector]
+
+
+_answer_cache: AnswerCache | None = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache | None:
+    """Cache partagé du processus, abonné aux tampons d'indexation (None si désactivé)."""
+    global _answer_cache
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                from llm_pipeline.index_stamps import get_index_stamp_watcher
+
+                from llm_pipeline.metrics import register_counter_source
+
+                cache = AnswerCache()
+                get_index_stamp_watcher().subscribe(cache.invalidate_sources)
+                register_counter_source(
+                    "rag_answer_cache_events_total", "Événements du cache de réponses.", "event",
+                    lambda: dict(cache.stats),
+                )
+                _answer_cache = cache
+    return _answer_cache
+
+
+__all__ = [
+    "AnswerCache",
+    "CachedAnswer",
+    "cache_scope",
+    "get_answer_cache",
+    "normalize_question",
+    "retrieval_degraded",
+]
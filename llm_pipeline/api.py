@@ -1,27 +1,39 @@
 """API FastAPI orchestrant le pipeline RAG et la sélection dynamique des modèles."""
 from __future__ import annotations
 
+import logging
+import math
 import mimetypes
 import time
 import uuid
+from contextlib import asynccontextmanager
 from functools import lru_cache
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Optional
 
 from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.security import OAuth2AuthorizationCodeBearer
-from fastapi.responses import FileResponse
-from llama_index.core import VectorStoreIndex
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-from llama_index.vector_stores.qdrant import QdrantVectorStore
-from qdrant_client import QdrantClient
-
-from llm_pipeline.pipeline import RagPipeline
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from llm_pipeline.answer_cache import get_answer_cache
+from llm_pipeline.logging_utils import (
+    configure_logging,
+    get_correlation_id,
+    new_correlation_id,
+    reset_correlation_id,
+)
+from llm_pipeline.model_registry import get_model_registry
+from llm_pipeline.metrics import register_counter_source, render_prometheus, stage_timer
 from llm_pipeline.insights import DocumentInsightService
+from llm_pipeline.warmup import GatewayWarmup, warmup_models
 from llm_pipeline.inventory import DocumentInventoryService
 from llm_pipeline.config import (
     RAG_MODEL_ID,
     MODEL_ENDPOINTS,
     EMBEDDING_MODEL,
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_CACHE_PATH,
+    INFERENCE_BACKEND,
     DEFAULT_TOP_K,
     SMALL_MODEL_TOP_K,
     SMALL_MODEL_ID,
@@ -46,6 +58,9 @@ from llm_pipeline.models import (
     ChatRequest,
     ChatChoice,
     ChatCompletionResponse,
+    ChatCompletionChunk,
+    ChatChunkChoice,
+    ChatDelta,
 )
 from llm_pipeline.request_utils import (
     build_filters,
@@ -56,7 +71,27 @@ from llm_pipeline.request_utils import (
 )
 from llm_pipeline.citation_formatter import convert_citations_to_openwebui_format
 
-app = FastAPI(title="RAGWiame Gateway", version="0.1.0")
+if TYPE_CHECKING:
+    # LlamaIndex, Qdrant, torch et le pipeline ne sont importés qu'à la
+    # construction du premier pipeline (préchauffage ou première requête RAG) :
+    # /healthz, /v1/models ou /files/view n'en paient pas le coût.
+    from llama_index.core import VectorStoreIndex
+
+    from llm_pipeline.pipeline import RagPipeline, RagStreamResult
+
+configure_logging()
+LOGGER = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Préchauffage en tâche de fond : /healthz répond pendant le chargement des modèles
+    warmup.start()
+    yield
+    await warmup.stop()
+
+
+app = FastAPI(title="RAGWiame Gateway", version="0.1.0", lifespan=lifespan)
 insight_service = DocumentInsightService()
 inventory_service = DocumentInventoryService()
 
@@ -67,21 +102,59 @@ oauth2_scheme = OAuth2AuthorizationCodeBearer(
 )
 
 
+@app.middleware("http")
+async def correlation_id_middleware(request: Request, call_next):
+    """Associe un identifiant de corrélation (``X-Request-ID``) à tous les logs de la requête."""
+    token = new_correlation_id(request.headers.get("x-request-id"))
+    correlation_id = get_correlation_id()
+    try:
+        response = await call_next(request)
+    finally:
+        reset_correlation_id(token)
+    response.headers["X-Request-ID"] = correlation_id
+    return response
+
+
 @lru_cache(maxsize=1)
 def _build_index() -> VectorStoreIndex:
-    qdrant_client = QdrantClient(url=QDRANT_URL)
+    from llama_index.core import VectorStoreIndex
+    from llama_index.vector_stores.qdrant import QdrantVectorStore
+    from qdrant_client import AsyncQdrantClient, QdrantClient
+
+    from llm_pipeline.embedding_cache import CachedEmbedding
+    from llm_pipeline.inference_backend import build_embedding
+
+    from llm_pipeline.retrieval import HYBRID_DENSE_TIMEOUT
+
+    # Délai client aligné sur le budget de la branche dense : une requête Qdrant
+    # bloquée ne garde pas un thread du pool I/O au-delà de ce budget
+    qdrant_timeout = max(1, math.ceil(HYBRID_DENSE_TIMEOUT))
+    qdrant_client = QdrantClient(url=QDRANT_URL, timeout=qdrant_timeout)
     vector_store = QdrantVectorStore(
         client=qdrant_client, 
+        aclient=AsyncQdrantClient(url=QDRANT_URL, timeout=qdrant_timeout),
         collection_name="rag_documents",
         vector_name="text-dense",
         enable_hybrid=False,
     )
-    embed_model = HuggingFaceEmbedding(model_name=EMBEDDING_MODEL)
+    embed_model = get_model_registry().get(
+        f"embedding:{EMBEDDING_MODEL}:{INFERENCE_BACKEND}", lambda: build_embedding(EMBEDDING_MODEL)
+    )
+    if EMBEDDING_CACHE_SIZE > 0:
+        embed_model = CachedEmbedding(
+            embed_model, max_entries=EMBEDDING_CACHE_SIZE, disk_path=EMBEDDING_CACHE_PATH
+        )
+        register_counter_source(
+            "rag_embedding_cache_events_total", "Événements du cache d'embeddings de questions.", "event",
+            lambda: embed_model.stats,
+        )
     return VectorStoreIndex.from_vector_store(vector_store, embed_model=embed_model)
 
 
 @lru_cache(maxsize=4)
 def get_pipeline(model_id: str) -> RagPipeline:
+    from llm_pipeline.pipeline import RagPipeline
+
     endpoint = MODEL_ENDPOINTS.get(model_id)
     if endpoint is None:
         raise HTTPException(status_code=400, detail=f"Modèle {model_id} non enregistré côté Gateway")
@@ -99,45 +172,93 @@ def get_pipeline(model_id: str) -> RagPipeline:
         max_chunk_chars=MAX_CHUNK_CHARS,
         max_retries=LLM_MAX_RETRIES,
         enable_reranker=ENABLE_RERANKER,
+        answer_cache=get_answer_cache(),
     )
 
 
-def _execute_query(
+warmup = GatewayWarmup(get_pipeline, warmup_models())
+
+
+async def _execute_query(
     payload: QueryPayload, model_id: str, use_hybrid: bool = False, return_hits_only: bool = False
 ) -> QueryResponse:
     if return_hits_only:
         payload.use_rag = True
     question_text, use_rag = resolve_rag_mode(payload.question, payload.use_rag)
     if use_rag is False and not return_hits_only:
-        return _llm_only_answer(question_text, model_id)
+        return await _llm_only_answer(question_text, model_id)
     payload.question = question_text
-    
-    # 1. Check for vague questions immediately
-    vague_response = check_vague_question(payload.question)
-    if vague_response:
-        return vague_response
 
-    # 2. Try specialized services
     if not return_hits_only:
-        inventory = inventory_service.try_answer(payload.question)
-        if inventory:
-            return QueryResponse(answer=inventory["answer"], citations=inventory["citations"])
-        insight = insight_service.try_answer(payload.question)
-        if insight:
-            return QueryResponse(answer=insight["answer"], citations=insight["citations"])
-    pipeline = get_pipeline(model_id)
-    result = pipeline.query(
+        shortcut = await _shortcut_answer(payload.question)
+        if shortcut:
+            return shortcut
+    else:
+        vague_response = check_vague_question(payload.question)
+        if vague_response:
+            return vague_response
+
+    pipeline = await _aget_pipeline(model_id)
+    result = await pipeline.aquery(
         payload.question,
         filters=build_filters(payload),
         use_hybrid=use_hybrid or bool(payload.use_hybrid),
         return_hits_only=return_hits_only or bool(payload.return_hits_only),
     )
-    return QueryResponse(answer=result.answer, citations=result.citations, hits=result.hits)
+    return QueryResponse(
+        answer=result.answer,
+        citations=result.citations,
+        hits=result.hits,
+        timings=result.timings if payload.return_timings else None,
+    )
+
 
+async def _execute_query_stream(payload: QueryPayload, model_id: str, use_hybrid: bool = False) -> RagStreamResult:
+    """Équivalent streaming de :func:`_execute_query` (sans mode ``return_hits_only``)."""
+    from llm_pipeline.pipeline import RagStreamResult
 
-def _llm_only_answer(question: str, model_id: str) -> QueryResponse:
-    pipeline = get_pipeline(model_id)
-    answer_text = pipeline.chat_only(question)
+    question_text, use_rag = resolve_rag_mode(payload.question, payload.use_rag)
+    pipeline = await _aget_pipeline(model_id)
+    if use_rag is False:
+        return RagStreamResult(tokens=pipeline.astream_chat_only(question_text), citations=[])
+    payload.question = question_text
+
+    shortcut = await _shortcut_answer(payload.question)
+    if shortcut:
+        return RagStreamResult.from_answer(shortcut.answer, shortcut.citations)
+
+    return await pipeline.astream_query(
+        payload.question,
+        filters=build_filters(payload),
+        use_hybrid=use_hybrid or bool(payload.use_hybrid),
+    )
+
+
+async def _shortcut_answer(question: str) -> Optional[QueryResponse]:
+    """Réponses ne nécessitant pas la recherche RAG (question vague, inventaire, insights)."""
+    # 1. Check for vague questions immediately
+    vague_response = check_vague_question(question)
+    if vague_response:
+        return vague_response
+
+    # 2. Try specialized services (requêtes MariaDB bloquantes -> threadpool)
+    inventory = await run_in_threadpool(inventory_service.try_answer, question)
+    if inventory:
+        return QueryResponse(answer=inventory["answer"], citations=inventory["citations"])
+    insight = await run_in_threadpool(insight_service.try_answer, question)
+    if insight:
+        return QueryResponse(answer=insight["answer"], citations=insight["citations"])
+    return None
+
+
+async def _aget_pipeline(model_id: str) -> RagPipeline:
+    """Le premier appel charge l'index et les modèles : on le sort de la boucle asyncio."""
+    return await run_in_threadpool(get_pipeline, model_id)
+
+
+async def _llm_only_answer(question: str, model_id: str) -> QueryResponse:
+    pipeline = await _aget_pipeline(model_id)
+    answer_text = await pipeline.achat_only(question)
     return QueryResponse(answer=answer_text, citations=[])
 
 
@@ -151,7 +272,7 @@ async def rag_query(
     ensure_token(token)
     if model not in MODEL_ENDPOINTS:
         raise HTTPException(status_code=400, detail=f"Modèle {model} non supporté")
-    return _execute_query(payload, model)
+    return await _execute_query(payload, model)
 
 
 @app.post("/v1/hybrid/search", response_model=QueryResponse)
@@ -164,14 +285,27 @@ async def hybrid_search(
     ensure_token(token)
     if model not in MODEL_ENDPOINTS:
         raise HTTPException(status_code=400, detail=f"Modèle {model} non supporté")
-    return _execute_query(payload, model, use_hybrid=True, return_hits_only=bool(payload.return_hits_only))
+    return await _execute_query(payload, model, use_hybrid=True, return_hits_only=bool(payload.return_hits_only))
 
 
 @app.get("/healthz")
 async def healthcheck() -> Dict[str, str]:
+    """Vivacité du processus (répond dès le démarrage, même à froid)."""
     return {"status": "ok"}
 
 
+@app.get("/readyz")
+async def readiness() -> JSONResponse:
+    """Disponibilité : 503 tant que le préchauffage n'est pas terminé."""
+    return JSONResponse(warmup.status(), status_code=200 if warmup.ready else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Histogrammes de latence par étape et compteurs des caches (format Prometheus)."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/v1/models", response_model=Dict[str, list[ModelInfo]])
 async def list_models() -> Dict[str, list[ModelInfo]]:
     """Route OpenAI-compatible retournant les modèles disponibles."""
@@ -214,8 +348,7 @@ async def chat_completions(
     # Read use_rag from header (priority) or metadata (fallback)
     use_rag_header = raw_request.headers.get("x-use-rag")
     use_hybrid_header = raw_request.headers.get("x-hybrid-search")
-    print(f"DEBUG: X-Use-RAG header: {use_rag_header}", flush=True)
-    print(f"DEBUG: X-Hybrid-Search header: {use_hybrid_header}", flush=True)
+    LOGGER.debug("X-Use-RAG header: %s, X-Hybrid-Search header: %s", use_rag_header, use_hybrid_header)
     
     if use_rag_header is not None:
         use_rag = normalize_bool(use_rag_header)
@@ -236,32 +369,45 @@ async def chat_completions(
         use_rag=use_rag,
         use_hybrid=use_hybrid,
     )
-    print(f"DEBUG: Incoming metadata: {request.metadata}", flush=True)
-    print(f"DEBUG: Resolved use_rag: {payload.use_rag}", flush=True)
+    LOGGER.debug("Incoming metadata: %s, resolved use_rag: %s", request.metadata, payload.use_rag)
 
     # Extract history (all messages except the last one)
     history = request.messages[:-1]
 
+    if request.stream:
+        from llm_pipeline.pipeline import RagStreamResult
+
+        if not use_rag:
+            pipeline = await _aget_pipeline(request.model)
+            stream = RagStreamResult(tokens=pipeline.astream_chat_only(request.messages), citations=[])
+        else:
+            if history:
+                pipeline = await _aget_pipeline(request.model)
+                payload.question = await pipeline.acondense_question(history, payload.question)
+            stream = await _execute_query_stream(payload, request.model, use_hybrid=use_hybrid)
+        return StreamingResponse(
+            _sse_chat_events(stream, request.model),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     if not use_rag:
         # Chat Mode: Pass full history to LLM
-        pipeline = get_pipeline(request.model)
-        answer_text = pipeline.chat_only(request.messages)
+        pipeline = await _aget_pipeline(request.model)
+        answer_text = await pipeline.achat_only(request.messages)
         result = QueryResponse(answer=answer_text, citations=[])
     else:
         # RAG Mode: Rewrite question if history exists
         if history:
-            pipeline = get_pipeline(request.model)
-            payload.question = pipeline.condense_question(history, payload.question)
+            pipeline = await _aget_pipeline(request.model)
+            payload.question = await pipeline.acondense_question(history, payload.question)
         
         # Execute RAG with (potentially rewritten) question
-        result = _execute_query(payload, request.model, use_hybrid=use_hybrid)
+        result = await _execute_query(payload, request.model, use_hybrid=use_hybrid)
 
     # Convert citations to Open WebUI format.
-    # Si la reponse indique explicitement que l'info est indisponible, on ne renvoie aucune source.
     answer_text = result.answer or ""
-    sources = None
-    if "Non disponible dans les documents" not in answer_text:
-        sources = convert_citations_to_openwebui_format(result.citations)
+    sources = _openwebui_sources(answer_text, result.citations)
     
     response_message = ChatMessage(role="assistant", content=answer_text)
     choice = ChatChoice(index=0, finish_reason="stop", message=response_message)
@@ -271,5 +417,53 @@ async def chat_completions(
         created=int(time.time()),
         model=request.model,
         choices=[choice],
-        sources=sources if sources else None,
+        sources=sources,
     )
+
+
+def _openwebui_sources(answer_text: str, citations: Any) -> Optional[list[Dict[str, Any]]]:
+    # Si la reponse indique explicitement que l'info est indisponible, on ne renvoie aucune source.
+    if "Non disponible dans les documents" in answer_text:
+        return None
+    with stage_timer("citations"):
+        sources = convert_citations_to_openwebui_format(citations)
+    return sources if sources else None
+
+
+async def _sse_chat_events(stream: RagStreamResult, model: str) -> AsyncIterator[str]:
+    """Traduit un :class:`RagStreamResult` en événements SSE ``chat.completion.chunk``.
+
+    Le premier événement porte le rôle, les suivants les fragments de texte ; les
+    ``sources`` partent avec le dernier événement, une fois la réponse complète
+    connue (même règle de masquage que la réponse non streamée).
+    """
+    completion_id = str(uuid.uuid4())
+    created = int(time.time())
+
+    def event(delta: ChatDelta, finish_reason: Optional[str] = None, sources=None) -> str:
+        chunk = ChatCompletionChunk(
+            id=completion_id,
+            created=created,
+            model=model,
+            choices=[ChatChunkChoice(index=0, delta=delta, finish_reason=finish_reason)],
+            sources=sources,
+        )
+        return f"data: {chunk.model_dump_json(exclude_none=True)}\n\n"
+
+    yield event(ChatDelta(role="assistant", content=""))
+    parts: list[str] = []
+    try:
+        async for token in stream.tokens:
+            if not token:
+                continue
+            parts.append(token)
+            yield event(ChatDelta(content=token))
+    except Exception as exc:
+        LOGGER.warning("Streaming interrupted: %s", exc)
+        error_text = "\n[Erreur : génération interrompue]"
+        parts.append(error_text)
+        yield event(ChatDelta(content=error_text))
+
+    sources = _openwebui_sources("".join(parts), stream.citations)
+    yield event(ChatDelta(), finish_reason="stop", sources=sources)
+    yield "data: [DONE]\n\n"
@@ -1,10 +1,14 @@
 """Formatage des citations pour l'API Gateway."""
+import logging
 import re
 from pathlib import Path
 from typing import Any, Dict, List
 from urllib.parse import quote
 
 from llm_pipeline.config import DATA_ROOT, PUBLIC_GATEWAY_URL
+from llm_pipeline.logging_utils import payload_logging_enabled
+
+LOGGER = logging.getLogger(__name__)
 
 
 def append_citations_text(answer: str, citations: List[Dict[str, Any]]) -> str:
@@ -110,8 +114,9 @@ def replace_file_mentions_with_citations(answer: str, citations: List[Dict[str,
     if not citations:
         return answer
     
-    print(f"DEBUG POST-PROCESSING: Original answer: {answer[:200]}...", flush=True)
-    print(f"DEBUG POST-PROCESSING: Citations count: {len(citations)}", flush=True)
+    log_payload = payload_logging_enabled(LOGGER)
+    if log_payload:
+        LOGGER.debug("Post-processing: original answer %r (%d citations)", answer[:200], len(citations))
     
     modified_answer = answer
     
@@ -121,7 +126,6 @@ def replace_file_mentions_with_citations(answer: str, citations: List[Dict[str,
         source = str(citation.get("source", ""))
         if source:
             source_map[source] = f"[{idx}]"
-            print(f"DEBUG POST-PROCESSING: Citation {idx}: {source}", flush=True)
     
     # Pattern 1: Replace any mention of .xlsx or .docx files with their citation number
     for source, citation_num in source_map.items():
@@ -146,7 +150,7 @@ def replace_file_mentions_with_citations(answer: str, citations: List[Dict[str,
             before = modified_answer
             modified_answer = re.sub(pattern, citation_num, modified_answer, flags=re.IGNORECASE)
             if before != modified_answer:
-                print(f"DEBUG POST-PROCESSING: Pattern '{pattern}' matched!", flush=True)
+                LOGGER.debug("Post-processing: pattern %r matched", pattern)
     
     # Clean up any remaining parentheses around citations like ([1])
     modified_answer = re.sub(r'\(\[(\d+)\]\)', r'[\1]', modified_answer)
@@ -157,7 +161,8 @@ def replace_file_mentions_with_citations(answer: str, citations: List[Dict[str,
     # Clean up multiple spaces
     modified_answer = re.sub(r'\s+', ' ', modified_answer)
     
-    print(f"DEBUG POST-PROCESSING: Modified answer: {modified_answer[:200]}...", flush=True)
+    if log_payload:
+        LOGGER.debug("Post-processing: modified answer %r", modified_answer[:200])
     
     return modified_answer
 
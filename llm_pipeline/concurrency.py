@@ -0,0 +1,66 @@
+"""Exécuteurs bornés partagés par les étapes du pipeline RAG.
+
+Les endpoints FastAPI sont asynchrones : l'embedding de la question et le
+reranking CrossEncoder ne doivent pas bloquer la boucle d'événements. Ils sont
+déportés sur un pool de threads de taille fixe (``CPU_EXECUTOR_WORKERS``) pour
+éviter qu'un pic de requêtes ne sature le CPU avec des dizaines de forward passes.
+
+Un second pool (``IO_EXECUTOR_WORKERS``) sert au chemin synchrone pour lancer en
+parallèle des appels réseau bloquants (recherche dense et BM25 de l'hybride).
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from llm_pipeline.config import CPU_EXECUTOR_WORKERS, IO_EXECUTOR_WORKERS
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_io_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    """Retourne (en le créant au besoin) le pool partagé des étapes CPU."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, CPU_EXECUTOR_WORKERS),
+                    thread_name_prefix="rag-cpu",
+                )
+    return _executor
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Retourne le pool partagé des appels réseau bloquants."""
+    global _io_executor
+    if _io_executor is None:
+        with _executor_lock:
+            if _io_executor is None:
+                _io_executor = ThreadPoolExecutor(
+                    max_workers=max(1, IO_EXECUTOR_WORKERS),
+                    thread_name_prefix="rag-io",
+                )
+    return _io_executor
+
+
+async def run_cpu_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Exécute ``func`` dans le pool CPU sans bloquer la boucle asyncio.
+
+    Le contexte (identifiant de corrélation des logs, timings de la requête) est
+    propagé au thread du pool.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_cpu_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+
+__all__ = ["get_cpu_executor", "get_io_executor", "run_cpu_bound"]
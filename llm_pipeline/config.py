@@ -31,6 +31,17 @@ LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
 LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.0"))
 LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
 
+# Router : extraction des filtres AO par un appel LLM court, sur le modèle léger quand il est activé
+ROUTER_MODEL_ID = os.getenv("ROUTER_MODEL_ID", SMALL_MODEL_ID if SMALL_MODEL_ENABLED else RAG_MODEL_ID)
+ROUTER_LLM_ENDPOINT = os.getenv("ROUTER_LLM_ENDPOINT", MODEL_ENDPOINTS.get(ROUTER_MODEL_ID, RAG_ENDPOINT))
+ROUTER_API_KEY = os.getenv("ROUTER_API_KEY", os.getenv("VLLM_API_KEY", "changeme"))
+ROUTER_MAX_TOKENS = int(os.getenv("ROUTER_MAX_TOKENS", "96"))
+ROUTER_TIMEOUT = float(os.getenv("ROUTER_TIMEOUT", "15"))
+# Décodage guidé vLLM (guided_json) contre le schéma des filtres : la sortie est toujours un JSON valide
+ROUTER_GUIDED_JSON = os.getenv("ROUTER_GUIDED_JSON", "true").lower() in {"1", "true", "yes"}
+# Filtres extraits mémorisés par question normalisée (0 = désactivé)
+ROUTER_CACHE_SIZE = int(os.getenv("ROUTER_CACHE_SIZE", "1024"))
+
 # Paths
 DATA_ROOT = Path(os.getenv("DATA_ROOT", "/data")).resolve()
 PUBLIC_GATEWAY_URL = os.getenv("PUBLIC_GATEWAY_URL", "http://localhost:8081").rstrip("/")
@@ -62,3 +73,64 @@ DEFAULT_USE_HYBRID = os.getenv("DEFAULT_USE_HYBRID", "true").strip().lower() in
     "yes",
     "on",
 }
+
+# Concurrence (chemin async de la Gateway)
+# Nombre de threads dédiés aux étapes CPU (embedding de la question, reranking CrossEncoder)
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", "4"))
+# Nombre de threads pour les appels réseau bloquants du chemin synchrone (Qdrant, Elasticsearch)
+IO_EXECUTOR_WORKERS = int(os.getenv("IO_EXECUTOR_WORKERS", "16"))
+
+# Cache de réponses (exact + similarité d'embedding) devant RagPipeline
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in {"1", "true", "yes"}
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+# Similarité cosinus minimale pour le niveau sémantique (>= 1 désactive ce niveau, par défaut :
+# MiniLM place "lot 1" et "lot 2" au-dessus de 0.95)
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "1.0"))
+# Entrées les plus récentes comparées par le niveau sémantique à chaque défaut de cache
+ANSWER_CACHE_SEMANTIC_SCAN = int(os.getenv("ANSWER_CACHE_SEMANTIC_SCAN", "256"))
+# Fréquence (s) de lecture des tampons d'indexation pour invalider les sources réindexées
+ANSWER_CACHE_POLL_SECONDS = float(os.getenv("ANSWER_CACHE_POLL_SECONDS", "30"))
+
+# Cache des embeddings de questions (0 = désactivé) ; chemin SQLite optionnel pour le persister
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "").strip()
+
+# Micro-batching du reranker : les paires (question, passage) de requêtes concurrentes
+# sont regroupées en un seul predict CrossEncoder
+RERANK_BATCHING_ENABLED = os.getenv("RERANK_BATCHING_ENABLED", "true").lower() in {"1", "true", "yes"}
+RERANK_BATCH_MAX_PAIRS = int(os.getenv("RERANK_BATCH_MAX_PAIRS", "64"))
+RERANK_BATCH_MAX_WAIT_MS = float(os.getenv("RERANK_BATCH_MAX_WAIT_MS", "5"))
+
+# Cache des scores CrossEncoder par (question normalisée, chunk) ; 0 = désactivé
+RERANK_SCORE_CACHE_SIZE = int(os.getenv("RERANK_SCORE_CACHE_SIZE", "8192"))
+
+# Backend d'inférence du reranker et de l'encodeur MiniLM : torch | onnx | onnx-int8
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").strip().lower()
+ONNX_MODELS_DIR = os.getenv("ONNX_MODELS_DIR", os.path.join(os.getenv("HF_HOME", "/models"), "onnx"))
+
+# Reranking adaptatif : profondeur de candidats selon le router, reranking sauté
+# quand il ne peut pas changer le top-k
+RERANK_ADAPTIVE = os.getenv("RERANK_ADAPTIVE", "false").lower() in {"1", "true", "yes"}
+# Confiance router à partir de laquelle on réduit les candidats (ao_id + ao_doc_code = 0.9)
+RERANK_CONFIDENT_ROUTER = float(os.getenv("RERANK_CONFIDENT_ROUTER", "0.9"))
+RERANK_SHALLOW_MARGIN = int(os.getenv("RERANK_SHALLOW_MARGIN", "2"))
+# Écart relatif minimal entre le k-ième et le (k+1)-ième score pour sauter le reranking
+RERANK_SKIP_GAP = float(os.getenv("RERANK_SKIP_GAP", "0.35"))
+
+# Recherche lancée avec les filtres regex pendant l'appel LLM du router (cf. llm_pipeline.router_speculation)
+ROUTER_SPECULATIVE_RETRIEVAL = os.getenv("ROUTER_SPECULATIVE_RETRIEVAL", "true").lower() in {"1", "true", "yes"}
+
+# Journalisation : niveau et fraction des requêtes qui journalisent prompts/scores/chunks en DEBUG
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.1"))
+
+# Préchauffage au démarrage : /readyz ne passe au vert qu'une fois les modèles chargés et une
+# requête synthétique passée par toutes les étapes (router, embedding, Qdrant, BM25, rerank, LLM)
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in {"1", "true", "yes"}
+WARMUP_QUERY = os.getenv("WARMUP_QUERY", "Quel est le montant total du DQE du lot 1 ?")
+# Modèles à préchauffer, séparés par des virgules (vide = RAG_MODEL_ID, "all" = tous)
+WARMUP_MODELS = os.getenv("WARMUP_MODELS", "").strip()
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+# Au-delà, la Gateway se déclare prête même si une étape échoue encore (dépendance absente)
+WARMUP_READY_TIMEOUT = float(os.getenv("WARMUP_READY_TIMEOUT", "600"))
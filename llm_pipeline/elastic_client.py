@@ -1,15 +1,39 @@
 """Wrapper Elasticsearch pour le pipeline RAG (BM25 + indexation)."""
 from __future__ import annotations
 
+import hashlib
+import logging
 import os
-from typing import Any, Dict, List
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Tuple
 
-from elasticsearch import Elasticsearch
+if TYPE_CHECKING:  # le client n'est importé qu'à la première connexion
+    from elasticsearch import AsyncElasticsearch, Elasticsearch
 
 ELASTIC_HOST = os.getenv("ELASTIC_HOST", "http://localhost:9200")
 ELASTIC_INDEX = os.getenv("ELASTIC_INDEX", "rag_documents")
+# Index des "tampons" d'indexation : une entrée par source réindexée, lue par la
+# Gateway pour invalider ses caches. La source "*" signifie "tout l'index".
+ELASTIC_STAMPS_INDEX = os.getenv("ELASTIC_STAMPS_INDEX", f"{ELASTIC_INDEX}_stamps")
+ALL_SOURCES_STAMP = "*"
+# ``indexed_at`` en millisecondes epoch : un float dynamique serait mappé en
+# ``float`` 32 bits (précision ~2 min sur un epoch) et fausserait le ``range``.
+STAMPS_MAPPINGS = {
+    "properties": {
+        "source": {"type": "keyword"},
+        "indexed_at": {"type": "date", "format": "epoch_millis"},
+    }
+}
+# Indexation en masse : documents par requête _bulk et requêtes parallèles
+ELASTIC_BULK_CHUNK_SIZE = int(os.getenv("ELASTIC_BULK_CHUNK_SIZE", "500"))
+ELASTIC_BULK_THREADS = int(os.getenv("ELASTIC_BULK_THREADS", "2"))
+
+LOGGER = logging.getLogger(__name__)
 
 _es_client: Elasticsearch | None = None
+_async_es_client: AsyncElasticsearch | None = None
 
 
 def _get_client() -> Elasticsearch | None:
@@ -19,47 +43,297 @@ def _get_client() -> Elasticsearch | None:
     global _es_client
     if _es_client is None:
         try:
+            from elasticsearch import Elasticsearch
+
             _es_client = Elasticsearch(hosts=[ELASTIC_HOST])
             _es_client.info()
         except Exception as exc:  # pragma: no cover – only when ES is down
-            print(f"DEBUG: Échec de la connexion à Elasticsearch à {ELASTIC_HOST}: {exc}", flush=True)
+            LOGGER.warning("Échec de la connexion à Elasticsearch à %s: %s", ELASTIC_HOST, exc)
             _es_client = None
     return _es_client
 
 
+def _get_async_client() -> AsyncElasticsearch | None:
+    """Client asynchrone utilisé par le chemin ``aquery`` de la Gateway.
+
+    Aucun appel réseau n'est fait ici : les erreurs de connexion remontent lors
+    de la première recherche et sont traitées comme une absence de résultats.
+    """
+    global _async_es_client
+    if _async_es_client is None:
+        try:
+            from elasticsearch import AsyncElasticsearch
+
+            _async_es_client = AsyncElasticsearch(hosts=[ELASTIC_HOST])
+        except Exception as exc:  # pragma: no cover – dépendance aiohttp absente
+            LOGGER.warning("Impossible de créer le client Elasticsearch async: %s", exc)
+            _async_es_client = None
+    return _async_es_client
+
+
 def index_document(doc_id: str, body: Dict[str, Any]) -> None:
     """Indexer un fragment de document dans Elasticsearch.
     The client is obtained lazily; if the service is unavailable the operation is skipped.
     """
     client = _get_client()
     if client is None:
-        print(f"DEBUG: Elasticsearch client not available, skipping indexing of {doc_id}", flush=True)
+        LOGGER.debug("Elasticsearch client not available, skipping indexing of %s", doc_id)
         return
     try:
         client.index(index=ELASTIC_INDEX, id=doc_id, body=body)
     except Exception as exc:  # pragma: no cover – any error results in skipping indexing
-        print(f"DEBUG: Elasticsearch indexing failed for {doc_id}: {exc}", flush=True)
+        LOGGER.warning("Elasticsearch indexing failed for %s: %s", doc_id, exc)
+        return
+
+
+@dataclass(slots=True)
+class BulkIndexReport:
+    """Bilan d'une indexation en masse (identifiants des documents rejetés)."""
+
+    indexed: int = 0
+    failed: int = 0
+    # Identifiants des premiers documents rejetés (les suivants sont seulement comptés)
+    failed_ids: List[str] = field(default_factory=list)
+    # Quelques erreurs représentatives (les suivantes sont seulement comptées)
+    errors: List[str] = field(default_factory=list)
+    skipped: bool = False
+
+    def merge(self, other: "BulkIndexReport", max_errors: int = 5, max_ids: int = 50) -> None:
+        """Cumule le bilan d'un autre chargement (indexation par lots successifs)."""
+        self.indexed += other.indexed
+        self.failed += other.failed
+        self.failed_ids.extend(other.failed_ids[: max(0, max_ids - len(self.failed_ids))])
+        self.errors.extend(other.errors[: max(0, max_errors - len(self.errors))])
+        self.skipped = self.skipped or other.skipped
+
+
+def bulk_index_documents(
+    documents: Iterable[Tuple[str, Dict[str, Any]]],
+    chunk_size: int = ELASTIC_BULK_CHUNK_SIZE,
+    thread_count: int = ELASTIC_BULK_THREADS,
+    max_errors: int = 5,
+    suspend_refresh: bool = True,
+    max_ids: int = 50,
+) -> BulkIndexReport:
+    """Indexe des couples ``(doc_id, body)`` via l'API ``_bulk``.
+
+    Le rafraîchissement de l'index est suspendu pendant le chargement puis
+    rétabli (avec un ``refresh`` final). Les erreurs ne lèvent pas d'exception :
+    elles sont comptées dans le :class:`BulkIndexReport` retourné, avec les
+    identifiants des documents rejetés (les helpers découpent les requêtes
+    ``_bulk`` aussi selon leur taille en octets, un numéro de batch n'aurait
+    pas de sens).
+
+    Pour un chargement en plusieurs appels, ``suspend_refresh=False`` laisse la
+    suspension à :func:`bulk_loading`.
+    """
+    report = BulkIndexReport()
+    client = _get_client()
+    if client is None:
+        LOGGER.warning("Elasticsearch client not available, skipping bulk indexing")
+        report.skipped = True
+        return report
+
+    from elasticsearch import helpers
+
+    actions = (
+        {"_index": ELASTIC_INDEX, "_id": doc_id, "_source": body}
+        for doc_id, body in documents
+    )
+    chunk_size = max(1, chunk_size)
+    if thread_count > 1:
+        results = helpers.parallel_bulk(
+            client,
+            actions,
+            thread_count=thread_count,
+            chunk_size=chunk_size,
+            raise_on_error=False,
+            raise_on_exception=False,
+        )
+    else:
+        results = helpers.streaming_bulk(
+            client,
+            actions,
+            chunk_size=chunk_size,
+            max_retries=2,
+            raise_on_error=False,
+            raise_on_exception=False,
+        )
+
+    with _refresh_suspended(client) if suspend_refresh else nullcontext():
+        for ok, info in results:
+            if ok:
+                report.indexed += 1
+                continue
+            report.failed += 1
+            if len(report.failed_ids) < max_ids:
+                report.failed_ids.append(_bulk_item_id(info))
+            if len(report.errors) < max_errors:
+                report.errors.append(str(info))
+
+    if report.failed:
+        LOGGER.warning(
+            "Elasticsearch bulk: %d document(s) rejected (%s)", report.failed, ", ".join(report.failed_ids)
+        )
+    return report
+
+
+def _bulk_item_id(info: Any) -> str:
+    """Identifiant du document d'un résultat ``_bulk`` (``{"index": {"_id": ...}}``)."""
+    if isinstance(info, dict):
+        for item in info.values():
+            if isinstance(item, dict) and "_id" in item:
+                return str(item["_id"])
+    return "?"
+
+
+def delete_documents(doc_ids: Iterable[str], chunk_size: int = ELASTIC_BULK_CHUNK_SIZE) -> int:
+    """Supprime des fragments par identifiant (API ``_bulk``), retourne le nombre supprimé.
+
+    Les identifiants déjà absents de l'index ne sont pas des erreurs.
+    """
+    client = _get_client()
+    if client is None:
+        LOGGER.warning("Elasticsearch client not available, skipping deletions")
+        return 0
+    from elasticsearch import helpers
+
+    actions = (
+        {"_op_type": "delete", "_index": ELASTIC_INDEX, "_id": doc_id}
+        for doc_id in doc_ids
+    )
+    deleted = 0
+    failed = 0
+    for ok, info in helpers.streaming_bulk(
+        client,
+        actions,
+        chunk_size=max(1, chunk_size),
+        raise_on_error=False,
+        raise_on_exception=False,
+    ):
+        if ok:
+            deleted += 1
+        elif info.get("delete", {}).get("status") != 404:
+            failed += 1
+    if failed:
+        LOGGER.warning("Elasticsearch bulk delete: %d document(s) not deleted", failed)
+    return deleted
+
+
+@contextmanager
+def bulk_loading() -> Iterator[None]:
+    """Suspend le rafraîchissement de l'index pendant plusieurs :func:`bulk_index_documents`."""
+    client = _get_client()
+    if client is None:
+        yield
         return
+    with _refresh_suspended(client):
+        yield
+
+
+@contextmanager
+def _refresh_suspended(client: Elasticsearch) -> Iterator[None]:
+    """Désactive ``refresh_interval`` le temps d'un chargement massif."""
+    previous = None
+    try:
+        client.options(ignore_status=400).indices.create(index=ELASTIC_INDEX)
+        settings = client.indices.get_settings(index=ELASTIC_INDEX, name="index.refresh_interval")
+        previous = settings.get(ELASTIC_INDEX, {}).get("settings", {}).get("index", {}).get("refresh_interval")
+        client.indices.put_settings(index=ELASTIC_INDEX, body={"index": {"refresh_interval": "-1"}})
+    except Exception as exc:  # pragma: no cover - depends on ES availability
+        LOGGER.warning("Unable to suspend refresh on '%s': %s", ELASTIC_INDEX, exc)
+    try:
+        yield
+    finally:
+        try:
+            # None rétablit la valeur par défaut du cluster
+            client.indices.put_settings(index=ELASTIC_INDEX, body={"index": {"refresh_interval": previous}})
+            client.indices.refresh(index=ELASTIC_INDEX)
+        except Exception as exc:  # pragma: no cover - depends on ES availability
+            LOGGER.warning("Unable to restore refresh on '%s': %s", ELASTIC_INDEX, exc)
 
 
 def delete_index() -> None:
     """Supprime l'index Elasticsearch pour repartir d'une base propre."""
     client = _get_client()
     if client is None:
-        print("DEBUG: Elasticsearch client not available, skipping index deletion", flush=True)
+        LOGGER.warning("Elasticsearch client not available, skipping index deletion")
         return
     try:
         client.indices.delete(index=ELASTIC_INDEX, ignore=[400, 404])
-        print(f"DEBUG: Elasticsearch index '{ELASTIC_INDEX}' deleted", flush=True)
+        LOGGER.info("Elasticsearch index '%s' deleted", ELASTIC_INDEX)
     except Exception as exc:  # pragma: no cover - depends on ES availability
-        print(f"DEBUG: Failed to delete Elasticsearch index '{ELASTIC_INDEX}': {exc}", flush=True)
+        LOGGER.warning("Failed to delete Elasticsearch index '%s': %s", ELASTIC_INDEX, exc)
 
 
-def bm25_search(query: str, size: int = 10, filters: Dict[str, str] | None = None) -> List[Dict[str, Any]]:
-    """Effectuer une recherche BM25 par mots‑clés (optionnellement filtrée).
-    The Elasticsearch client is created lazily; if the service is unavailable the
-    function returns an empty list instead of raising at import time.
-    """
+def record_index_stamps(sources: Iterable[str]) -> None:
+    """Signale aux Gateways que ces sources viennent d'être (ré)indexées."""
+    client = _get_client()
+    if client is None:
+        LOGGER.warning("Elasticsearch client not available, skipping index stamps")
+        return
+    _ensure_stamps_index(client)
+    indexed_at = int(time.time() * 1000)
+    for source in sorted(set(sources)):
+        stamp_id = hashlib.sha1(source.encode("utf-8")).hexdigest()
+        try:
+            client.index(
+                index=ELASTIC_STAMPS_INDEX,
+                id=stamp_id,
+                body={"source": source, "indexed_at": indexed_at},
+            )
+        except Exception as exc:  # pragma: no cover - depends on ES availability
+            LOGGER.warning("Failed to record index stamp for %s: %s", source, exc)
+
+
+def _ensure_stamps_index(client: Elasticsearch) -> None:
+    """Crée l'index des tampons avec son mapping explicite (sans effet s'il existe)."""
+    try:
+        client.options(ignore_status=400).indices.create(index=ELASTIC_STAMPS_INDEX, mappings=STAMPS_MAPPINGS)
+    except Exception as exc:  # pragma: no cover - depends on ES availability
+        LOGGER.warning("Unable to create index stamps '%s': %s", ELASTIC_STAMPS_INDEX, exc)
+
+
+def latest_index_stamp() -> int | None:
+    """``indexed_at`` (ms) du tampon le plus récent, 0 si aucun, ``None`` si ES est injoignable."""
+    client = _get_client()
+    if client is None:
+        return None
+    try:
+        resp = client.search(
+            index=ELASTIC_STAMPS_INDEX,
+            body={"size": 0, "aggs": {"latest": {"max": {"field": "indexed_at"}}}},
+            ignore_unavailable=True,
+        )
+    except Exception as exc:  # pragma: no cover - depends on ES availability
+        LOGGER.warning("Failed to read latest index stamp: %s", exc)
+        return None
+    latest = resp.get("aggregations", {}).get("latest", {}).get("value")
+    return int(latest) if latest is not None else 0
+
+
+def fetch_index_stamps(since: int) -> List[Dict[str, Any]]:
+    """Retourne les tampons ``{"source", "indexed_at"}`` postérieurs à ``since`` (ms epoch)."""
+    client = _get_client()
+    if client is None:
+        return []
+    try:
+        resp = client.search(
+            index=ELASTIC_STAMPS_INDEX,
+            body={
+                "size": 10000,
+                "query": {"range": {"indexed_at": {"gt": since}}},
+            },
+            ignore_unavailable=True,
+        )
+    except Exception as exc:  # pragma: no cover - depends on ES availability
+        LOGGER.warning("Failed to read index stamps: %s", exc)
+        return []
+    return [hit.get("_source", {}) for hit in resp.get("hits", {}).get("hits", [])]
+
+
+def _build_bm25_body(query: str, size: int, filters: Dict[str, str] | None) -> Dict[str, Any]:
+    """Construit la requête BM25 partagée par les variantes sync et async."""
     # Configuration améliorée pour le français
     must_clauses: List[Dict[str, Any]] = [{
         "match": {
@@ -77,22 +351,80 @@ def bm25_search(query: str, size: int = 10, filters: Dict[str, str] | None = Non
             if value:
                 must_clauses.append({"term": {key: value}})
     
+    return {
+        "size": size,
+        "query": {"bool": {"must": must_clauses}},
+    }
+
+
+def bm25_search(
+    query: str,
+    size: int = 10,
+    filters: Dict[str, str] | None = None,
+    timeout: float | None = None,
+    raise_errors: bool = False,
+) -> List[Dict[str, Any]]:
+    """Effectuer une recherche BM25 par mots‑clés (optionnellement filtrée).
+    The Elasticsearch client is created lazily; if the service is unavailable the
+    function returns an empty list instead of raising at import time.
+
+    *timeout* (secondes) borne la requête côté client : le thread appelant est
+    libéré même si Elasticsearch ne répond pas. Avec *raise_errors*, une erreur de
+    recherche remonte au lieu de valoir une liste vide (recherche hybride).
+    """
     try:
         client = _get_client()
         if client is None:
-            print("DEBUG: Elasticsearch client not available, returning empty list", flush=True)
+            LOGGER.debug("Elasticsearch client not available, returning empty list")
             return []
-        resp = client.search(
-            index=ELASTIC_INDEX,
-            body={
-                "size": size,
-                "query": {"bool": {"must": must_clauses}},
-            },
-        )
+        if timeout is not None:
+            client = client.options(request_timeout=timeout)
+        resp = client.search(index=ELASTIC_INDEX, body=_build_bm25_body(query, size, filters))
+        return resp.get("hits", {}).get("hits", [])
+    except Exception as exc:  # pragma: no cover – any error results in empty hits
+        if raise_errors:
+            raise
+        LOGGER.warning("BM25 search failed (%s), returning empty list", exc)
+        return []
+
+
+async def abm25_search(
+    query: str,
+    size: int = 10,
+    filters: Dict[str, str] | None = None,
+    timeout: float | None = None,
+    raise_errors: bool = False,
+) -> List[Dict[str, Any]]:
+    """Version asynchrone de :func:`bm25_search` (même contrat : liste vide en cas d'erreur)."""
+    try:
+        client = _get_async_client()
+        if client is None:
+            return []
+        if timeout is not None:
+            client = client.options(request_timeout=timeout)
+        resp = await client.search(index=ELASTIC_INDEX, body=_build_bm25_body(query, size, filters))
         return resp.get("hits", {}).get("hits", [])
     except Exception as exc:  # pragma: no cover – any error results in empty hits
-        print(f"DEBUG: BM25 search failed ({exc}), returning empty list", flush=True)
+        if raise_errors:
+            raise
+        LOGGER.warning("Async BM25 search failed (%s), returning empty list", exc)
         return []
 
 
-__all__ = ["index_document", "bm25_search", "delete_index", "ELASTIC_HOST", "ELASTIC_INDEX"]
+__all__ = [
+    "index_document",
+    "bulk_index_documents",
+    "bulk_loading",
+    "delete_documents",
+    "BulkIndexReport",
+    "bm25_search",
+    "abm25_search",
+    "record_index_stamps",
+    "fetch_index_stamps",
+    "latest_index_stamp",
+    "delete_index",
+    "ALL_SOURCES_STAMP",
+    "ELASTIC_HOST",
+    "ELASTIC_INDEX",
+    "ELASTIC_STAMPS_INDEX",
+]
@@ -0,0 +1,144 @@
+"""Cache des embeddings de questions partagé par l'index de la Gateway.
+
+Chaque ``retriever.retrieve(QueryBundle(question))`` refait un forward pass
+MiniLM ; le cache answer, la recherche hybride, ``show_chunks`` et les questions
+reformulées embarquent souvent la même chaîne. :class:`CachedEmbedding`
+enveloppe le modèle LlamaIndex (``HuggingFaceEmbedding``) avec :
+
+- un LRU mémoire borné des embeddings de requêtes (clé = texte à espaces normalisés) ;
+- un niveau SQLite optionnel (``EMBEDDING_CACHE_PATH``) qui survit aux redémarrages.
+
+Les embeddings de documents (indexation) ne sont pas cachés.
+"""
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+from llm_pipeline.metrics import is_tracked
+
+
+class CachedEmbedding(BaseEmbedding):
+    """Modèle d'embedding LlamaIndex avec cache LRU (et SQLite optionnel) des requêtes."""
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _max_entries: int = PrivateAttr()
+    _memory: "OrderedDict[str, List[float]]" = PrivateAttr()
+    _lock: Any = PrivateAttr()
+    _disk: Optional[sqlite3.Connection] = PrivateAttr(default=None)
+    _stats: Dict[str, int] = PrivateAttr()
+
+    def __init__(self, inner: BaseEmbedding, max_entries: int = 2048, disk_path: str = "", **kwargs: Any) -> None:
+        super().__init__(
+            model_name=inner.model_name,
+            embed_batch_size=inner.embed_batch_size,
+            **kwargs,
+        )
+        self._inner = inner
+        self._max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "model TEXT NOT NULL, query TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, query))"
+            )
+            self._disk.commit()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def inner(self) -> BaseEmbedding:
+        return self._inner
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Compteurs hits (mémoire), disk_hits (SQLite) et misses (forward pass)."""
+        return dict(self._stats)
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        key = _cache_key(query)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        embedding = self._inner.get_query_embedding(query)
+        self._store(key, embedding)
+        return embedding
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        key = _cache_key(query)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        embedding = await self._inner.aget_query_embedding(query)
+        self._store(key, embedding)
+        return embedding
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._inner.get_text_embedding(text)
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._inner.get_text_embedding_batch(texts)
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return await self._inner.aget_text_embedding(text)
+
+    def _lookup(self, key: str) -> Optional[List[float]]:
+        if not is_tracked():
+            return None
+        with self._lock:
+            embedding = self._memory.get(key)
+            if embedding is not None:
+                self._memory.move_to_end(key)
+                self._stats["hits"] += 1
+                return embedding
+            if self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT vector FROM query_embeddings WHERE model = ? AND query = ?",
+                    (self.model_name, key),
+                ).fetchone()
+                if row is not None:
+                    embedding = array("f", row[0]).tolist()
+                    self._remember(key, embedding)
+                    self._stats["disk_hits"] += 1
+                    return embedding
+            self._stats["misses"] += 1
+            return None
+
+    def _store(self, key: str, embedding: List[float]) -> None:
+        if not is_tracked():
+            return
+        with self._lock:
+            self._remember(key, embedding)
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (model, query, vector) VALUES (?, ?, ?)",
+                    (self.model_name, key, array("f", embedding).tobytes()),
+                )
+                self._disk.commit()
+
+    def _remember(self, key: str, embedding: List[float]) -> None:
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+
+
+def _cache_key(query: str) -> str:
+    # Le tokenizer MiniLM est sensible à la casse : on ne normalise que les espaces
+    return re.sub(r"\s+", " ", query).strip()
+
+
+__all__ = ["CachedEmbedding"]
@@ -0,0 +1,96 @@
+"""Surveillance des tampons d'indexation pour invalider les caches de la Gateway.
+
+L'indexeur écrit, pour chaque source (ré)indexée, un tampon dans Elasticsearch
+(cf. :func:`llm_pipeline.elastic_client.record_index_stamps`). Un thread démon
+relit périodiquement les nouveaux tampons et notifie les caches abonnés avec
+l'ensemble des sources concernées (``"*"`` = tout l'index). Le point de départ
+est le tampon le plus récent de l'index, pas l'horloge locale : un décalage
+d'horloge entre l'indexeur et la Gateway ne fait ni rater ni rejouer de tampon.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, Set
+
+from llm_pipeline.config import ANSWER_CACHE_POLL_SECONDS
+
+LOGGER = logging.getLogger(__name__)
+
+InvalidationCallback = Callable[[Set[str]], None]
+
+
+class IndexStampWatcher:
+    """Relit les tampons d'indexation et diffuse les sources modifiées."""
+
+    def __init__(self, poll_seconds: float = ANSWER_CACHE_POLL_SECONDS) -> None:
+        self.poll_seconds = poll_seconds
+        self._callbacks: List[InvalidationCallback] = []
+        # ``indexed_at`` (ms) du dernier tampon vu, ``None`` tant qu'ES n'a pas répondu
+        self._last_seen: Optional[int] = None
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self, callback: InvalidationCallback) -> None:
+        with self._lock:
+            self._callbacks.append(callback)
+            if self._last_seen is None:
+                self._seed()
+            if self._thread is None and self.poll_seconds > 0:
+                self._thread = threading.Thread(target=self._run, name="index-stamps", daemon=True)
+                self._thread.start()
+
+    def poll_once(self) -> Set[str]:
+        """Lit les tampons postérieurs au dernier vu et notifie les abonnés."""
+        from llm_pipeline.elastic_client import fetch_index_stamps
+
+        if self._last_seen is None:
+            # Rien n'est en cache avant le premier tampon connu : on se cale dessus
+            self._seed()
+            return set()
+        stamps = fetch_index_stamps(self._last_seen)
+        if not stamps:
+            return set()
+        self._last_seen = max(self._last_seen, *(int(stamp.get("indexed_at", 0)) for stamp in stamps))
+        sources = {str(stamp.get("source")) for stamp in stamps if stamp.get("source")}
+        self.notify(sources)
+        return sources
+
+    def _seed(self) -> None:
+        from llm_pipeline.elastic_client import latest_index_stamp
+
+        self._last_seen = latest_index_stamp()
+
+    def notify(self, sources: Set[str]) -> None:
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback(sources)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                sources = self.poll_once()
+                if sources:
+                    LOGGER.info("Index stamps -> invalidating %d source(s)", len(sources))
+            except Exception as exc:  # pragma: no cover - depends on ES availability
+                LOGGER.warning("Index stamp polling failed: %s", exc)
+
+
+_watcher: IndexStampWatcher | None = None
+_watcher_lock = threading.Lock()
+
+
+def get_index_stamp_watcher() -> IndexStampWatcher:
+    """Retourne le watcher partagé par tous les caches du processus."""
+    global _watcher
+    if _watcher is None:
+        with _watcher_lock:
+            if _watcher is None:
+                _watcher = IndexStampWatcher()
+    return _watcher
+
+
+__all__ = ["IndexStampWatcher", "get_index_stamp_watcher"]
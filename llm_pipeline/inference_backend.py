@@ -0,0 +1,202 @@
+"""Backends d'inférence CPU pour le CrossEncoder et l'encodeur MiniLM.
+
+Hors LLM, la latence de la Gateway est dominée par le reranker
+(``amberoad/bert-multilingual-passage-reranking-msmarco``) et l'embedding MiniLM.
+``INFERENCE_BACKEND`` choisit l'implémentation :
+
+- ``torch`` (défaut) : ``sentence_transformers.CrossEncoder`` et ``HuggingFaceEmbedding`` ;
+- ``onnx`` : modèles exportés en ONNX et exécutés par ONNX Runtime ;
+- ``onnx-int8`` : idem avec quantification dynamique int8 des poids.
+
+Les modèles ONNX sont produits par ``python -m llm_pipeline.scripts.export_onnx``
+dans ``ONNX_MODELS_DIR`` ; ``optimum[onnxruntime]`` n'est importé que si un
+backend ONNX est demandé.
+"""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any, List, Optional, Sequence
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+from llm_pipeline.config import INFERENCE_BACKEND, ONNX_MODELS_DIR
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def _check_backend(backend: str) -> str:
+    backend = backend.strip().lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"INFERENCE_BACKEND inconnu: {backend!r} (attendu: {', '.join(BACKENDS)})")
+    return backend
+
+
+def onnx_model_dir(model_name: str, quantized: bool, root: Optional[str] = None) -> Path:
+    """Dossier de l'export ONNX d'un modèle HF (un sous-dossier par variante)."""
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+    return Path(root or ONNX_MODELS_DIR) / slug / ("int8" if quantized else "fp32")
+
+
+def _import_optimum():
+    try:
+        from optimum.onnxruntime import (
+            ORTModelForFeatureExtraction,
+            ORTModelForSequenceClassification,
+        )
+    except ImportError as exc:  # pragma: no cover - dépend de l'image
+        raise RuntimeError(
+            "Le backend ONNX nécessite `pip install optimum[onnxruntime]`."
+        ) from exc
+    return ORTModelForFeatureExtraction, ORTModelForSequenceClassification
+
+
+def _load_onnx(model_cls, model_name: str, quantized: bool):
+    from transformers import AutoTokenizer
+
+    model_dir = onnx_model_dir(model_name, quantized)
+    if not model_dir.exists():
+        raise RuntimeError(
+            f"Modèle ONNX absent: {model_dir}. Lancez `python -m llm_pipeline.scripts.export_onnx`."
+        )
+    file_name = "model_quantized.onnx" if quantized else "model.onnx"
+    model = model_cls.from_pretrained(model_dir, file_name=file_name)
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return model, tokenizer
+
+
+def export_onnx(model_name: str, task: str, quantize: bool) -> Path:
+    """Exporte ``model_name`` en ONNX (et optionnellement en int8 dynamique).
+
+    ``task`` vaut ``"cross-encoder"`` (classification de paires) ou ``"embedding"``.
+    """
+    from transformers import AutoTokenizer
+
+    ORTModelForFeatureExtraction, ORTModelForSequenceClassification = _import_optimum()
+    model_cls = ORTModelForSequenceClassification if task == "cross-encoder" else ORTModelForFeatureExtraction
+
+    fp32_dir = onnx_model_dir(model_name, quantized=False)
+    model = model_cls.from_pretrained(model_name, export=True)
+    model.save_pretrained(fp32_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(fp32_dir)
+    if not quantize:
+        return fp32_dir
+
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    int8_dir = onnx_model_dir(model_name, quantized=True)
+    quantizer = ORTQuantizer.from_pretrained(fp32_dir)
+    qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=int8_dir, quantization_config=qconfig)
+    AutoTokenizer.from_pretrained(fp32_dir).save_pretrained(int8_dir)
+    return int8_dir
+
+
+class OnnxCrossEncoder:
+    """Équivalent ONNX Runtime de ``CrossEncoder.predict`` (logits bruts, sans activation)."""
+
+    def __init__(self, model_name: str, quantized: bool = False, max_length: int = 512) -> None:
+        _, ORTModelForSequenceClassification = _import_optimum()
+        self.model, self.tokenizer = _load_onnx(ORTModelForSequenceClassification, model_name, quantized)
+        self.max_length = max_length
+
+    def predict(self, pairs: Sequence[Sequence[str]], batch_size: int = 32, show_progress_bar: bool = False):
+        import numpy as np
+
+        logits: List[Any] = []
+        for start in range(0, len(pairs), max(1, batch_size)):
+            batch = pairs[start:start + batch_size]
+            features = self.tokenizer(
+                [pair[0] for pair in batch],
+                [pair[1] for pair in batch],
+                padding=True,
+                truncation="longest_first",
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            output = self.model(**features)
+            logits.append(np.asarray(output.logits))
+        if not logits:
+            return np.zeros((0,))
+        scores = np.concatenate(logits, axis=0)
+        # Même forme que CrossEncoder : vecteur si un seul label
+        return scores[:, 0] if scores.shape[1] == 1 else scores
+
+
+class OnnxEmbedding(BaseEmbedding):
+    """Encodeur sentence-transformers (mean pooling + normalisation L2) sous ONNX Runtime."""
+
+    max_length: int = 128
+
+    _model: Any = PrivateAttr()
+    _tokenizer: Any = PrivateAttr()
+
+    def __init__(self, model_name: str, quantized: bool = False, max_length: int = 128, **kwargs: Any) -> None:
+        super().__init__(model_name=model_name, max_length=max_length, **kwargs)
+        ORTModelForFeatureExtraction, _ = _import_optimum()
+        self._model, self._tokenizer = _load_onnx(ORTModelForFeatureExtraction, model_name, quantized)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "OnnxEmbedding"
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        import numpy as np
+
+        features = self._tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np",
+        )
+        hidden = np.asarray(self._model(**features).last_hidden_state)
+        mask = features["attention_mask"][..., None].astype(hidden.dtype)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed([query])[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts)
+
+
+def build_cross_encoder(model_name: str, max_length: int = 512, backend: str = INFERENCE_BACKEND):
+    """CrossEncoder du backend configuré (même interface ``predict``)."""
+    backend = _check_backend(backend)
+    if backend == "torch":
+        from sentence_transformers import CrossEncoder
+
+        return CrossEncoder(model_name, default_activation_function=None, max_length=max_length)
+    return OnnxCrossEncoder(model_name, quantized=backend == "onnx-int8", max_length=max_length)
+
+
+def build_embedding(model_name: str, backend: str = INFERENCE_BACKEND) -> BaseEmbedding:
+    """Modèle d'embedding LlamaIndex du backend configuré."""
+    backend = _check_backend(backend)
+    if backend == "torch":
+        from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+        return HuggingFaceEmbedding(model_name=model_name)
+    return OnnxEmbedding(model_name, quantized=backend == "onnx-int8")
+
+
+__all__ = [
+    "BACKENDS",
+    "OnnxCrossEncoder",
+    "OnnxEmbedding",
+    "build_cross_encoder",
+    "build_embedding",
+    "export_onnx",
+    "onnx_model_dir",
+]
@@ -4,9 +4,10 @@ from __future__ import annotations
 import os
 import re
 from dataclasses import dataclass
-from typing import Any, Dict, List, Sequence
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence
 
-import mariadb
+if TYPE_CHECKING:  # connecteur importé à la première requête SQL
+    import mariadb
 
 
 @dataclass(slots=True)
@@ -58,6 +59,8 @@ class DocumentInsightService:
         return any(trigger in text for trigger in triggers)
 
     def _connect(self) -> mariadb.Connection:
+        import mariadb
+
         return mariadb.connect(
             user=self.user,
             password=self.password,
@@ -67,6 +70,8 @@ class DocumentInsightService:
         )
 
     def _fetch_top_totals(self, limit: int = 3) -> List[InsightRecord]:
+        import mariadb
+
         try:
             with self._connect() as connection:
                 cursor = connection.cursor()
@@ -4,9 +4,10 @@ from __future__ import annotations
 import os
 import re
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List
 
-import mariadb
+if TYPE_CHECKING:  # connecteur importé à la première requête SQL
+    import mariadb
 
 
 @dataclass(slots=True)
@@ -71,6 +72,8 @@ class DocumentInventoryService:
         return None
 
     def _connect(self) -> mariadb.Connection:
+        import mariadb
+
         return mariadb.connect(
             user=self.user,
             password=self.password,
@@ -80,6 +83,8 @@ class DocumentInventoryService:
         )
 
     def _load_projects(self) -> Dict[str, str]:
+        import mariadb
+
         projects: Dict[str, str] = {}
         try:
             with self._connect() as connection:
@@ -92,6 +97,8 @@ class DocumentInventoryService:
         return projects
 
     def _fetch_documents(self, project: str) -> List[InventoryRecord]:
+        import mariadb
+
         try:
             with self._connect() as connection:
                 cursor = connection.cursor()
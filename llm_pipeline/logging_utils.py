@@ -0,0 +1,124 @@
+"""Journalisation de la Gateway et de l'indexeur.
+
+Remplace les ``print(..., flush=True)`` du chemin chaud :
+
+- niveaux standards (``LOG_LEVEL``, ``INFO`` par défaut) : les messages DEBUG ne
+  sont même pas formatés en production ;
+- un ``QueueHandler`` découple l'appelant de l'écriture : un thread
+  ``QueueListener`` unique écrit sur stderr, sans syscall par ligne sur le
+  thread de la requête ; il est arrêté à la sortie du processus (``atexit``)
+  après avoir vidé la file, pour ne perdre ni bilan final ni traceback ;
+- identifiant de corrélation par requête (``X-Request-ID`` ou généré) ajouté à
+  chaque ligne ;
+- échantillonnage des journaux volumineux (prompts, scores, chunks) : seule une
+  fraction ``LOG_PAYLOAD_SAMPLE_RATE`` des requêtes les émet, cf.
+  :func:`payload_logging_enabled`.
+"""
+from __future__ import annotations
+
+import atexit
+import contextvars
+import logging
+import logging.handlers
+import queue
+import random
+import threading
+import uuid
+from typing import Optional, Tuple
+
+from llm_pipeline.config import LOG_LEVEL, LOG_PAYLOAD_SAMPLE_RATE
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(correlation_id)s] %(name)s: %(message)s"
+
+# (identifiant de corrélation, requête échantillonnée pour les journaux volumineux)
+_request_context: contextvars.ContextVar[Tuple[str, Optional[bool]]] = contextvars.ContextVar(
+    "rag_log_context", default=("-", None)
+)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+_configure_lock = threading.Lock()
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Ajoute ``correlation_id`` aux enregistrements (évalué sur le thread appelant)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = _request_context.get()[0]
+        return True
+
+
+def configure_logging(level: str = LOG_LEVEL) -> None:
+    """Installe (une seule fois) le handler en file d'attente sur le logger racine.
+
+    Un nouvel appel ne crée pas de second listener, il ajuste seulement le niveau.
+    """
+    global _listener, _queue_handler
+    with _configure_lock:
+        if _listener is not None:
+            logging.getLogger().setLevel(level.upper())
+            return
+        stream = logging.StreamHandler()
+        stream.setFormatter(logging.Formatter(LOG_FORMAT))
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(CorrelationIdFilter())
+
+        root = logging.getLogger()
+        root.addHandler(queue_handler)
+        root.setLevel(level.upper())
+        _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+        _listener.start()
+        _queue_handler = queue_handler
+        # Le thread du listener est démon : sans arrêt explicite, la fin de file est perdue
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Vide la file d'attente et arrête le listener (appelé automatiquement à la sortie)."""
+    global _listener, _queue_handler
+    with _configure_lock:
+        if _listener is None:
+            return
+        if _queue_handler is not None:
+            logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        atexit.unregister(shutdown_logging)
+        _listener = None
+        _queue_handler = None
+
+
+def new_correlation_id(value: Optional[str] = None) -> contextvars.Token:
+    """Fixe l'identifiant de corrélation de la requête courante et tire son échantillonnage."""
+    sampled = random.random() < LOG_PAYLOAD_SAMPLE_RATE
+    return _request_context.set((value or uuid.uuid4().hex[:12], sampled))
+
+
+def reset_correlation_id(token: contextvars.Token) -> None:
+    _request_context.reset(token)
+
+
+def get_correlation_id() -> str:
+    return _request_context.get()[0]
+
+
+def payload_logging_enabled(logger: logging.Logger) -> bool:
+    """Vrai si les journaux volumineux (prompts, scores, chunks) doivent être émis.
+
+    Il faut le niveau DEBUG et que la requête courante soit échantillonnée ; hors
+    requête (scripts, indexeur), seul le niveau compte.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    sampled = _request_context.get()[1]
+    return True if sampled is None else sampled
+
+
+__all__ = [
+    "configure_logging",
+    "get_correlation_id",
+    "new_correlation_id",
+    "payload_logging_enabled",
+    "reset_correlation_id",
+    "shutdown_logging",
+]
@@ -0,0 +1,176 @@
+"""Mesures de latence par étape et export Prometheus de la Gateway.
+
+Chaque étape du pipeline (router, appel LLM du router, recherche dense, BM25,
+fusion, reranking, formatage du contexte, génération, citations) est mesurée
+avec :func:`stage_timer` ou :func:`observe_stage` :
+
+- la durée alimente l'histogramme ``rag_stage_duration_seconds{stage=...}`` ;
+- si la requête courante collecte ses timings (:func:`collect_stage_timings`),
+  la durée (ms, cumulée par étape) est aussi ajoutée à son bloc ``timings``.
+
+Les compteurs des caches et du reranking sont lus au moment du scrape via
+:func:`register_counter_source` (jauges : :func:`register_gauge_source`). :func:`render_prometheus` produit le texte
+servi par ``GET /metrics``.
+
+Le trafic synthétique (préchauffage) s'exécute dans :func:`untracked` : ses
+durées et compteurs ne sont pas enregistrés et les caches (réponses, filtres du
+router, embeddings, scores du reranker) ne sont ni lus ni alimentés.
+"""
+from __future__ import annotations
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+STAGE_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "rag_request_timings", default=None
+)
+_tracked: contextvars.ContextVar[bool] = contextvars.ContextVar("rag_tracked", default=True)
+
+
+class Histogram:
+    """Histogramme cumulatif à buckets fixes (format Prometheus)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = STAGE_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Retourne (compteurs cumulés par bucket, +Inf compris), somme et nombre."""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative: List[int] = []
+        running = 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+
+
+_stage_histograms: Dict[str, Histogram] = {}
+_histograms_lock = threading.Lock()
+
+CounterReader = Callable[[], Mapping[str, float]]
+# nom -> (aide, label, lecteur, type Prometheus)
+_counter_sources: Dict[str, Tuple[str, str, CounterReader, str]] = {}
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Enregistre la durée d'une étape (histogramme + timings de la requête courante)."""
+    if not _tracked.get():
+        return
+    histogram = _stage_histograms.get(stage)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _stage_histograms.setdefault(stage, Histogram())
+    histogram.observe(seconds)
+
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = round(timings.get(stage, 0.0) + seconds * 1000.0, 1)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Mesure le bloc englobé comme une étape du pipeline."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+@contextmanager
+def collect_stage_timings(timings: Optional[Dict[str, float]] = None) -> Iterator[Dict[str, float]]:
+    """Collecte les durées (ms) des étapes exécutées dans le contexte courant.
+
+    *timings* reprend une collecte commencée ailleurs (fin d'une réponse streamée).
+    """
+    timings = {} if timings is None else timings
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+@contextmanager
+def untracked() -> Iterator[None]:
+    """Exécute le bloc hors métriques et hors caches (requêtes synthétiques)."""
+    token = _tracked.set(False)
+    try:
+        yield
+    finally:
+        _tracked.reset(token)
+
+
+def is_tracked() -> bool:
+    """``False`` dans un bloc :func:`untracked` : ne rien compter ni mettre en cache."""
+    return _tracked.get()
+
+
+def register_counter_source(name: str, help_text: str, label: str, reader: CounterReader) -> None:
+    """Expose sous ``name{label=...}`` les compteurs renvoyés par ``reader`` au moment du scrape."""
+    _counter_sources[name] = (help_text, label, reader, "counter")
+
+
+def register_gauge_source(name: str, help_text: str, label: str, reader: CounterReader) -> None:
+    """Comme :func:`register_counter_source`, pour des valeurs instantanées (jauges)."""
+    _counter_sources[name] = (help_text, label, reader, "gauge")
+
+
+def render_prometheus() -> str:
+    """Texte d'exposition Prometheus (histogrammes d'étapes + compteurs enregistrés)."""
+    lines = [
+        "# HELP rag_stage_duration_seconds Durée des étapes du pipeline RAG.",
+        "# TYPE rag_stage_duration_seconds histogram",
+    ]
+    for stage in sorted(_stage_histograms):
+        histogram = _stage_histograms[stage]
+        cumulative, total, count = histogram.snapshot()
+        for bound, value in zip(histogram.buckets, cumulative):
+            lines.append(f'rag_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {value}')
+        lines.append(f'rag_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+        lines.append(f'rag_stage_duration_seconds_sum{{stage="{stage}"}} {total:.6f}')
+        lines.append(f'rag_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+
+    for name in sorted(_counter_sources):
+        help_text, label, reader, kind = _counter_sources[name]
+        try:
+            values = reader() or {}
+        except Exception:  # un compteur indisponible ne casse pas le scrape
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key in sorted(values):
+            lines.append(f'{name}{{{label}="{key}"}} {values[key]}')
+    return "\n".join(lines) + "\n"
+
+
+__all__ = [
+    "Histogram",
+    "collect_stage_timings",
+    "is_tracked",
+    "observe_stage",
+    "register_counter_source",
+    "register_gauge_source",
+    "render_prometheus",
+    "stage_timer",
+    "untracked",
+]
@@ -0,0 +1,137 @@
+"""Registre des composants lourds partagés par les pipelines de la Gateway.
+
+Chaque ``RagPipeline`` (un par modèle LLM exposé : ``mistral``, ``phi3-mini``…)
+emprunte ses composants au registre au lieu de charger les siens : CrossEncoder
+du reranker, modèle d'embedding, router compilé. Un composant est chargé une
+seule fois par processus, à la première demande, sous un verrou (deux requêtes
+simultanées ne déclenchent pas deux chargements).
+
+Pour chaque composant, le registre mesure la durée de chargement, la
+croissance du RSS du processus pendant le chargement et, pour les modèles
+PyTorch, la taille des paramètres. Ces valeurs sont journalisées et exportées
+sur ``/metrics`` (``rag_model_*``).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from llm_pipeline.metrics import register_gauge_source
+
+LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True, frozen=True)
+class ComponentStats:
+    """Coût de chargement d'un composant."""
+
+    load_seconds: float
+    # Croissance du RSS du processus pendant le chargement
+    rss_bytes: int
+    # Taille des paramètres (modèles PyTorch uniquement)
+    parameter_bytes: Optional[int]
+
+
+class ModelRegistry:
+    """Composants chargés paresseusement, une fois par processus, partagés par référence."""
+
+    def __init__(self) -> None:
+        self._components: Dict[str, Any] = {}
+        self._stats: Dict[str, ComponentStats] = {}
+        # Chargements sérialisés : la croissance du RSS est attribuable au composant
+        self._load_lock = threading.RLock()
+
+    def get(self, name: str, factory: Callable[[], T]) -> T:
+        """Composant ``name``, construit par ``factory`` au premier appel."""
+        component = self._components.get(name)
+        if component is not None:
+            return component
+        with self._load_lock:
+            component = self._components.get(name)
+            if component is None:
+                rss_before = _rss_bytes()
+                start = time.perf_counter()
+                component = factory()
+                stats = ComponentStats(
+                    load_seconds=time.perf_counter() - start,
+                    rss_bytes=max(0, _rss_bytes() - rss_before),
+                    parameter_bytes=_parameter_bytes(component),
+                )
+                self._stats[name] = stats
+                self._components[name] = component
+                LOGGER.info(
+                    "Loaded %s in %.1fs (RSS +%.0f MiB, parameters %s)",
+                    name,
+                    stats.load_seconds,
+                    stats.rss_bytes / 2**20,
+                    "n/a" if stats.parameter_bytes is None else f"{stats.parameter_bytes / 2**20:.0f} MiB",
+                )
+        return component
+
+    def loaded(self) -> Dict[str, ComponentStats]:
+        """Composants chargés et leur coût, par nom."""
+        return dict(self._stats)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._components
+
+
+def _rss_bytes() -> int:
+    """RSS courant du processus (Linux), 0 si indisponible."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0
+
+
+def _parameter_bytes(component: Any) -> Optional[int]:
+    """Taille des paramètres d'un module PyTorch (directement ou via ``model``/``_model``)."""
+    for candidate in (component, getattr(component, "model", None), getattr(component, "_model", None)):
+        parameters = getattr(candidate, "parameters", None)
+        if callable(parameters):
+            try:
+                return sum(p.numel() * p.element_size() for p in parameters())
+            except Exception:
+                return None
+    return None
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Registre partagé du processus (gauges ``rag_model_*`` enregistrées à la création)."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = ModelRegistry()
+                register_gauge_source(
+                    "rag_model_load_seconds", "Durée de chargement des composants partagés.", "component",
+                    lambda: {name: round(stats.load_seconds, 3) for name, stats in registry.loaded().items()},
+                )
+                register_gauge_source(
+                    "rag_model_rss_bytes", "Croissance du RSS au chargement des composants partagés.", "component",
+                    lambda: {name: stats.rss_bytes for name, stats in registry.loaded().items()},
+                )
+                register_gauge_source(
+                    "rag_model_parameter_bytes", "Taille des paramètres des modèles partagés.", "component",
+                    lambda: {
+                        name: stats.parameter_bytes
+                        for name, stats in registry.loaded().items()
+                        if stats.parameter_bytes is not None
+                    },
+                )
+                _registry = registry
+    return _registry
+
+
+__all__ = ["ComponentStats", "ModelRegistry", "get_model_registry"]
@@ -10,12 +10,15 @@ class QueryPayload(BaseModel):
     use_rag: Optional[bool] = None
     use_hybrid: Optional[bool] = False
     return_hits_only: Optional[bool] = False
+    return_timings: Optional[bool] = False
 
 
 class QueryResponse(BaseModel):
     answer: str
     citations: Any
     hits: Optional[List[Dict[str, Any]]] = None
+    # Durées (ms) par étape, renvoyées si ``return_timings`` est demandé
+    timings: Optional[Dict[str, float]] = None
 
 
 class ModelInfo(BaseModel):
@@ -48,3 +51,25 @@ class ChatCompletionResponse(BaseModel):
     model: str
     choices: List[ChatChoice]
     sources: Optional[List[Dict[str, Any]]] = None
+
+
+class ChatDelta(BaseModel):
+    role: Optional[Literal["assistant"]] = None
+    content: Optional[str] = None
+
+
+class ChatChunkChoice(BaseModel):
+    index: int
+    delta: ChatDelta
+    finish_reason: Optional[str] = None
+
+
+class ChatCompletionChunk(BaseModel):
+    """Événement SSE envoyé quand ``stream=true`` (format OpenAI ``chat.completion.chunk``)."""
+
+    id: str
+    object: Literal["chat.completion.chunk"] = "chat.completion.chunk"
+    created: int
+    model: str
+    choices: List[ChatChunkChoice]
+    sources: Optional[List[Dict[str, Any]]] = None
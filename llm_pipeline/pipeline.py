@@ -1,21 +1,29 @@
 """Pipeline RAG basée sur LlamaIndex et vLLM."""
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import logging
 import math
 import os
 import re
+import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Mapping, Optional, Tuple
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Mapping, Optional, Tuple
 
 from llama_index.core import QueryBundle, VectorStoreIndex
 from llama_index.core.prompts import PromptTemplate
 from llama_index.core.vector_stores.types import MetadataFilters
 from llama_index.llms.openai_like import OpenAILike
-from sentence_transformers import CrossEncoder
 
-from llm_pipeline.elastic_client import bm25_search
+from llm_pipeline.answer_cache import AnswerCache, CachedAnswer, cache_scope, retrieval_degraded
+from llm_pipeline.concurrency import get_io_executor, run_cpu_bound
+from llm_pipeline.config import ROUTER_SPECULATIVE_RETRIEVAL
+from llm_pipeline.logging_utils import payload_logging_enabled
+from llm_pipeline.metrics import collect_stage_timings, observe_stage, stage_timer
+from llm_pipeline.elastic_client import abm25_search, bm25_search
 from llm_pipeline.query_classification import classify_query_type
-from llm_pipeline.query_router import QueryRouter
+from llm_pipeline.query_router import QueryRouterResult, get_query_router, get_router_llm
 from llm_pipeline.prompts import (
     get_default_prompt,
     get_chat_prompt,
@@ -28,12 +36,21 @@ from llm_pipeline.prompts import (
 )
 from llm_pipeline.models import ChatMessage
 from llm_pipeline.context_formatting import format_context, _extract_node_text
-from llm_pipeline.retrieval import hybrid_query as pipeline_hybrid_query, node_id
+from llm_pipeline.retrieval import (
+    ahybrid_query as pipeline_ahybrid_query,
+    hybrid_query as pipeline_hybrid_query,
+    node_id,
+)
 from llm_pipeline.text_utils import tokenize, citation_key
-from llm_pipeline.reranker import CrossEncoderReranker
+from llm_pipeline.reranker import get_reranker
+from llm_pipeline.rerank_policy import RerankPolicy, record_rerank_path, top_by_retrieval_score
+from llm_pipeline.router_speculation import record_speculation, reuse_speculative
 from llm_pipeline.priority_utils import _prioritize_official_docs
 
 
+LOGGER = logging.getLogger(__name__)
+
+
 @dataclass(slots=True)
 class RagQueryResult:
     """Résultat enrichi retourné au front-end."""
@@ -41,6 +58,63 @@ class RagQueryResult:
     answer: str
     citations: List[Mapping[str, str]]
     hits: Optional[List[Dict[str, Any]]] = None
+    # Durées (ms) par étape de la requête (cf. llm_pipeline.metrics)
+    timings: Optional[Dict[str, float]] = None
+
+
+@dataclass(slots=True)
+class RagStreamResult:
+    """Résultat streaming : citations connues d'avance, réponse produite au fil de l'eau."""
+
+    tokens: AsyncIterator[str]
+    citations: List[Mapping[str, str]]
+    hits: Optional[List[Dict[str, Any]]] = None
+    # Durées (ms) par étape ; "generation" et "total" n'y figurent qu'une fois le stream épuisé
+    timings: Optional[Dict[str, float]] = None
+
+    @classmethod
+    def from_answer(cls, answer: str, citations: List[Mapping[str, str]], hits=None) -> "RagStreamResult":
+        """Réponse déjà complète (réponse fixe, service spécialisé) émise en un seul fragment."""
+        return cls(tokens=_aiter_once(answer), citations=citations, hits=hits)
+
+
+@dataclass(slots=True)
+class _QueryPlan:
+    """Analyse d'une question avant retrieval (type, filtres fusionnés, router)."""
+
+    question: str
+    question_lower: str
+    question_type: str
+    filters: MetadataFilters | None
+    router_result: QueryRouterResult
+    # Nombre de candidats à récupérer avant reranking (cf. RerankPolicy)
+    candidate_depth: int
+    # Portée du cache de réponses (None = réponse non cachable)
+    cache_scope: Optional[str] = None
+    # Embedding de la question, calculé une fois et réutilisé (cache sémantique, recherche dense)
+    query_embedding: Optional[List[float]] = None
+
+
+@dataclass(slots=True)
+class _PreparedAnswer:
+    """Tout ce qu'il faut pour l'appel de génération final."""
+
+    prompt: PromptTemplate
+    context_text: str
+    citations: List[Mapping[str, Any]]
+    plan: _QueryPlan
+
+
+STOP_SEQUENCES = ["Question :", "\nQuestion :", "Question:", "\nQuestion:"]
+CHAT_STOP_SEQUENCES = ["User:", "user:", "Assistant:", "assistant:", "\nUser", "\nAssistant"]
+VAGUE_PATTERNS = [
+    r"^quel\s+(est|sont)\s+(le|la|les)\s+\w+\s*\??$",  # "quel est le montant ?"
+    r"^quel\s+(est|sont)\s+\w+\s*\??$",  # "quel est montant ?"
+    r"^combien\s*\??$",  # "combien ?"
+    r"^où\s*\??$",  # "où ?"
+    r"^quoi\s*\??$",  # "quoi ?"
+    r"^qui\s*\??$",  # "qui ?"
+]
 
 
 class RagPipeline:
@@ -59,12 +133,20 @@ class RagPipeline:
         max_chunk_chars: int = 800,
         max_retries: int = 1,
         enable_reranker: bool = True,
+        answer_cache: AnswerCache | None = None,
     ) -> None:
         self.index = index
-        self.query_router = QueryRouter()
+        self.model_name = model_name
+        self.answer_cache = answer_cache
+        # Modèle d'embedding de l'index, utilisé pour calculer l'embedding de la
+        # question hors de la boucle asyncio (cf. adense_retrieve)
+        self.embed_model = getattr(index, "_embed_model", None)
+        # Composants lourds empruntés au registre du processus, partagés entre modèles
+        self.query_router = get_query_router()
         self.top_k = top_k
         self.max_chunk_chars = max_chunk_chars
         self.initial_top_k = max(top_k * 3, top_k + 2)
+        self.rerank_policy = RerankPolicy(top_k=top_k, full_depth=self.initial_top_k)
         self.llm = OpenAILike(
             model=model_name,
             api_base=mistral_endpoint,
@@ -74,16 +156,19 @@ class RagPipeline:
             timeout=timeout_seconds,
             max_retries=max_retries,
         )
-        self.reranker = CrossEncoderReranker() if enable_reranker else None
+        self.reranker = get_reranker() if enable_reranker else None
+        # Extraction des filtres sur un client dédié (modèle léger, JSON guidé, max_tokens serré)
+        self.router_llm = get_router_llm()
+        self.speculative_retrieval = ROUTER_SPECULATIVE_RETRIEVAL
 
         # Prompts pour les différents types de questions
         if "phi" in model_name.lower():
-            print(f"DEBUG: Using Phi-3 prompts for model {model_name}", flush=True)
+            LOGGER.debug("Using Phi-3 prompts for model %s", model_name)
             self.qa_prompt = PromptTemplate(get_phi3_default_prompt())
             self.qa_prompt_fiche = PromptTemplate(get_phi3_fiche_prompt())
             self.qa_prompt_chiffres = PromptTemplate(get_phi3_chiffres_prompt())
         else:
-            print(f"DEBUG: Using Mistral prompts for model {model_name}", flush=True)
+            LOGGER.debug("Using Mistral prompts for model %s", model_name)
             self.qa_prompt = PromptTemplate(get_default_prompt())
             self.qa_prompt_fiche = PromptTemplate(get_fiche_prompt())
             self.qa_prompt_chiffres = PromptTemplate(get_chiffres_prompt())
@@ -96,22 +181,49 @@ class RagPipeline:
         if not chat_history:
             return question
             
-        history_str = "\n".join([f"{msg.role}: {msg.content}" for msg in chat_history[-4:]]) # Keep last 4 messages context
+        history_str = self._format_condense_history(chat_history)
         
-        print(f"DEBUG: Rewriting question '{question}' with history...", flush=True)
+        LOGGER.debug("Rewriting question %r with history", question)
         response = self.llm.predict(
             self.condense_prompt,
             chat_history=history_str,
             question=question,
-            stop=["Question :", "\nQuestion :", "Question:", "\nQuestion:"]
+            stop=STOP_SEQUENCES,
         )
         rewritten = str(response).strip()
-        print(f"DEBUG: Rewritten question: '{rewritten}'", flush=True)
+        LOGGER.debug("Rewritten question: %r", rewritten)
         return rewritten
 
-    def _cross_encoder_rerank(self, nodes: List, question: str) -> List:
+    async def acondense_question(self, chat_history: List[ChatMessage], question: str) -> str:
+        """Variante asynchrone de :meth:`condense_question`."""
+        if not chat_history:
+            return question
+
+        history_str = self._format_condense_history(chat_history)
+
+        LOGGER.debug("Rewriting question %r with history", question)
+        response = await self.llm.apredict(
+            self.condense_prompt,
+            chat_history=history_str,
+            question=question,
+            stop=STOP_SEQUENCES,
+        )
+        rewritten = str(response).strip()
+        LOGGER.debug("Rewritten question: %r", rewritten)
+        return rewritten
+
+    @staticmethod
+    def _format_condense_history(chat_history: List[ChatMessage]) -> str:
+        return "\n".join([f"{msg.role}: {msg.content}" for msg in chat_history[-4:]]) # Keep last 4 messages context
+
+    def _cross_encoder_rerank(self, nodes: List, question: str, depth: Optional[int] = None) -> List:
         if self.reranker is None:
             return nodes[: self.top_k]
+        path = self.rerank_policy.choose_path(nodes, depth or self.initial_top_k)
+        record_rerank_path(path)
+        LOGGER.debug("Rerank path=%s candidates=%d", path, len(nodes))
+        if path.startswith("skipped"):
+            return top_by_retrieval_score(nodes, self.top_k)
         return self.reranker.rerank(nodes, question, self.top_k)
 
     def query(
@@ -121,126 +233,464 @@ class RagPipeline:
         use_hybrid: bool = False,
         return_hits_only: bool = False,
     ) -> RagQueryResult:
-        # Detect vague questions
-        vague_patterns = [
-            r"^quel\s+(est|sont)\s+(le|la|les)\s+\w+\s*\??$",  # "quel est le montant ?"
-            r"^quel\s+(est|sont)\s+\w+\s*\??$",  # "quel est montant ?"
-            r"^combien\s*\??$",  # "combien ?"
-            r"^où\s*\??$",  # "où ?"
-            r"^quoi\s*\??$",  # "quoi ?"
-            r"^qui\s*\??$",  # "qui ?"
-        ]
-        
-        question_lower = question.lower().strip()
-        print(f"DEBUG: Checking vague question: '{question_lower}'", flush=True)
-        question_type = classify_query_type(question_lower)
-        
-        # Passage du LLM au router pour l'extraction intelligente si besoin
-        router_result = self.query_router.analyze(question, llm=self.llm)
-        
-        metadata_filters = self._merge_metadata_filters(filters, router_result.filters)
-        print(
-            f"DEBUG: QueryRouter intent={router_result.intent} filters={router_result.filters} "
-            f"confidence={router_result.confidence:.2f}",
-            flush=True,
+        with collect_stage_timings() as timings, stage_timer("total"):
+            result = self._query(question, filters, use_hybrid, return_hits_only)
+        result.timings = timings
+        return result
+
+    def _query(
+        self,
+        question: str,
+        filters: MetadataFilters | None,
+        use_hybrid: bool,
+        return_hits_only: bool,
+    ) -> RagQueryResult:
+        early = self._check_vague(question)
+        if early is not None:
+            return early
+
+        outcome = self._route_and_retrieve(question, filters, use_hybrid, return_hits_only)
+        if isinstance(outcome, RagQueryResult):
+            return outcome
+        plan, nodes, hits = outcome
+        if use_hybrid and return_hits_only:
+            return RagQueryResult(answer="", citations=[], hits=hits)
+
+        if "effectif" in plan.question_lower:
+            keyword_nodes = _keyword_search_nodes(["effectif", "effectifs"])
+            nodes = _merge_unique_nodes(nodes, keyword_nodes)
+
+        if not nodes:
+            return _no_documents_result()
+
+        with stage_timer("rerank"):
+            reranked = self._cross_encoder_rerank(nodes, question, plan.candidate_depth)
+        prepared = self._prepare_answer(plan, nodes, reranked)
+        if prepared is None:
+            return _below_threshold_result(hits)
+
+        with stage_timer("generation"):
+            response = self.llm.predict(
+                prepared.prompt,
+                context=prepared.context_text,
+                question=question,
+                stop=STOP_SEQUENCES,
+            )
+        result = RagQueryResult(answer=str(response), citations=prepared.citations, hits=hits)
+        self._remember_answer(prepared.plan, result)
+        return result
+
+    async def aquery(
+        self,
+        question: str,
+        filters: MetadataFilters | None = None,
+        use_hybrid: bool = False,
+        return_hits_only: bool = False,
+    ) -> RagQueryResult:
+        """Variante asynchrone de :meth:`query`.
+
+        Les appels réseau (vLLM, Qdrant, Elasticsearch) sont attendus sans bloquer
+        la boucle d'événements ; l'embedding de la question et le reranking sont
+        déportés sur le pool CPU borné de :mod:`llm_pipeline.concurrency`.
+        """
+        with collect_stage_timings() as timings, stage_timer("total"):
+            result = await self._aquery(question, filters, use_hybrid, return_hits_only)
+        result.timings = timings
+        return result
+
+    async def _aquery(
+        self,
+        question: str,
+        filters: MetadataFilters | None,
+        use_hybrid: bool,
+        return_hits_only: bool,
+    ) -> RagQueryResult:
+        outcome = await self._aretrieve_and_prepare(question, filters, use_hybrid, return_hits_only)
+        if isinstance(outcome, RagQueryResult):
+            return outcome
+        prepared, hits = outcome
+
+        with stage_timer("generation"):
+            response = await self.llm.apredict(
+                prepared.prompt,
+                context=prepared.context_text,
+                question=question,
+                stop=STOP_SEQUENCES,
+            )
+        result = RagQueryResult(answer=str(response), citations=prepared.citations, hits=hits)
+        self._remember_answer(prepared.plan, result)
+        return result
+
+    async def astream_query(
+        self,
+        question: str,
+        filters: MetadataFilters | None = None,
+        use_hybrid: bool = False,
+    ) -> RagStreamResult:
+        """Comme :meth:`aquery` mais la réponse est produite token par token.
+
+        Les citations sont connues avant le premier token ; les réponses courtes
+        (question vague, aucun document) sont émises en un seul fragment.
+        """
+        request_started = time.perf_counter()
+        with collect_stage_timings() as timings:
+            outcome = await self._aretrieve_and_prepare(question, filters, use_hybrid, False)
+            if isinstance(outcome, RagQueryResult):
+                observe_stage("total", time.perf_counter() - request_started)
+                result = RagStreamResult.from_answer(outcome.answer, outcome.citations, outcome.hits)
+                result.timings = timings
+                return result
+            prepared, hits = outcome
+
+            started = time.perf_counter()
+            tokens = await self.llm.astream(
+                prepared.prompt,
+                context=prepared.context_text,
+                question=question,
+                stop=STOP_SEQUENCES,
+            )
+        citations = prepared.citations
+
+        async def remember_when_done() -> AsyncIterator[str]:
+            parts: List[str] = []
+            async for token in tokens:
+                parts.append(token)
+                yield token
+            # Le stream est consommé hors de astream_query : on reprend la collecte de la requête
+            with collect_stage_timings(timings):
+                finished = time.perf_counter()
+                observe_stage("generation", finished - started)
+                observe_stage("total", finished - request_started)
+                self._remember_answer(
+                    prepared.plan, RagQueryResult(answer="".join(parts), citations=citations, hits=hits)
+                )
+
+        return RagStreamResult(tokens=remember_when_done(), citations=citations, hits=hits, timings=timings)
+
+    async def _aretrieve_and_prepare(
+        self,
+        question: str,
+        filters: MetadataFilters | None,
+        use_hybrid: bool,
+        return_hits_only: bool,
+    ) -> RagQueryResult | Tuple[_PreparedAnswer, Optional[List[Dict[str, Any]]]]:
+        """Étapes communes à :meth:`aquery` et :meth:`astream_query` jusqu'au prompt final.
+
+        Retourne soit un résultat définitif (sortie anticipée), soit le prompt
+        préparé accompagné des hits hybrides.
+        """
+        early = self._check_vague(question)
+        if early is not None:
+            return early
+
+        outcome = await self._aroute_and_retrieve(question, filters, use_hybrid, return_hits_only)
+        if isinstance(outcome, RagQueryResult):
+            return outcome
+        plan, nodes, hits = outcome
+        if use_hybrid and return_hits_only:
+            return RagQueryResult(answer="", citations=[], hits=hits)
+
+        if "effectif" in plan.question_lower:
+            keyword_nodes = await _akeyword_search_nodes(["effectif", "effectifs"])
+            nodes = _merge_unique_nodes(nodes, keyword_nodes)
+
+        if not nodes:
+            return _no_documents_result()
+
+        with stage_timer("rerank"):
+            reranked = await run_cpu_bound(self._cross_encoder_rerank, nodes, question, plan.candidate_depth)
+        prepared = self._prepare_answer(plan, nodes, reranked)
+        if prepared is None:
+            return _below_threshold_result(hits)
+        return prepared, hits
+
+    def _route_and_retrieve(
+        self,
+        question: str,
+        filters: MetadataFilters | None,
+        use_hybrid: bool,
+        return_hits_only: bool,
+    ) -> RagQueryResult | Tuple[_QueryPlan, List, Optional[List[Dict[str, Any]]]]:
+        """Router puis recherche ; retourne une réponse en cache ou ``(plan, nodes, hits)``.
+
+        Quand le router doit appeler le LLM, la recherche part avec les filtres
+        regex pendant cet appel (cf. :mod:`llm_pipeline.router_speculation`).
+        """
+        speculative, needs_llm = self.query_router.speculate(question, llm=self.router_llm)
+        if not (needs_llm and self.speculative_retrieval):
+            plan = self._plan_query(question, filters, self._route(question), use_hybrid, cacheable=not return_hits_only)
+            if self._semantic_cache_enabled(plan) and self.embed_model is not None:
+                plan.query_embedding = self.embed_model.get_query_embedding(question)
+            cached = self._lookup_cached_answer(plan)
+            if cached is not None:
+                return cached
+            return (plan, *self._retrieve(question, plan, use_hybrid))
+
+        router_future = get_io_executor().submit(contextvars.copy_context().run, self._route, question)
+        speculative_plan = self._plan_query(question, filters, speculative, use_hybrid)
+        if self.embed_model is not None:
+            speculative_plan.query_embedding = self.embed_model.get_query_embedding(question)
+        nodes, hits = self._retrieve(question, speculative_plan, use_hybrid)
+
+        plan = self._plan_query(
+            question, filters, router_future.result(), use_hybrid, cacheable=not return_hits_only
         )
-        print(f"DEBUG: Detected question type: {question_type}", flush=True)
-        
-        for pattern in vague_patterns:
+        plan.query_embedding = speculative_plan.query_embedding
+        cached = self._lookup_cached_answer(plan)
+        if cached is not None:
+            return cached
+        reused = self._settle_speculation(speculative_plan, plan, nodes, use_hybrid)
+        if reused is None:
+            return (plan, *self._retrieve(question, plan, use_hybrid))
+        return plan, reused, hits
+
+    async def _aroute_and_retrieve(
+        self,
+        question: str,
+        filters: MetadataFilters | None,
+        use_hybrid: bool,
+        return_hits_only: bool,
+    ) -> RagQueryResult | Tuple[_QueryPlan, List, Optional[List[Dict[str, Any]]]]:
+        """Variante asynchrone de :meth:`_route_and_retrieve`."""
+        speculative, needs_llm = self.query_router.speculate(question, llm=self.router_llm)
+        if not (needs_llm and self.speculative_retrieval):
+            router_result = await self._aroute(question)
+            plan = self._plan_query(question, filters, router_result, use_hybrid, cacheable=not return_hits_only)
+            if self._semantic_cache_enabled(plan) and self.embed_model is not None:
+                plan.query_embedding = await run_cpu_bound(self.embed_model.get_query_embedding, question)
+            cached = self._lookup_cached_answer(plan)
+            if cached is not None:
+                return cached
+            return (plan, *await self._aretrieve(question, plan, use_hybrid))
+
+        router_task = asyncio.ensure_future(self._aroute(question))
+        speculative_plan = self._plan_query(question, filters, speculative, use_hybrid)
+        # Embedding calculé une fois : recherche spéculative, cache sémantique, éventuelle relance
+        embedding = asyncio.ensure_future(self._aembed(question))
+        retrieval = asyncio.ensure_future(
+            self._aspeculative_retrieve(question, speculative_plan, use_hybrid, embedding)
+        )
+        try:
+            router_result = await router_task
+            plan = self._plan_query(question, filters, router_result, use_hybrid, cacheable=not return_hits_only)
+            plan.query_embedding = await embedding
+        except BaseException:
+            retrieval.cancel()
+            raise
+        cached = self._lookup_cached_answer(plan)
+        if cached is not None:
+            retrieval.cancel()
+            return cached
+
+        nodes, hits = await retrieval
+        reused = self._settle_speculation(speculative_plan, plan, nodes, use_hybrid)
+        if reused is None:
+            return (plan, *await self._aretrieve(question, plan, use_hybrid))
+        return plan, reused, hits
+
+    def _route(self, question: str) -> QueryRouterResult:
+        with stage_timer("router"):
+            return self.query_router.analyze(question, llm=self.router_llm)
+
+    async def _aroute(self, question: str) -> QueryRouterResult:
+        with stage_timer("router"):
+            return await self.query_router.aanalyze(question, llm=self.router_llm)
+
+    def _retrieve(
+        self, question: str, plan: _QueryPlan, use_hybrid: bool
+    ) -> Tuple[List, Optional[List[Dict[str, Any]]]]:
+        if use_hybrid:
+            return pipeline_hybrid_query(
+                self, question, filters=plan.filters, embedding=plan.query_embedding, top_k=plan.candidate_depth
+            )
+        with stage_timer("dense"):
+            retriever = self.index.as_retriever(similarity_top_k=plan.candidate_depth, filters=plan.filters)
+            return retriever.retrieve(QueryBundle(question, embedding=plan.query_embedding)), None
+
+    async def _aretrieve(
+        self, question: str, plan: _QueryPlan, use_hybrid: bool
+    ) -> Tuple[List, Optional[List[Dict[str, Any]]]]:
+        if use_hybrid:
+            return await pipeline_ahybrid_query(
+                self, question, filters=plan.filters, embedding=plan.query_embedding, top_k=plan.candidate_depth
+            )
+        with stage_timer("dense"):
+            nodes = await self.adense_retrieve(question, plan.filters, plan.candidate_depth, embedding=plan.query_embedding)
+        return nodes, None
+
+    async def _aspeculative_retrieve(
+        self, question: str, plan: _QueryPlan, use_hybrid: bool, embedding: Awaitable[Optional[List[float]]]
+    ) -> Tuple[List, Optional[List[Dict[str, Any]]]]:
+        plan.query_embedding = await embedding
+        return await self._aretrieve(question, plan, use_hybrid)
+
+    async def _aembed(self, question: str) -> Optional[List[float]]:
+        if self.embed_model is None:
+            return None
+        return await run_cpu_bound(self.embed_model.get_query_embedding, question)
+
+    def _settle_speculation(
+        self, speculative_plan: _QueryPlan, plan: _QueryPlan, nodes: List, use_hybrid: bool
+    ) -> Optional[List]:
+        """Nodes spéculatifs réutilisables pour le plan définitif, ``None`` s'il faut relancer la recherche."""
+        outcome, reused = reuse_speculative(
+            nodes,
+            speculative_plan.router_result.filters,
+            plan.router_result.filters,
+            speculative_plan.candidate_depth,
+            plan.candidate_depth,
+            exact_filtering=not use_hybrid,
+        )
+        record_speculation(outcome)
+        LOGGER.debug(
+            "Speculative retrieval %s (regex filters=%s, router filters=%s)",
+            outcome,
+            speculative_plan.router_result.filters,
+            plan.router_result.filters,
+        )
+        return reused
+
+    async def adense_retrieve(
+        self,
+        question: str,
+        filters: MetadataFilters | None,
+        top_k: int,
+        embedding: Optional[List[float]] = None,
+    ) -> List:
+        """Recherche dense asynchrone : embedding sur le pool CPU, requête via le client Qdrant async."""
+        query_bundle = QueryBundle(question, embedding=embedding)
+        if query_bundle.embedding is None and self.embed_model is not None:
+            query_bundle.embedding = await run_cpu_bound(self.embed_model.get_query_embedding, question)
+        retriever = self.index.as_retriever(similarity_top_k=top_k, filters=filters)
+        return await retriever.aretrieve(query_bundle)
+
+    def _check_vague(self, question: str) -> Optional[RagQueryResult]:
+        """Rejette les questions trop vagues avant tout appel coûteux (router LLM, retrieval)."""
+        question_lower = question.lower().strip()
+        for pattern in VAGUE_PATTERNS:
             if re.match(pattern, question_lower):
-                print(f"DEBUG: Matched vague pattern: {pattern}", flush=True)
+                LOGGER.debug("Matched vague pattern: %s", pattern)
                 return RagQueryResult(
                     answer="Je ne peux pas répondre à cette question car elle manque de contexte. "
                            "Pourriez-vous préciser ce que vous cherchez ? Par exemple : "
                            "\"Quel est le montant du DQE pour le projet Montmirail ?\"",
                     citations=[]
                 )
+        return None
 
-        print(f"DEBUG: No vague pattern matched, proceeding with RAG search", flush=True)
+    def _plan_query(
+        self,
+        question: str,
+        filters: MetadataFilters | None,
+        router_result: QueryRouterResult,
+        use_hybrid: bool = False,
+        cacheable: bool = False,
+    ) -> _QueryPlan:
+        question_lower = question.lower().strip()
+        question_type = classify_query_type(question_lower)
+        metadata_filters = self._merge_metadata_filters(filters, router_result.filters)
+        LOGGER.debug(
+            "QueryRouter intent=%s filters=%s confidence=%.2f type=%s",
+            router_result.intent,
+            router_result.filters,
+            router_result.confidence,
+            question_type,
+        )
+        scope = None
+        if cacheable and self.answer_cache is not None:
+            scope = cache_scope(self.model_name, metadata_filters, use_hybrid, question_type)
+        return _QueryPlan(
+            question=question,
+            question_lower=question_lower,
+            question_type=question_type,
+            filters=metadata_filters,
+            router_result=router_result,
+            candidate_depth=self.rerank_policy.candidate_depth(router_result),
+            cache_scope=scope,
+        )
 
-        hits: Optional[List[Dict[str, Any]]] = None
-        if use_hybrid:
-            nodes, hits = pipeline_hybrid_query(self, question, filters=metadata_filters)
-            query_text = question
-            if return_hits_only:
-                return RagQueryResult(answer="", citations=[], hits=hits)
-        else:
-            retriever = self.index.as_retriever(similarity_top_k=self.initial_top_k, filters=metadata_filters)
-            query_bundle = QueryBundle(question)
-            nodes = retriever.retrieve(query_bundle)
-            query_text = query_bundle.query_str
+    def _semantic_cache_enabled(self, plan: _QueryPlan) -> bool:
+        return plan.cache_scope is not None and self.answer_cache.semantic_enabled
 
-        if "effectif" in question_lower:
-            keyword_nodes = _keyword_search_nodes(["effectif", "effectifs"])
-            nodes = _merge_unique_nodes(nodes, keyword_nodes)
+    def _lookup_cached_answer(self, plan: _QueryPlan) -> Optional[RagQueryResult]:
+        if plan.cache_scope is None:
+            return None
+        cached = self.answer_cache.get(plan.question, plan.cache_scope, plan.query_embedding)
+        if cached is None:
+            return None
+        LOGGER.debug("Answer cache hit for %r", plan.question)
+        return RagQueryResult(answer=cached.answer, citations=list(cached.citations), hits=cached.hits)
 
-        if not nodes:
-            return RagQueryResult(
-                answer="Je n'ai pas trouvé de documents pertinents pour répondre à cette question.",
-                citations=[]
-            )
+    def _remember_answer(self, plan: _QueryPlan, result: RagQueryResult) -> None:
+        # Seules les réponses générées et sourcées sont mises en cache
+        if plan.cache_scope is None or not result.citations or not result.answer.strip():
+            return
+        # Réponse d'une recherche dégradée (ES lent, Qdrant en erreur) : ne pas la figer pour tout le TTL
+        if retrieval_degraded(result.hits):
+            LOGGER.debug("Degraded retrieval for %r, answer not cached", plan.question)
+            return
+        self.answer_cache.put(
+            plan.question,
+            plan.cache_scope,
+            CachedAnswer(answer=result.answer, citations=list(result.citations), hits=result.hits),
+            plan.query_embedding,
+        )
 
-        reranked = self._cross_encoder_rerank(nodes, query_text)
+    def _prepare_answer(self, plan: _QueryPlan, nodes: List, reranked: List) -> Optional[_PreparedAnswer]:
+        """Filtre les nodes rerankés, construit le contexte, le prompt et les citations.
 
-        if question_type == "question_chiffree":
+        Retourne ``None`` si aucun node ne passe le seuil de pertinence.
+        """
+        if plan.question_type == "question_chiffree":
             reranked = _prioritize_numeric_nodes(reranked, nodes, self.top_k)
         
         # Check relevance threshold
         MIN_RELEVANCE_SCORE = float(os.getenv("MIN_RELEVANCE_SCORE", "0.1"))
         
-        print(f"DEBUG: Reranked nodes scores:", flush=True)
-        for i, node in enumerate(reranked[:5]):
-            score = node.score if hasattr(node, 'score') else 'N/A'
-            print(f"  [{i+1}] Score: {score} - Source: {node.metadata.get('source', 'unknown')[:50]}", flush=True)
+        if payload_logging_enabled(LOGGER):
+            for i, node in enumerate(reranked[:5]):
+                score = node.score if hasattr(node, 'score') else 'N/A'
+                LOGGER.debug("Reranked [%d] score=%s source=%s", i + 1, score, node.metadata.get('source', 'unknown')[:50])
         
         relevant_nodes = [node for node in reranked if hasattr(node, 'score') and node.score >= MIN_RELEVANCE_SCORE]
         
-        print(f"DEBUG: {len(relevant_nodes)}/{len(reranked)} nodes passed threshold {MIN_RELEVANCE_SCORE}", flush=True)
+        LOGGER.debug("%d/%d nodes passed threshold %s", len(relevant_nodes), len(reranked), MIN_RELEVANCE_SCORE)
         if not relevant_nodes:
-            return RagQueryResult(
-                answer="Je n'ai pas trouvé de documents suffisamment pertinents pour répondre à cette question. "
-                "Pourriez-vous reformuler ou ajouter plus de contexte ?",
-                citations=[],
-                hits=hits,
-            )
+            return None
 
         # Priorisation finale : On remonte les docs officiels (DCE, BPU...) en haut de la pile
         relevant_nodes = _prioritize_official_docs(relevant_nodes)
 
-        context_text, snippet_map = format_context(
-            relevant_nodes,
-            question,
-            max_chunk_chars=self.max_chunk_chars,
-            top_k=self.top_k,
-        )
+        with stage_timer("context"):
+            context_text, snippet_map = format_context(
+                relevant_nodes,
+                plan.question,
+                max_chunk_chars=self.max_chunk_chars,
+                top_k=self.top_k,
+            )
 
         # Choisir le prompt adapté au type de question
-        if question_type == "fiche_identite":
+        if plan.question_type == "fiche_identite":
             qa_prompt = self.qa_prompt_fiche
-        elif question_type == "question_chiffree":
+        elif plan.question_type == "question_chiffree":
             qa_prompt = self.qa_prompt_chiffres
         else:
             qa_prompt = self.qa_prompt
 
-        response = self.llm.predict(
-            qa_prompt,
-            context=context_text,
-            question=question,
-            stop=["Question :", "\nQuestion :", "Question:", "\nQuestion:"]
-        )
-        citations = []
-        for node in relevant_nodes:  # Iterate over relevant_nodes, not original nodes
-            source = node.metadata.get("source", "inconnu")
-            chunk_value = node.metadata.get("chunk_index", node.id_)
-            key = citation_key(source, chunk_value)
-            citations.append(
-                {
-                    "source": source,
-                    "chunk": chunk_value,
-                    "snippet": snippet_map.get(key, ""),
-                }
-            )
-        return RagQueryResult(answer=str(response), citations=citations, hits=hits)
+        with stage_timer("citations"):
+            citations = []
+            for node in relevant_nodes:  # Iterate over relevant_nodes, not original nodes
+                source = node.metadata.get("source", "inconnu")
+                chunk_value = node.metadata.get("chunk_index", node.id_)
+                key = citation_key(source, chunk_value)
+                citations.append(
+                    {
+                        "source": source,
+                        "chunk": chunk_value,
+                        "snippet": snippet_map.get(key, ""),
+                    }
+                )
+        return _PreparedAnswer(prompt=qa_prompt, context_text=context_text, citations=citations, plan=plan)
 
     def _build_metadata_filters(self, filters: Mapping[str, str]) -> MetadataFilters | None:
         if not filters:
@@ -291,54 +741,98 @@ class RagPipeline:
         return MetadataFilters(filters=base_filters, condition=base.condition)
 
     def chat_only(self, messages: List[ChatMessage] | str) -> str:
-        print(f"DEBUG: chat_only called", flush=True)
         try:
-            if isinstance(messages, str):
-                # Fallback for simple string (legacy)
-                prompt = self.chat_prompt.format(question=messages)
-            else:
-                # Manual prompt construction from history to ensure control over stop tokens
-                # Format:
-                # User: ...
-                # Assistant: ...
-                # ...
-                # User: ...
-                # Assistant:
-                
-                # Limit to last 3 exchanges (6 messages) to prevent context overflow
-                recent_messages = messages[-6:] if len(messages) > 6 else messages
-                
-                formatted_history = ""
-                for msg in recent_messages:
-                    role_label = "User" if msg.role == "user" else "Assistant"
-                    formatted_history += f"{role_label}: {msg.content}\n"
-                
-                # Append the final Assistant prompt
-                prompt = f"""Tu es un assistant francophone polyvalent. Réponds de manière claire et concise.
+            prompt = self._build_chat_prompt(messages)
+            response = self.llm.complete(prompt, stop=CHAT_STOP_SEQUENCES)
+            if payload_logging_enabled(LOGGER):
+                LOGGER.debug("chat_only response: %r", str(response))
+            return str(response).strip()
+        except Exception as e:
+            return self._chat_error_message(e)
 
-{formatted_history}Assistant:"""
+    async def astream_chat_only(self, messages: List[ChatMessage] | str) -> AsyncIterator[str]:
+        """Variante streaming de :meth:`chat_only` : produit les fragments de texte au fil de l'eau."""
+        try:
+            prompt = self._build_chat_prompt(messages)
+            stream = await self.llm.astream_complete(prompt, stop=CHAT_STOP_SEQUENCES)
+            async for chunk in stream:
+                if chunk.delta:
+                    yield chunk.delta
+        except Exception as e:
+            yield self._chat_error_message(e)
 
-            print(f"DEBUG: chat_only prompt:\n{prompt}", flush=True)
-            
-            response = self.llm.complete(
-                prompt,
-                stop=["User:", "user:", "Assistant:", "assistant:", "\nUser", "\nAssistant"]
-            )
-                
-            print(f"DEBUG: chat_only response: '{response}'", flush=True)
+    async def achat_only(self, messages: List[ChatMessage] | str) -> str:
+        """Variante asynchrone de :meth:`chat_only`."""
+        try:
+            prompt = self._build_chat_prompt(messages)
+            response = await self.llm.acomplete(prompt, stop=CHAT_STOP_SEQUENCES)
+            if payload_logging_enabled(LOGGER):
+                LOGGER.debug("achat_only response: %r", str(response))
             return str(response).strip()
         except Exception as e:
-            import traceback
-            error_type = type(e).__name__
-            print(f"DEBUG: chat_only error ({error_type}): {e}", flush=True)
-            traceback.print_exc()
+            return self._chat_error_message(e)
+
+    def _build_chat_prompt(self, messages: List[ChatMessage] | str) -> str:
+        if isinstance(messages, str):
+            # Fallback for simple string (legacy)
+            prompt = self.chat_prompt.format(question=messages)
+        else:
+            # Manual prompt construction from history to ensure control over stop tokens
+            # Format:
+            # User: ...
+            # Assistant: ...
+            # ...
+            # User: ...
+            # Assistant:
             
-            # Check if it's a connection error
-            if "connect" in str(e).lower() or "connection" in str(e).lower():
-                print(f"ERROR: vLLM connection failed. Is vllm-light running and healthy?", flush=True)
-                return "Le modèle est temporairement indisponible. Veuillez réessayer dans quelques secondes."
+            # Limit to last 3 exchanges (6 messages) to prevent context overflow
+            recent_messages = messages[-6:] if len(messages) > 6 else messages
             
-            return f"Error: {e}"
+            formatted_history = ""
+            for msg in recent_messages:
+                role_label = "User" if msg.role == "user" else "Assistant"
+                formatted_history += f"{role_label}: {msg.content}\n"
+            
+            # Append the final Assistant prompt
+            prompt = f"""Tu es un assistant francophone polyvalent. Réponds de manière claire et concise.
+
+{formatted_history}Assistant:"""
+
+        if payload_logging_enabled(LOGGER):
+            LOGGER.debug("chat_only prompt:\n%s", prompt)
+        return prompt
+
+    @staticmethod
+    def _chat_error_message(e: Exception) -> str:
+        LOGGER.warning("chat_only error (%s): %s", type(e).__name__, e, exc_info=True)
+
+        # Check if it's a connection error
+        if "connect" in str(e).lower() or "connection" in str(e).lower():
+            LOGGER.error("vLLM connection failed. Is vllm-light running and healthy?")
+            return "Le modèle est temporairement indisponible. Veuillez réessayer dans quelques secondes."
+        
+        return f"Error: {e}"
+
+
+async def _aiter_once(text: str) -> AsyncIterator[str]:
+    """Itérateur asynchrone à un seul élément (réponses fixes en mode streaming)."""
+    yield text
+
+
+def _no_documents_result() -> RagQueryResult:
+    return RagQueryResult(
+        answer="Je n'ai pas trouvé de documents pertinents pour répondre à cette question.",
+        citations=[]
+    )
+
+
+def _below_threshold_result(hits: Optional[List[Dict[str, Any]]]) -> RagQueryResult:
+    return RagQueryResult(
+        answer="Je n'ai pas trouvé de documents suffisamment pertinents pour répondre à cette question. "
+        "Pourriez-vous reformuler ou ajouter plus de contexte ?",
+        citations=[],
+        hits=hits,
+    )
 
 
 NUMERIC_KEYWORDS = [
@@ -416,25 +910,40 @@ def _keyword_search_nodes(queries: List[str], size: int = 5) -> List:
     nodes: List = []
     for query in queries:
         hits = bm25_search(query, size=size) if bm25_search else []
-        for hit in hits:
-            source = hit.get("_source", {}) or {}
-            text = str(source.get("content", ""))
-            metadata = dict(source)
-            metadata.pop("content", None)
-            node_id_value = str(hit.get("_id", ""))
-            score = float(hit.get("_score", 0.0))
-            nodes.append(
-                type(
-                    "KeywordNode",
-                    (),
-                    {
-                        "id_": node_id_value,
-                        "metadata": metadata,
-                        "text": text,
-                        "score": score,
-                    },
-                )()
-            )
+        nodes.extend(_keyword_hits_to_nodes(hits))
+    return nodes
+
+
+async def _akeyword_search_nodes(queries: List[str], size: int = 5) -> List:
+    """Variante asynchrone de :func:`_keyword_search_nodes` (requêtes BM25 concurrentes)."""
+    results = await asyncio.gather(*(abm25_search(query, size=size) for query in queries))
+    nodes: List = []
+    for hits in results:
+        nodes.extend(_keyword_hits_to_nodes(hits))
+    return nodes
+
+
+def _keyword_hits_to_nodes(hits: List[Dict[str, Any]]) -> List:
+    nodes: List = []
+    for hit in hits:
+        source = hit.get("_source", {}) or {}
+        text = str(source.get("content", ""))
+        metadata = dict(source)
+        metadata.pop("content", None)
+        node_id_value = str(hit.get("_id", ""))
+        score = float(hit.get("_score", 0.0))
+        nodes.append(
+            type(
+                "KeywordNode",
+                (),
+                {
+                    "id_": node_id_value,
+                    "metadata": metadata,
+                    "text": text,
+                    "score": score,
+                },
+            )()
+        )
     return nodes
 
 
@@ -452,4 +961,4 @@ def _merge_unique_nodes(base_nodes: List, extra_nodes: List) -> List:
     return base_nodes
 
 
-__all__ = ["RagPipeline", "RagQueryResult"]
+__all__ = ["RagPipeline", "RagQueryResult", "RagStreamResult"]
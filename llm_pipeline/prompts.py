@@ -172,8 +172,12 @@ __all__ = [
 
 
 def get_router_prompt() -> str:
-    """Prompt to extract AO metadata from a question (JSON output)."""
-    return """[INST] Tu es un expert en analyse de demandes liées aux Appels d'Offres (AO).
+    """Prompt to extract AO metadata from a question (JSON output).
+
+    Sans balises de modèle : il est envoyé en message utilisateur et vLLM applique
+    le chat template du modèle servi (Mistral, Phi-3...).
+    """
+    return """Tu es un expert en analyse de demandes liées aux Appels d'Offres (AO).
 Ta mission est d'extraire les filtres de métadonnées d'une question utilisateur pour interroger une base vectorielle.
 
 Champs possibles à extraire (JSON) :
@@ -196,6 +200,6 @@ JSON : {"ao_doc_code": "BPU", "ao_commune": "BORDEAUX"}
 Question : "Montre moi le CCTP phase candidature de l'affaire ED4500"
 JSON : {"ao_doc_code": "CCTP", "ao_phase_label": "Candidature", "ao_id": "ED4500"}
 
-Question : {question} [/INST]
+Question : {question}
 JSON :"""
 
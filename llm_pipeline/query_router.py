@@ -1,12 +1,36 @@
-"""Petit router pour extraire les filtres AO des questions."""
+"""Petit router pour extraire les filtres AO des questions.
+
+Les regex couvrent les identifiants et codes ; quand elles ne suffisent pas, le
+router interroge un LLM dédié (:func:`get_router_llm`, modèle léger quand il est
+activé) avec le décodage guidé JSON de vLLM et un ``max_tokens`` serré. Les
+filtres extraits sont mémorisés par question normalisée
+(:class:`RouterExtractionCache`) : une question répétée ne rappelle pas le LLM.
+"""
 from __future__ import annotations
 
 import json
+import logging
 import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Any, Dict, Iterable, Mapping, Optional
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
 
 # from ingestion.metadata_utils import DOC_ROLE_PATTERNS
+from llm_pipeline.answer_cache import normalize_question
+from llm_pipeline.config import (
+    ROUTER_API_KEY,
+    ROUTER_CACHE_SIZE,
+    ROUTER_GUIDED_JSON,
+    ROUTER_LLM_ENDPOINT,
+    ROUTER_MAX_TOKENS,
+    ROUTER_MODEL_ID,
+    ROUTER_TIMEOUT,
+)
+from llm_pipeline.metrics import is_tracked, register_counter_source, stage_timer
+from llm_pipeline.model_registry import get_model_registry
 from llm_pipeline.prompts import get_router_prompt
 from llama_index.core.prompts import PromptTemplate
 
@@ -26,6 +50,20 @@ DOC_ROLE_PATTERNS: Mapping[str, Iterable[str]] = {
 }
 
 
+# Schéma imposé à la sortie du LLM (guided_json) ; reprend les champs du prompt router
+ROUTER_JSON_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "ao_id": {"type": "string", "maxLength": 16},
+        "ao_commune": {"type": "string", "maxLength": 48},
+        "ao_doc_code": {"enum": ["BPU", "DQE", "CCTP", "CCAP", "RC", "AE", "PLANNING", "MEMOIRE"]},
+        "ao_phase_label": {"enum": ["Candidature", "Offre"]},
+        "ao_signed": {"enum": ["true"]},
+    },
+    "additionalProperties": False,
+}
+
+
 @dataclass(slots=True)
 class QueryRouterResult:
     """Résultat synthétique retourné par le router."""
@@ -35,6 +73,45 @@ class QueryRouterResult:
     confidence: float = 0.0
 
 
+class RouterExtractionCache:
+    """LRU des filtres extraits par le LLM, indexé par question normalisée."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    def get(self, question: str) -> Optional[Dict[str, str]]:
+        if not is_tracked():
+            return None
+        key = normalize_question(question)
+        with self._lock:
+            filters = self._entries.get(key)
+            if filters is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+        return dict(filters)
+
+    def put(self, question: str, filters: Mapping[str, str]) -> None:
+        if not is_tracked():
+            return
+        key = normalize_question(question)
+        with self._lock:
+            self._entries[key] = dict(filters)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, question: str) -> bool:
+        return is_tracked() and normalize_question(question) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class QueryRouter:
     """Détecte les intentions AO et reconstitue les filtres qu’on pourra envoyer à Qdrant."""
 
@@ -68,9 +145,10 @@ class QueryRouter:
     # On veut un mapping "bpu" -> "BPU", "bordereau des prix" -> "BPU"
     DOC_KEYWORD_TO_CODE: Dict[str, str] = {}
     
-    def __init__(self) -> None:
+    def __init__(self, cache_size: int = ROUTER_CACHE_SIZE) -> None:
         self._build_keyword_map()
         self.router_prompt = PromptTemplate(get_router_prompt())
+        self.extraction_cache = RouterExtractionCache(cache_size) if cache_size > 0 else None
 
     def _build_keyword_map(self) -> None:
         """Construit l'index inversé pour la détection rapide."""
@@ -84,13 +162,49 @@ class QueryRouter:
         Si un LLM est fourni et que les regex ne trouvent rien de probant, 
         on tente une extraction plus fine.
         """
+        lower = question.strip().lower()
+        filters = self._regex_filters(question)
+
+        if self._should_call_llm(filters, lower, llm):
+            try:
+                self._merge_llm_filters(filters, self._extract_with_llm(question, llm))
+            except Exception as e:
+                LOGGER.warning("LLM router failed: %s", e)
+
+        return self._finalize(lower, filters)
+
+    async def aanalyze(self, question: str, llm: Any = None) -> QueryRouterResult:
+        """Variante asynchrone de :meth:`analyze` (appel LLM via ``apredict``)."""
+        lower = question.strip().lower()
+        filters = self._regex_filters(question)
+
+        if self._should_call_llm(filters, lower, llm):
+            try:
+                self._merge_llm_filters(filters, await self._aextract_with_llm(question, llm))
+            except Exception as e:
+                LOGGER.warning("LLM router failed: %s", e)
+
+        return self._finalize(lower, filters)
+
+    def speculate(self, question: str, llm: Any = None) -> Tuple[QueryRouterResult, bool]:
+        """Résultat regex seul, et ``True`` si :meth:`aanalyze` appellerait le LLM.
+
+        Permet de lancer la recherche avec les filtres regex pendant l'appel LLM.
+        """
+        lower = question.strip().lower()
+        filters = self._regex_filters(question)
+        needs_llm = self._should_call_llm(filters, lower, llm)
+        if needs_llm and self.extraction_cache is not None and question in self.extraction_cache:
+            needs_llm = False
+        return self._finalize(lower, filters), needs_llm
+
+    def _regex_filters(self, question: str) -> Dict[str, str]:
+        """Approche Regex (rapide et précise sur les ID/Codes)."""
         text = question.strip()
         lower = text.lower()
 
         filters: Dict[str, str] = {}
-        
-        # --- 1. Approche Regex (Rapide et précise sur les ID/Codes) ---
-        
+
         # AO identifiant
         ao_id_match = self.AO_ID_PATTERN.search(text)
         if ao_id_match:
@@ -121,27 +235,26 @@ class QueryRouter:
         # Signed flag
         if "signé" in lower or "signee" in lower:
             filters["ao_signed"] = "true"
-            
-        # --- 2. Approche LLM (Si nécessaire) ---
+        return filters
+
+    @staticmethod
+    def _should_call_llm(filters: Mapping[str, str], lower: str, llm: Any) -> bool:
         # Si on a un LLM et qu'on a peu de filtres (ou qu'il manque des infos cruciales comme la commune),
         # on peut demander au LLM de compléter.
         # Pour l'instant, on l'appelle si on a rien trouvé, ou si on pense qu'il y a une commune non détectée.
-        
-        should_call_llm = llm is not None and (len(filters) == 0 or "commune" in lower or "mairie" in lower)
-        
-        if should_call_llm:
-            try:
-                llm_filters = self._extract_with_llm(question, llm)
-                # On merge les résultats LLM (priorité au LLM pour la commune/phase, priorité Regex pour ID)
-                for k, v in llm_filters.items():
-                    if k not in filters:
-                        filters[k] = v
-                    elif k == "ao_commune": # LLM souvent meilleur pour isoler la commune
-                        filters[k] = v
-            except Exception as e:
-                print(f"Warning: LLM router failed: {e}")
+        return llm is not None and (len(filters) == 0 or "commune" in lower or "mairie" in lower)
+
+    @staticmethod
+    def _merge_llm_filters(filters: Dict[str, str], llm_filters: Mapping[str, str]) -> None:
+        # On merge les résultats LLM (priorité au LLM pour la commune/phase, priorité Regex pour ID)
+        for k, v in llm_filters.items():
+            if k not in filters:
+                filters[k] = v
+            elif k == "ao_commune": # LLM souvent meilleur pour isoler la commune
+                filters[k] = v
 
-        # --- 3. Default Filtering for Generic AO Queries ---
+    def _finalize(self, lower: str, filters: Dict[str, str]) -> QueryRouterResult:
+        # --- Default Filtering for Generic AO Queries ---
         # Si on a un AO_ID mais PAS de type de document spécifique, on restreint aux documents structurants (DCE)
         # pour éviter de pollué la réponse avec des fichiers de travail (Excel divers, mails...).
         if "ao_id" in filters and "ao_doc_code" not in filters:
@@ -154,8 +267,7 @@ class QueryRouter:
                 and code not in ("PLANNING",) # On peut exclure planning aussi si peu pertinent
             ]
 
-
-        # --- 4. Intention ---
+        # --- Intention ---
         intent = self._resolve_intent(lower, filters)
         confidence = self._estimate_confidence(filters)
         
@@ -163,14 +275,45 @@ class QueryRouter:
 
     def _extract_with_llm(self, question: str, llm: Any) -> Dict[str, str]:
         """Utilise le LLM pour extraire le JSON."""
-        response = llm.predict(self.router_prompt, question=question)
+        cached = self._cached_extraction(question)
+        if cached is not None:
+            return cached
+        with stage_timer("router_llm"):
+            response = llm.predict(self.router_prompt, question=question)
+        return self._remember_extraction(question, self._parse_llm_response(response))
+
+    async def _aextract_with_llm(self, question: str, llm: Any) -> Dict[str, str]:
+        cached = self._cached_extraction(question)
+        if cached is not None:
+            return cached
+        with stage_timer("router_llm"):
+            response = await llm.apredict(self.router_prompt, question=question)
+        return self._remember_extraction(question, self._parse_llm_response(response))
+
+    def _cached_extraction(self, question: str) -> Optional[Dict[str, str]]:
+        return self.extraction_cache.get(question) if self.extraction_cache is not None else None
+
+    def _remember_extraction(self, question: str, filters: Optional[Dict[str, str]]) -> Dict[str, str]:
+        if filters is None:
+            # Réponse inexploitable : rien n'est mémorisé, la question sera retentée
+            LOGGER.warning("LLM router returned invalid JSON, falling back to regex filters")
+            return {}
+        if self.extraction_cache is not None:
+            self.extraction_cache.put(question, filters)
+        return filters
+
+    @staticmethod
+    def _parse_llm_response(response: Any) -> Optional[Dict[str, str]]:
+        """Filtres extraits de la réponse, ``None`` si elle n'est pas un objet JSON."""
         # Nettoyage basique du markdown json
         cleaned = str(response).replace("```json", "").replace("```", "").strip()
         try:
             data = json.loads(cleaned)
-            return {k: str(v) for k, v in data.items() if v} # Filtre les valeurs vides
         except json.JSONDecodeError:
-            return {}
+            return None
+        if not isinstance(data, dict):
+            return None
+        return {k: str(v) for k, v in data.items() if v} # Filtre les valeurs vides
 
     def _resolve_intent(self, text: str, filters: Mapping[str, str]) -> str:
         LIST_KEYWORDS = {"liste", "inventaire", "quels sont", "donne moi les ao"}
@@ -193,4 +336,55 @@ class QueryRouter:
         return min(score, 1.0)
 
 
-__all__ = ["QueryRouter", "QueryRouterResult"]
+_router_lock = threading.Lock()
+_router_llm: Any = None
+
+
+def get_query_router() -> QueryRouter:
+    """Router partagé du processus (cache d'extraction commun, exporté sur ``/metrics``)."""
+
+    def build() -> QueryRouter:
+        router = QueryRouter()
+        if router.extraction_cache is not None:
+            cache = router.extraction_cache
+            register_counter_source(
+                "rag_router_cache_events_total", "Événements du cache d'extraction du router.", "event",
+                lambda: dict(cache.stats),
+            )
+        return router
+
+    return get_model_registry().get("query_router", build)
+
+
+def get_router_llm() -> Any:
+    """Client LLM du router : ``ROUTER_MODEL_ID``, réponse courte et JSON guidé par vLLM."""
+    global _router_llm
+    if _router_llm is None:
+        with _router_lock:
+            if _router_llm is None:
+                from llama_index.llms.openai_like import OpenAILike
+
+                additional_kwargs = {"extra_body": {"guided_json": ROUTER_JSON_SCHEMA}} if ROUTER_GUIDED_JSON else {}
+                _router_llm = OpenAILike(
+                    model=ROUTER_MODEL_ID,
+                    api_base=ROUTER_LLM_ENDPOINT,
+                    api_key=ROUTER_API_KEY,
+                    # Chat completions : vLLM applique le chat template du modèle servi
+                    is_chat_model=True,
+                    temperature=0.0,
+                    max_tokens=ROUTER_MAX_TOKENS,
+                    timeout=ROUTER_TIMEOUT,
+                    max_retries=0,
+                    additional_kwargs=additional_kwargs,
+                )
+    return _router_llm
+
+
+__all__ = [
+    "ROUTER_JSON_SCHEMA",
+    "QueryRouter",
+    "QueryRouterResult",
+    "RouterExtractionCache",
+    "get_query_router",
+    "get_router_llm",
+]
@@ -1,8 +1,12 @@
 """Utilitaires pour le traitement des requêtes API."""
+from __future__ import annotations
+
 import re
-from typing import Any, List, Optional
+from typing import TYPE_CHECKING, Any, List, Optional
 from fastapi import HTTPException
-from llama_index.core.vector_stores.types import MetadataFilter, MetadataFilters
+
+if TYPE_CHECKING:  # LlamaIndex n'est chargé qu'avec le premier pipeline
+    from llama_index.core.vector_stores.types import MetadataFilter, MetadataFilters
 
 from llm_pipeline.models import QueryPayload, QueryResponse
 from llm_pipeline.config import DEFAULT_USE_RAG, BYPASS_AUTH
@@ -20,6 +24,8 @@ def normalize_filter_value(value: Optional[str]) -> str:
 
 def build_filters(payload: QueryPayload) -> MetadataFilters:
     """Construit les filtres de métadonnées à partir du payload."""
+    from llama_index.core.vector_stores.types import MetadataFilter, MetadataFilters
+
     filters: List[MetadataFilter] = []
     service = normalize_filter_value(payload.service)
     role = normalize_filter_value(payload.role)
@@ -0,0 +1,93 @@
+"""Profondeur de candidats adaptative et sortie anticipée du reranking.
+
+Par défaut le pipeline récupère ``top_k * 3`` candidats et les passe tous au
+CrossEncoder. En mode adaptatif (``RERANK_ADAPTIVE=true``) :
+
+- profondeur : quand le router a trouvé un filtre très spécifique (confiance
+  >= ``RERANK_CONFIDENT_ROUTER``, p. ex. ``ao_id`` + ``ao_doc_code``), seuls
+  ``top_k + RERANK_SHALLOW_MARGIN`` candidats sont récupérés et rerankés ;
+- sortie anticipée : le reranking est sauté quand il ne peut pas changer
+  l'ensemble du top-k (pas plus de ``top_k`` candidats) ou quand l'écart
+  relatif entre le k-ième et le (k+1)-ième score de retrieval dépasse
+  ``RERANK_SKIP_GAP``.
+
+:func:`rerank_path_counts` indique combien de fois chaque chemin a été pris
+(exporté sur ``/metrics`` sous ``rag_rerank_path_total``).
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, List
+
+from llm_pipeline.config import (
+    RERANK_ADAPTIVE,
+    RERANK_CONFIDENT_ROUTER,
+    RERANK_SHALLOW_MARGIN,
+    RERANK_SKIP_GAP,
+)
+from llm_pipeline.metrics import is_tracked, register_counter_source
+from llm_pipeline.query_router import QueryRouterResult
+
+RERANK_PATHS = ("full", "shallow", "skipped_few_candidates", "skipped_score_gap")
+
+_path_counts: Dict[str, int] = {path: 0 for path in RERANK_PATHS}
+_path_lock = threading.Lock()
+
+
+def record_rerank_path(path: str) -> None:
+    if not is_tracked():
+        return
+    with _path_lock:
+        _path_counts[path] = _path_counts.get(path, 0) + 1
+
+
+def rerank_path_counts() -> Dict[str, int]:
+    """Nombre de requêtes passées par chaque chemin de reranking depuis le démarrage."""
+    with _path_lock:
+        return dict(_path_counts)
+
+
+register_counter_source(
+    "rag_rerank_path_total", "Requêtes par chemin de reranking (adaptatif).", "path", rerank_path_counts
+)
+
+
+@dataclass(slots=True)
+class RerankPolicy:
+    """Choisit la profondeur de candidats et le chemin de reranking d'une requête."""
+
+    top_k: int
+    full_depth: int
+    adaptive: bool = RERANK_ADAPTIVE
+    confident_router: float = RERANK_CONFIDENT_ROUTER
+    shallow_margin: int = RERANK_SHALLOW_MARGIN
+    skip_gap: float = RERANK_SKIP_GAP
+
+    def candidate_depth(self, router_result: QueryRouterResult) -> int:
+        if self.adaptive and router_result.confidence >= self.confident_router:
+            return min(self.full_depth, self.top_k + max(0, self.shallow_margin))
+        return self.full_depth
+
+    def choose_path(self, nodes: List, depth: int) -> str:
+        if not self.adaptive:
+            return "full"
+        if len(nodes) <= self.top_k:
+            return "skipped_few_candidates"
+        scores = sorted((_score(node) for node in nodes), reverse=True)
+        head = abs(scores[0]) or 1e-9
+        if (scores[self.top_k - 1] - scores[self.top_k]) / head >= self.skip_gap:
+            return "skipped_score_gap"
+        return "shallow" if depth < self.full_depth else "full"
+
+
+def top_by_retrieval_score(nodes: List, top_k: int) -> List:
+    """Top-k selon le score de retrieval (utilisé quand le reranking est sauté)."""
+    return sorted(nodes, key=_score, reverse=True)[:top_k]
+
+
+def _score(node) -> float:
+    return float(getattr(node, "score", 0.0) or 0.0)
+
+
+__all__ = ["RERANK_PATHS", "RerankPolicy", "rerank_path_counts", "record_rerank_path", "top_by_retrieval_score"]
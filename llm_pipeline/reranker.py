@@ -1,8 +1,200 @@
 """Module de reranking pour le pipeline RAG."""
-from typing import List
-from sentence_transformers import CrossEncoder
+import hashlib
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
+from llm_pipeline.config import (
+    INFERENCE_BACKEND,
+    RERANK_BATCHING_ENABLED,
+    RERANK_BATCH_MAX_PAIRS,
+    RERANK_BATCH_MAX_WAIT_MS,
+    RERANK_SCORE_CACHE_SIZE,
+)
+from llm_pipeline.answer_cache import normalize_question
 from llm_pipeline.context_formatting import _extract_node_text
+from llm_pipeline.inference_backend import build_cross_encoder
+from llm_pipeline.model_registry import get_model_registry
+from llm_pipeline.elastic_client import ALL_SOURCES_STAMP
+from llm_pipeline.metrics import is_tracked
+from llm_pipeline.retrieval import node_id
+
+
+RERANKER_MODEL = "amberoad/bert-multilingual-passage-reranking-msmarco"
+
+
+@dataclass(slots=True)
+class _RerankJob:
+    pairs: List[List[str]]
+    future: Future
+
+
+class RerankBatcher:
+    """Regroupe les paires de requêtes concurrentes en micro-batches CrossEncoder.
+
+    Chaque appel à :meth:`score` dépose ses paires dans une file ; un thread
+    unique les accumule pendant au plus ``max_wait_ms`` (ou jusqu'à
+    ``max_batch_pairs`` paires) puis lance un seul ``predict`` et redistribue
+    les scores à chaque appelant.
+    """
+
+    def __init__(
+        self,
+        predict: Callable[[List[List[str]]], List[float]],
+        max_batch_pairs: int = 64,
+        max_wait_ms: float = 5.0,
+    ) -> None:
+        self._predict = predict
+        self.max_batch_pairs = max(1, max_batch_pairs)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[_RerankJob]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"batches": 0, "jobs": 0, "pairs": 0}
+
+    def score(self, pairs: List[List[str]]) -> List[float]:
+        """Retourne les scores de ``pairs`` (bloquant jusqu'au passage du batch)."""
+        job = _RerankJob(pairs=pairs, future=Future())
+        self._ensure_worker()
+        self._queue.put(job)
+        return job.future.result()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="rerank-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            jobs = [self._queue.get()]
+            size = len(jobs[0].pairs)
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_pairs:
+                remaining = deadline - time.monotonic()
+                try:
+                    job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                jobs.append(job)
+                size += len(job.pairs)
+            self._flush(jobs)
+
+    def _flush(self, jobs: List[_RerankJob]) -> None:
+        pairs = [pair for job in jobs for pair in job.pairs]
+        try:
+            scores = self._predict(pairs)
+        except Exception as exc:  # propagé à chaque appelant
+            for job in jobs:
+                job.future.set_exception(exc)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["jobs"] += len(jobs)
+        self.stats["pairs"] += len(pairs)
+        offset = 0
+        for job in jobs:
+            job.future.set_result(scores[offset:offset + len(job.pairs)])
+            offset += len(job.pairs)
+
+
+class RerankScoreCache:
+    """LRU des scores CrossEncoder indexé par (hash de la question normalisée, node_id).
+
+    Une question répétée, reformulée à la casse près ou rejouée entre
+    ``/v1/hybrid/search`` et ``/rag/query`` ne repasse que les chunks jamais
+    scorés. Chaque score garde la source du chunk pour être invalidé quand
+    l'indexeur la réindexe.
+    """
+
+    def __init__(self, max_entries: int = 8192) -> None:
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def query_key(question: str) -> str:
+        return hashlib.sha1(normalize_question(question).encode("utf-8")).hexdigest()
+
+    def get_many(self, query_key: str, node_ids: Iterable[str]) -> Dict[str, float]:
+        """Retourne les scores connus parmi ``node_ids``."""
+        if not is_tracked():
+            return {}
+        found: Dict[str, float] = {}
+        misses = 0
+        with self._lock:
+            for nid in node_ids:
+                entry = self._entries.get((query_key, nid))
+                if entry is None:
+                    misses += 1
+                    continue
+                self._entries.move_to_end((query_key, nid))
+                found[nid] = entry[0]
+            self.stats["hits"] += len(found)
+            self.stats["misses"] += misses
+        return found
+
+    def put_many(self, query_key: str, scored: Iterable[Tuple[str, str, float]]) -> None:
+        """Mémorise des triplets (node_id, source, score)."""
+        if not is_tracked():
+            return
+        with self._lock:
+            for nid, source, score in scored:
+                self._entries[(query_key, nid)] = (score, source)
+                self._entries.move_to_end((query_key, nid))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_sources(self, sources: Iterable[str]) -> int:
+        """Supprime les scores des chunks issus de ces sources (``"*"`` vide le cache)."""
+        targets = set(sources)
+        with self._lock:
+            if ALL_SOURCES_STAMP in targets:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                stale = [key for key, (_, source) in self._entries.items() if source in targets]
+                for key in stale:
+                    del self._entries[key]
+                removed = len(stale)
+            self.stats["invalidations"] += removed
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_score_cache: Optional[RerankScoreCache] = None
+_score_cache_lock = threading.Lock()
+
+
+def get_rerank_score_cache() -> Optional[RerankScoreCache]:
+    """Cache de scores partagé du processus, abonné aux tampons d'indexation (None si désactivé)."""
+    global _score_cache
+    if RERANK_SCORE_CACHE_SIZE <= 0:
+        return None
+    if _score_cache is None:
+        with _score_cache_lock:
+            if _score_cache is None:
+                from llm_pipeline.index_stamps import get_index_stamp_watcher
+
+                from llm_pipeline.metrics import register_counter_source
+
+                cache = RerankScoreCache(RERANK_SCORE_CACHE_SIZE)
+                get_index_stamp_watcher().subscribe(cache.invalidate_sources)
+                register_counter_source(
+                    "rag_rerank_score_cache_events_total", "Événements du cache de scores CrossEncoder.", "event",
+                    lambda: dict(cache.stats),
+                )
+                _score_cache = cache
+    return _score_cache
 
 
 class CrossEncoderReranker:
@@ -10,15 +202,26 @@ class CrossEncoderReranker:
     
     def __init__(
         self,
-        model_name: str = "amberoad/bert-multilingual-passage-reranking-msmarco",
+        model_name: str = RERANKER_MODEL,
         batch_size: int = 8,
+        batching: bool = RERANK_BATCHING_ENABLED,
+        score_cache: Optional[RerankScoreCache] = None,
+        cross_encoder=None,
     ):
-        self.cross_encoder = CrossEncoder(
-            model_name,
-            default_activation_function=None,
-            max_length=512,
-        )
+        # CrossEncoder PyTorch ou équivalent ONNX Runtime selon INFERENCE_BACKEND
+        # (celui du registre partagé pour le reranker de get_reranker)
+        self.cross_encoder = cross_encoder or build_cross_encoder(model_name, max_length=512)
         self.batch_size = batch_size
+        self.score_cache = score_cache
+        self.batcher = (
+            RerankBatcher(
+                self._predict_batch,
+                max_batch_pairs=RERANK_BATCH_MAX_PAIRS,
+                max_wait_ms=RERANK_BATCH_MAX_WAIT_MS,
+            )
+            if batching
+            else None
+        )
     
     def rerank(self, nodes: List, question: str, top_k: int) -> List:
         """Rerank nodes using cross-encoder scores."""
@@ -42,10 +245,55 @@ class CrossEncoderReranker:
         if not pairs:
             return nodes[:top_k]
         
-        # Get scores from cross-encoder
+        normalized_scores = self._score(query_text, pairs, filtered_nodes)
+        
+        # Sort by score and return top_k
+        ranked = sorted(
+            zip(normalized_scores, filtered_nodes),
+            key=lambda item: item[0],
+            reverse=True,
+        )
+        return [node for _, node in ranked[:top_k]]
+
+    def warm_up(self, question: str) -> None:
+        """Passe un mini-batch dans le modèle, hors cache et hors batcher (préchauffage)."""
+        self._predict([[question, question], [question, "Montant total HT du lot 1"]], batch_size=2)
+
+    def _score(self, query_text: str, pairs: List[List[str]], nodes: List) -> List[float]:
+        """Scores des paires, en ne passant au modèle que les chunks absents du cache."""
+        if self.score_cache is None:
+            return self._score_pairs(pairs)
+
+        query_key = self.score_cache.query_key(query_text)
+        node_ids = [node_id(node) for node in nodes]
+        known = self.score_cache.get_many(query_key, node_ids)
+        missing = [i for i, nid in enumerate(node_ids) if nid not in known]
+        if missing:
+            fresh = self._score_pairs([pairs[i] for i in missing])
+            self.score_cache.put_many(
+                query_key,
+                (
+                    (node_ids[i], str((getattr(nodes[i], "metadata", None) or {}).get("source", "")), score)
+                    for i, score in zip(missing, fresh)
+                ),
+            )
+            known.update((node_ids[i], score) for i, score in zip(missing, fresh))
+        return [known[nid] for nid in node_ids]
+
+    def _score_pairs(self, pairs: List[List[str]]) -> List[float]:
+        # Get scores from cross-encoder (coalesced with concurrent requests when batching)
+        if self.batcher is not None:
+            return self.batcher.score(pairs)
+        return self._predict(pairs, self.batch_size)
+
+    def _predict_batch(self, pairs: List[List[str]]) -> List[float]:
+        # Un micro-batch coalescé passe en un seul forward
+        return self._predict(pairs, max(self.batch_size, len(pairs)))
+
+    def _predict(self, pairs: List[List[str]], batch_size: int) -> List[float]:
         scores = self.cross_encoder.predict(
             pairs,
-            batch_size=self.batch_size,
+            batch_size=batch_size,
             show_progress_bar=False,
         )
         
@@ -64,11 +312,24 @@ class CrossEncoderReranker:
                     normalized_scores.append(float(value[0]))
             else:
                 normalized_scores.append(float(value))
-        
-        # Sort by score and return top_k
-        ranked = sorted(
-            zip(normalized_scores, filtered_nodes),
-            key=lambda item: item[0],
-            reverse=True,
-        )
-        return [node for _, node in ranked[:top_k]]
+        return normalized_scores
+
+
+_reranker: Optional[CrossEncoderReranker] = None
+_reranker_lock = threading.Lock()
+
+
+def get_reranker() -> CrossEncoderReranker:
+    """Reranker partagé par tous les pipelines du processus (CrossEncoder, batcher et cache communs)."""
+    global _reranker
+    if _reranker is None:
+        with _reranker_lock:
+            if _reranker is None:
+                cross_encoder = get_model_registry().get(
+                    f"cross_encoder:{RERANKER_MODEL}:{INFERENCE_BACKEND}",
+                    lambda: build_cross_encoder(RERANKER_MODEL, max_length=512),
+                )
+                _reranker = CrossEncoderReranker(
+                    RERANKER_MODEL, score_cache=get_rerank_score_cache(), cross_encoder=cross_encoder
+                )
+    return _reranker
@@ -1,20 +1,36 @@
+import asyncio
+import contextvars
+import logging
 import os
 import math
+import time
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from typing import List, Tuple, Dict, Any
 from llama_index.core.vector_stores.types import MetadataFilters
 from llama_index.core import QueryBundle
 
+from llm_pipeline.concurrency import get_io_executor
+from llm_pipeline.metrics import observe_stage, stage_timer
+
 # Import bm25_search directly
 try:
-    from llm_pipeline.elastic_client import bm25_search
+    from llm_pipeline.elastic_client import abm25_search, bm25_search
 except ImportError:
     bm25_search = None
 
+    async def abm25_search(*args, **kwargs) -> List[Dict[str, Any]]:
+        return []
+
+LOGGER = logging.getLogger(__name__)
+
 # Read env vars locally to ensure standalone functionality
 HYBRID_FUSION = os.getenv("HYBRID_FUSION", "rrf").strip().lower()
 HYBRID_WEIGHT_VECTOR = float(os.getenv("HYBRID_WEIGHT_VECTOR", "0.6"))
 HYBRID_WEIGHT_KEYWORD = float(os.getenv("HYBRID_WEIGHT_KEYWORD", "0.4"))
 HYBRID_BM25_TOP_K = int(os.getenv("HYBRID_BM25_TOP_K", "30"))
+# Budgets (secondes) de chaque branche de la recherche hybride
+HYBRID_DENSE_TIMEOUT = float(os.getenv("HYBRID_DENSE_TIMEOUT", "10"))
+HYBRID_BM25_TIMEOUT = float(os.getenv("HYBRID_BM25_TIMEOUT", "2"))
 
 
 def node_id(node) -> str:
@@ -52,36 +68,175 @@ def normalize_score_map(scores: Dict[str, float]) -> Dict[str, float]:
     return {k: (v - min_val) / (max_val - min_val) for k, v in scores.items()}
 
 
-def hybrid_query(pipeline, question: str, filters: MetadataFilters | None = None) -> Tuple[List, List[Dict[str, Any]]]:
+def hybrid_query(
+    pipeline,
+    question: str,
+    filters: MetadataFilters | None = None,
+    embedding: List[float] | None = None,
+    top_k: int | None = None,
+) -> Tuple[List, List[Dict[str, Any]]]:
     """Perform a hybrid retrieval (dense + BM25) and return nodes + hit metadata.
 
     *pipeline* is the existing ``RagPipeline`` instance – we need it to access the
-    ``index`` and configuration attributes (e.g., ``initial_top_k``).
+    ``index`` and configuration attributes (e.g., ``initial_top_k``). *top_k*
+    overrides ``initial_top_k`` as the candidate depth (adaptive reranking).
+
+    Les deux recherches tournent en parallèle sur le pool I/O partagé, chacune avec
+    son budget (``HYBRID_DENSE_TIMEOUT`` / ``HYBRID_BM25_TIMEOUT``, compté depuis le
+    lancement) : un Elasticsearch lent ou en erreur dégrade la réponse en dense seul
+    au lieu de la bloquer. Seule la branche BM25 se dégrade : une erreur de la
+    recherche dense remonte à l'appelant. Les durées et états par branche sont
+    exposés dans ``hit["timings"]``.
     """
+    filter_dict = metadata_filters_to_dict(filters)
+    depth = top_k or pipeline.initial_top_k
+    bm25_size = max(depth, HYBRID_BM25_TOP_K)
+    executor = get_io_executor()
+    started = time.perf_counter()
+
     # Dense retrieval via the vector store
-    retriever = pipeline.index.as_retriever(similarity_top_k=pipeline.initial_top_k, filters=filters)
-    query_bundle = QueryBundle(question)
-    vector_nodes = retriever.retrieve(query_bundle)
+    def dense_leg() -> List:
+        retriever = pipeline.index.as_retriever(similarity_top_k=depth, filters=filters)
+        return retriever.retrieve(QueryBundle(question, embedding=embedding))
+
+    # Chaque branche garde le contexte de la requête (identifiant de corrélation des logs)
+    dense_future = executor.submit(contextvars.copy_context().run, _timed_leg, dense_leg)
+    bm25_future = None
+    if bm25_search:
+        # Le délai client libère le thread du pool quand le budget est dépassé
+        bm25_future = executor.submit(
+            contextvars.copy_context().run,
+            _timed_leg,
+            lambda: bm25_search(
+                question, size=bm25_size, filters=filter_dict, timeout=HYBRID_BM25_TIMEOUT, raise_errors=True
+            ),
+        )
+
+    vector_nodes, dense_ms, dense_timed_out, _ = _wait_leg(dense_future, started, HYBRID_DENSE_TIMEOUT, "Vector")
+    bm25_hits, bm25_ms, bm25_timed_out, bm25_failed = _wait_leg(
+        bm25_future, started, HYBRID_BM25_TIMEOUT, "BM25", degrade=True
+    )
 
     # Debug output
-    print(f"DEBUG: Vector search returned {len(vector_nodes)} nodes", flush=True)
+    LOGGER.debug("Vector search returned %d nodes, BM25 search returned %d hits", len(vector_nodes), len(bm25_hits))
+
+    timings = _leg_timings(dense_ms, dense_timed_out, bm25_ms, bm25_timed_out, bm25_failed)
+    with stage_timer("fusion"):
+        return _fuse_results(pipeline, vector_nodes, bm25_hits, timings, depth)
+
+
+async def ahybrid_query(
+    pipeline,
+    question: str,
+    filters: MetadataFilters | None = None,
+    embedding: List[float] | None = None,
+    top_k: int | None = None,
+) -> Tuple[List, List[Dict[str, Any]]]:
+    """Variante asynchrone de :func:`hybrid_query` : les deux recherches partent en parallèle."""
+    filter_dict = metadata_filters_to_dict(filters)
+    depth = top_k or pipeline.initial_top_k
+    dense_leg = _atimed_leg(
+        pipeline.adense_retrieve(question, filters, depth, embedding=embedding),
+        HYBRID_DENSE_TIMEOUT,
+        "Vector",
+    )
+    bm25_leg = _atimed_leg(
+        abm25_search(
+            question,
+            size=max(depth, HYBRID_BM25_TOP_K),
+            filters=filter_dict,
+            timeout=HYBRID_BM25_TIMEOUT,
+            raise_errors=True,
+        ),
+        HYBRID_BM25_TIMEOUT,
+        "BM25",
+        degrade=True,
+    )
+    (vector_nodes, dense_ms, dense_timed_out, _), (bm25_hits, bm25_ms, bm25_timed_out, bm25_failed) = (
+        await asyncio.gather(dense_leg, bm25_leg)
+    )
+    LOGGER.debug("Vector search returned %d nodes, BM25 search returned %d hits", len(vector_nodes), len(bm25_hits))
+    timings = _leg_timings(dense_ms, dense_timed_out, bm25_ms, bm25_timed_out, bm25_failed)
+    with stage_timer("fusion"):
+        return _fuse_results(pipeline, vector_nodes, bm25_hits, timings, depth)
+
+
+def _timed_leg(func) -> Tuple[List, float]:
+    """Exécute une branche de recherche et mesure sa durée (ms)."""
+    start = time.perf_counter()
+    result = func() or []
+    return result, (time.perf_counter() - start) * 1000.0
+
+
+def _wait_leg(
+    future, started: float, budget: float, label: str, degrade: bool = False
+) -> Tuple[List, float | None, bool, bool]:
+    """Attend une branche dans la limite de son budget restant.
+
+    Retourne ``(résultats, durée_ms, hors_budget, en_erreur)``. Une erreur n'est
+    absorbée (liste vide) que pour une branche *degrade* ; sinon elle remonte.
+    """
+    if future is None:
+        return [], None, False, False
+    remaining = max(0.0, budget - (time.perf_counter() - started))
+    try:
+        result, elapsed_ms = future.result(timeout=remaining)
+    except FuturesTimeoutError:
+        LOGGER.warning("%s search exceeded its %.1fs budget, ignored", label, budget)
+        return [], None, True, False
+    except Exception as exc:
+        if not degrade:
+            raise
+        LOGGER.warning("%s search failed, ignored: %s", label, exc)
+        return [], None, False, True
+    return result, elapsed_ms, False, False
+
+
+async def _atimed_leg(
+    awaitable, budget: float, label: str, degrade: bool = False
+) -> Tuple[List, float | None, bool, bool]:
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(awaitable, timeout=budget)
+    except asyncio.TimeoutError:
+        LOGGER.warning("%s search exceeded its %.1fs budget, ignored", label, budget)
+        return [], None, True, False
+    except Exception as exc:
+        if not degrade:
+            raise
+        LOGGER.warning("%s search failed, ignored: %s", label, exc)
+        return [], None, False, True
+    return result or [], (time.perf_counter() - start) * 1000.0, False, False
+
+
+def _leg_timings(
+    dense_ms: float | None,
+    dense_timed_out: bool,
+    bm25_ms: float | None,
+    bm25_timed_out: bool,
+    bm25_failed: bool = False,
+) -> Dict[str, Any]:
+    # Observé sur le thread appelant : une branche hors budget n'a pas de durée
+    for stage, elapsed_ms in (("dense", dense_ms), ("bm25", bm25_ms)):
+        if elapsed_ms is not None:
+            observe_stage(stage, elapsed_ms / 1000.0)
+    return {
+        "dense_ms": round(dense_ms, 1) if dense_ms is not None else None,
+        "dense_timed_out": dense_timed_out,
+        "bm25_ms": round(bm25_ms, 1) if bm25_ms is not None else None,
+        "bm25_timed_out": bm25_timed_out,
+        "bm25_failed": bm25_failed,
+    }
 
-    # BM25 retrieval
-    bm25_hits = []
-    if bm25_search:
-        filter_dict = metadata_filters_to_dict(filters)
-            
-        try:
-            bm25_hits = bm25_search(
-                question, 
-                size=max(pipeline.initial_top_k, HYBRID_BM25_TOP_K), 
-                filters=filter_dict
-            )
-        except Exception as exc:
-            print(f"DEBUG: BM25 search failed: {exc}", flush=True)
-    
-    print(f"DEBUG: BM25 search returned {len(bm25_hits)} hits", flush=True)
 
+def _fuse_results(
+    pipeline,
+    vector_nodes: List,
+    bm25_hits: List[Dict[str, Any]],
+    timings: Dict[str, Any] | None = None,
+    top_k: int | None = None,
+) -> Tuple[List, List[Dict[str, Any]]]:
+    """Fusionne résultats denses et BM25 (RRF ou pondéré) en nodes + hits."""
     # Convert BM25 hits to nodes
     bm25_nodes = _build_bm25_nodes(bm25_hits)
 
@@ -121,7 +276,7 @@ def hybrid_query(pipeline, question: str, filters: MetadataFilters | None = None
     
     fused_nodes = []
     hits = []
-    for doc_id, score in sorted_ids[:pipeline.initial_top_k]:
+    for doc_id, score in sorted_ids[:top_k or pipeline.initial_top_k]:
         node = node_store.get(doc_id)
         if not node: continue
         setattr(node, "score", score)
@@ -134,7 +289,8 @@ def hybrid_query(pipeline, question: str, filters: MetadataFilters | None = None
             "score": score,
             "source": metadata.get("source"),
             "metadata": metadata,
-            "snippet": _extract_node_text(node)[:200]
+            "snippet": _extract_node_text(node)[:200],
+            "timings": timings or {},
         })
 
     return fused_nodes, hits
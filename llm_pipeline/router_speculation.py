@@ -0,0 +1,124 @@
+"""Retrieval spéculatif pendant l'appel LLM du router.
+
+Quand le :class:`~llm_pipeline.query_router.QueryRouter` doit interroger le LLM
+(aucun filtre regex, commune probable), le pipeline lance la recherche avec les
+filtres regex sans attendre sa réponse. Une fois les filtres définitifs connus :
+
+- ``kept`` : le LLM n'a rien changé, les résultats spéculatifs sont gardés ;
+- ``refined`` : le LLM a seulement resserré les filtres (clé ajoutée, liste
+  réduite) sur une recherche dense ; les résultats spéculatifs sont filtrés
+  localement. C'est exact tant qu'au moins ``depth`` candidats survivent : tout
+  candidat mieux classé satisfaisant les filtres figurait déjà parmi eux ;
+- ``requeried`` : sinon (filtre élargi, hybride dont la fusion RRF dépend des
+  rangs, trop peu de survivants), la recherche est relancée avec les filtres
+  définitifs.
+
+:func:`speculation_counts` est exporté sur ``/metrics`` sous
+``rag_router_speculation_total``.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from llm_pipeline.metrics import is_tracked, register_counter_source
+
+SPECULATION_OUTCOMES = ("kept", "refined", "requeried")
+
+_outcome_counts: Dict[str, int] = {outcome: 0 for outcome in SPECULATION_OUTCOMES}
+_outcome_lock = threading.Lock()
+
+
+def record_speculation(outcome: str) -> None:
+    if not is_tracked():
+        return
+    with _outcome_lock:
+        _outcome_counts[outcome] = _outcome_counts.get(outcome, 0) + 1
+
+
+def speculation_counts() -> Dict[str, int]:
+    """Nombre de recherches spéculatives par issue depuis le démarrage."""
+    with _outcome_lock:
+        return dict(_outcome_counts)
+
+
+register_counter_source(
+    "rag_router_speculation_total",
+    "Recherches lancées pendant l'appel LLM du router, par issue.",
+    "outcome",
+    speculation_counts,
+)
+
+
+def narrowed_filters(speculative: Mapping[str, Any], final: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+    """Filtres à appliquer en plus des filtres spéculatifs, ``None`` si ``final`` n'en est pas un resserrement.
+
+    Les valeurs vides (``""``, ``[]``, ``None``) sont ignorées et une valeur seule
+    équivaut à une liste d'un élément, comme pour les filtres envoyés à Qdrant.
+    """
+    speculative, final = _effective(speculative), _effective(final)
+    if any(key not in final for key in speculative):
+        return None
+    extra: Dict[str, Any] = {}
+    for key, value in final.items():
+        if key not in speculative:
+            extra[key] = value
+            continue
+        allowed, narrowed = _as_set(speculative[key]), _as_set(value)
+        if narrowed == allowed:
+            continue
+        if narrowed < allowed:
+            extra[key] = value
+            continue
+        return None
+    return extra
+
+
+def reuse_speculative(
+    nodes: List,
+    speculative_filters: Mapping[str, Any],
+    final_filters: Mapping[str, Any],
+    speculative_depth: int,
+    depth: int,
+    exact_filtering: bool,
+) -> Tuple[str, Optional[List]]:
+    """Issue de la spéculation et nodes réutilisables (``None`` = relancer la recherche)."""
+    if depth > speculative_depth:
+        return "requeried", None
+    extra = narrowed_filters(speculative_filters, final_filters)
+    if extra == {}:
+        return "kept", nodes
+    if extra is None or not exact_filtering:
+        return "requeried", None
+    survivors = [node for node in nodes if _matches(node.metadata or {}, extra)]
+    if len(survivors) < depth:
+        return "requeried", None
+    return "refined", survivors[:depth]
+
+
+def _matches(metadata: Mapping[str, Any], filters: Mapping[str, Any]) -> bool:
+    # Même sémantique que les MetadataFilter EQ / IN envoyés à Qdrant (payload liste : un élément suffit)
+    for key, value in filters.items():
+        if key not in metadata:
+            return False
+        if not _as_set(metadata[key]) & _as_set(value):
+            return False
+    return True
+
+
+def _effective(filters: Mapping[str, Any]) -> Dict[str, Any]:
+    """Filtres réellement envoyés à Qdrant : les valeurs vides y sont ignorées."""
+    return {key: value for key, value in filters.items() if value}
+
+
+def _as_set(value: Any) -> frozenset:
+    return frozenset(value) if isinstance(value, (list, tuple, set, frozenset)) else frozenset([value])
+
+
+__all__ = [
+    "SPECULATION_OUTCOMES",
+    "narrowed_filters",
+    "record_speculation",
+    "reuse_speculative",
+    "speculation_counts",
+]
@@ -0,0 +1,35 @@
+"""Exporte le reranker et l'encodeur MiniLM en ONNX (fp32 + int8 dynamique).
+
+Usage : ``python -m llm_pipeline.scripts.export_onnx [--no-quantize]``.
+Les modèles sont écrits dans ``ONNX_MODELS_DIR`` et utilisés par la Gateway et
+l'indexeur quand ``INFERENCE_BACKEND=onnx`` ou ``onnx-int8``.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from llm_pipeline.config import EMBEDDING_MODEL  # noqa: E402
+from llm_pipeline.inference_backend import export_onnx  # noqa: E402
+
+RERANKER_MODEL = os.getenv("HF_RERANKER_MODEL", "amberoad/bert-multilingual-passage-reranking-msmarco")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reranker-model", default=RERANKER_MODEL)
+    parser.add_argument("--embedding-model", default=EMBEDDING_MODEL)
+    parser.add_argument("--no-quantize", action="store_true", help="N'exporte que la variante fp32.")
+    args = parser.parse_args()
+
+    quantize = not args.no_quantize
+    for model_name, task in ((args.reranker_model, "cross-encoder"), (args.embedding_model, "embedding")):
+        output = export_onnx(model_name, task, quantize=quantize)
+        print(f"{model_name} -> {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Préchauffage de la Gateway au démarrage et état de disponibilité (``/readyz``).
+
+Sans préchauffage, la première requête après un déploiement paie le chargement
+de l'encodeur MiniLM et du CrossEncoder, l'ouverture des clients Qdrant et
+Elasticsearch et la première connexion à vLLM. Au démarrage,
+:class:`GatewayWarmup` :
+
+1. construit le pipeline de chaque modèle préchauffé (index, modèles partagés) ;
+2. fait passer une requête synthétique par le router, l'embedding, la recherche
+   dense, BM25 et la fusion (``return_hits_only``, donc sans cache de réponses) ;
+3. score un mini-batch avec le reranker ;
+4. demande un token au LLM.
+
+Tout le préchauffage s'exécute dans :func:`~llm_pipeline.metrics.untracked` :
+la requête synthétique n'alimente ni ``/metrics`` ni les caches.
+
+Une étape en échec est retentée (``WARMUP_RETRY_SECONDS``) ; les étapes
+réussies ne sont pas rejouées. ``/readyz`` répond 503 tant que tout n'est pas
+chaud, ou jusqu'à ``WARMUP_READY_TIMEOUT`` : la Gateway se déclare alors prête
+en mode dégradé plutôt que de rester indéfiniment hors du load balancer. Le
+mode dégradé ne couvre que les étapes non essentielles : tant que le
+chargement (``load``) d'un modèle échoue, la Gateway ne peut rien servir et
+reste à 503.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from starlette.concurrency import run_in_threadpool
+
+from llm_pipeline.concurrency import run_cpu_bound
+from llm_pipeline.metrics import untracked
+from llm_pipeline.config import (
+    MODEL_ENDPOINTS,
+    RAG_MODEL_ID,
+    WARMUP_ENABLED,
+    WARMUP_MODELS,
+    WARMUP_QUERY,
+    WARMUP_READY_TIMEOUT,
+    WARMUP_RETRY_SECONDS,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+PENDING = "pending"
+OK = "ok"
+# Étape sans laquelle un modèle ne peut servir aucune requête
+ESSENTIAL_STAGE = "load"
+
+
+def warmup_models(setting: str = WARMUP_MODELS) -> List[str]:
+    """Modèles à préchauffer d'après ``WARMUP_MODELS`` (``RAG_MODEL_ID`` si aucun n'est connu)."""
+    if not setting:
+        return [RAG_MODEL_ID]
+    if setting.lower() == "all":
+        return list(MODEL_ENDPOINTS)
+    names = [part.strip() for part in setting.split(",") if part.strip()]
+    unknown = [name for name in names if name not in MODEL_ENDPOINTS]
+    if unknown:
+        LOGGER.warning("WARMUP_MODELS names unknown models, ignored: %s", ", ".join(unknown))
+    models = [name for name in names if name in MODEL_ENDPOINTS]
+    if not models:
+        LOGGER.warning("No known model in WARMUP_MODELS, warming up %s", RAG_MODEL_ID)
+        return [RAG_MODEL_ID]
+    return models
+
+
+class GatewayWarmup:
+    """Exécute le préchauffage et expose l'état de disponibilité."""
+
+    def __init__(
+        self,
+        get_pipeline: Callable[[str], Any],
+        models: Sequence[str],
+        query: str = WARMUP_QUERY,
+        enabled: bool = WARMUP_ENABLED,
+        retry_seconds: float = WARMUP_RETRY_SECONDS,
+        ready_timeout: float = WARMUP_READY_TIMEOUT,
+    ) -> None:
+        self.get_pipeline = get_pipeline
+        self.models = list(models)
+        self.query = query
+        self.enabled = enabled
+        self.retry_seconds = retry_seconds
+        self.ready_timeout = ready_timeout
+        self.ready = not enabled
+        self.degraded = False
+        self.attempts = 0
+        self.duration: Optional[float] = None
+        # "<modèle>:<étape>" -> "pending" | "ok" | message d'erreur
+        self.stages: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Lance le préchauffage en tâche de fond (la Gateway répond déjà à ``/healthz``)."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        """Interrompt un préchauffage encore en cours (arrêt de la Gateway)."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+
+    async def run(self) -> None:
+        with untracked():
+            await self._run()
+
+    async def _run(self) -> None:
+        start = time.monotonic()
+        while True:
+            self.attempts += 1
+            for model in self.models:
+                await self._warm_model(model)
+            if all(status == OK for status in self.stages.values()):
+                break
+            if time.monotonic() - start >= self.ready_timeout:
+                if not self.essential_failures():
+                    self.degraded = True
+                    LOGGER.warning(
+                        "Warm-up incomplete after %.0fs, declaring ready: %s", self.ready_timeout, self.failures()
+                    )
+                    break
+                LOGGER.warning(
+                    "Model load still failing after %.0fs, staying unready: %s",
+                    self.ready_timeout,
+                    self.essential_failures(),
+                )
+            LOGGER.info("Warm-up attempt %d incomplete (%s), retrying", self.attempts, self.failures())
+            await asyncio.sleep(self.retry_seconds)
+        self.duration = time.monotonic() - start
+        self.ready = True
+        LOGGER.info("Gateway ready after %.1fs of warm-up", self.duration)
+
+    async def _warm_model(self, model: str) -> None:
+        if not await self._stage(model, "load", lambda: run_in_threadpool(self.get_pipeline, model)):
+            return
+        pipeline = await run_in_threadpool(self.get_pipeline, model)
+        await self._stage(
+            model, "retrieval", lambda: pipeline.aquery(self.query, use_hybrid=True, return_hits_only=True)
+        )
+        if pipeline.reranker is not None:
+            await self._stage(model, "rerank", lambda: run_cpu_bound(pipeline.reranker.warm_up, self.query))
+        await self._stage(model, "llm", lambda: pipeline.llm.acomplete("Bonjour", max_tokens=1))
+
+    async def _stage(self, model: str, stage: str, action: Callable[[], Awaitable[Any]]) -> bool:
+        key = f"{model}:{stage}"
+        if self.stages.get(key) == OK:
+            return True
+        self.stages[key] = PENDING
+        start = time.perf_counter()
+        try:
+            await action()
+        except Exception as exc:
+            self.stages[key] = f"{type(exc).__name__}: {exc}"
+            return False
+        self.stages[key] = OK
+        LOGGER.info("Warm-up %s done in %.2fs", key, time.perf_counter() - start)
+        return True
+
+    def failures(self) -> Dict[str, str]:
+        return {key: status for key, status in self.stages.items() if status not in (OK, PENDING)}
+
+    def essential_failures(self) -> Dict[str, str]:
+        """Échecs qui interdisent le mode dégradé (chargement d'un modèle)."""
+        return {key: status for key, status in self.failures().items() if key.endswith(f":{ESSENTIAL_STAGE}")}
+
+    def status(self) -> Dict[str, Any]:
+        """Corps de ``/readyz``."""
+        return {
+            "status": ("degraded" if self.degraded else "ready") if self.ready else "warming_up",
+            "attempts": self.attempts,
+            "duration_seconds": None if self.duration is None else round(self.duration, 1),
+            "stages": dict(self.stages),
+        }
+
+
+__all__ = ["GatewayWarmup", "warmup_models"]
@@ -0,0 +1,265 @@
+"""Benchmark du découpage Excel vectorisé face à l'implémentation ``iterrows``.
+
+Génère une feuille DQE synthétique (sections, lignes de prix, sous-totaux,
+cellules vides), vérifie que ``ExcelConnector`` et ``DQETotalExtractor``
+produisent exactement la même sortie que l'ancienne implémentation ligne à
+ligne, puis affiche les durées.
+
+Usage :
+    python scripts/bench_excel.py --rows 20000
+    python scripts/bench_excel.py --xlsx "/data/.../DQE.xlsx"
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.getcwd())
+
+from ingestion.config import ConnectorConfig, ExcelConnectorOptions
+from ingestion.connectors.excel import ExcelConnector
+from ingestion.insights import DQETotalExtractor
+from ingestion.sheet_cells import SheetCells
+
+CHUNK_SIZE = 50
+
+
+# --- Implémentation de référence (ligne à ligne) ---------------------------
+
+def _legacy_row_items(row: pd.Series, headers: list) -> List[str]:
+    row_lines = []
+    for col_name in headers:
+        value = row[col_name]
+        if pd.notna(value) and str(value).strip():
+            header_str = str(col_name)
+            is_unnamed = header_str.startswith("Unnamed")
+            val_str = str(value)
+            if isinstance(value, (int, float)):
+                try:
+                    if value > 999:
+                        space_fmt = f"{int(value):_}".replace("_", " ")
+                        val_str = f"{value} (lisible: {space_fmt})"
+                except Exception:
+                    pass
+            if not is_unnamed:
+                row_lines.append(f"{header_str}: {val_str}")
+            else:
+                row_lines.append(val_str)
+    return row_lines
+
+
+def legacy_global_total(dataframe: pd.DataFrame) -> str:
+    for idx in range(max(0, len(dataframe) - 5), len(dataframe)):
+        row = dataframe.iloc[idx]
+        row_text = " ".join([str(v) for v in row if pd.notna(v)]).lower()
+        if any(keyword in row_text for keyword in ["total", "montant total", "total général", "total ht", "total ttc"]):
+            for val in row:
+                if pd.notna(val) and isinstance(val, (int, float)) and val > 0:
+                    return f"{val:,.2f} EUR".replace(",", " ")
+    return ""
+
+
+def legacy_sections(dataframe: pd.DataFrame) -> list:
+    sections = []
+    current_section = None
+    for idx, row in dataframe.iterrows():
+        row_text = " ".join([str(v) for v in row if pd.notna(v)]).strip().lower()
+        non_empty = sum(1 for v in row if pd.notna(v) and str(v).strip())
+        is_section_header = (
+            non_empty <= 3 and
+            len(row_text) > 3 and
+            any(keyword in row_text for keyword in [
+                "section", "chapitre", "partie", "lot",
+                "fourniture", "main", "matériel", "travaux",
+                "sous-traitance", "prestation"
+            ])
+        )
+        is_subtotal = any(keyword in row_text for keyword in [
+            "sous-total", "sous total", "subtotal", "total partiel"
+        ])
+        if is_section_header:
+            if current_section:
+                current_section["end_row"] = idx - 1
+                sections.append(current_section)
+            current_section = {
+                "name": row_text.title(),
+                "start_row": idx,
+                "end_row": len(dataframe) - 1,
+                "total": None
+            }
+        elif is_subtotal and current_section:
+            for val in row:
+                if pd.notna(val) and isinstance(val, (int, float)) and val > 0:
+                    current_section["total"] = f"{val:,.2f} EUR".replace(",", " ")
+                    break
+    if current_section:
+        sections.append(current_section)
+    return sections
+
+
+def legacy_section_chunk(dataframe: pd.DataFrame, section: dict, sheet_name: str, global_total: str) -> str:
+    lines = [f"Sheet: {sheet_name}"]
+    if global_total:
+        lines.append(f"TOTAL GÉNÉRAL: {global_total}")
+    lines.append("")
+    lines.append(f"Section: {section['name']}")
+    lines.append(f"Rows {section['start_row'] + 1}-{section['end_row'] + 1}")
+    lines.append("")
+    headers = dataframe.columns.tolist()
+    for _, row in dataframe.iloc[section["start_row"]:section["end_row"] + 1].iterrows():
+        row_lines = _legacy_row_items(row, headers)
+        if row_lines:
+            lines.append(f"  • {', '.join(row_lines)}")
+    if section.get("total"):
+        lines.append("")
+        lines.append(f"SOUS-TOTAL {section['name']}: {section['total']}")
+    return "\n".join(lines) if len(lines) > 5 else ""
+
+
+def legacy_row_chunk(dataframe: pd.DataFrame, start_row: int, end_row: int, sheet_name: str, global_total: str) -> str:
+    lines = [f"Sheet: {sheet_name}"]
+    if global_total:
+        lines.append(f"TOTAL GÉNÉRAL: {global_total}")
+    lines.append(f"Rows {start_row + 1}-{end_row} of {len(dataframe)}")
+    lines.append("")
+    headers = dataframe.columns.tolist()
+    for row_idx, row in dataframe.iloc[start_row:end_row].iterrows():
+        row_lines = _legacy_row_items(row, headers)
+        if row_lines:
+            lines.append(f"Row {row_idx + 1}:")
+            lines.extend([f"  - {line}" for line in row_lines])
+            lines.append("")
+    return "\n".join(lines) if len(lines) > 3 else ""
+
+
+def legacy_dqe_totals(dataframe: pd.DataFrame) -> List[tuple]:
+    totals = []
+    for row_idx, row in dataframe.iterrows():
+        labels = [str(cell).strip().lower() for cell in row if pd.notna(cell)]
+        if not labels:
+            continue
+        if any("total" in label for label in labels):
+            numeric_values = [
+                float(cell)
+                for cell in row
+                if isinstance(cell, (int, float)) and pd.notna(cell) and abs(cell) > 0
+            ]
+            if not numeric_values:
+                continue
+            totals.append((str(row_idx), max(numeric_values, key=abs)))
+    return totals
+
+
+# --- Chaînes complètes ------------------------------------------------------
+
+def legacy_chunks(dataframe: pd.DataFrame, sheet_name: str) -> List[str]:
+    global_total = legacy_global_total(dataframe)
+    sections = legacy_sections(dataframe)
+    if sections:
+        return [legacy_section_chunk(dataframe, section, sheet_name, global_total) for section in sections]
+    return [
+        legacy_row_chunk(dataframe, start, min(start + CHUNK_SIZE, len(dataframe)), sheet_name, global_total)
+        for start in range(0, len(dataframe), CHUNK_SIZE)
+    ]
+
+
+def vectorized_chunks(connector: ExcelConnector, dataframe: pd.DataFrame, sheet_name: str) -> List[str]:
+    cells = SheetCells(dataframe)
+    row_texts = cells.row_texts()
+    global_total = connector._extract_global_total(cells, row_texts, sheet_name)
+    sections = connector._detect_sections(cells, row_texts)
+    if sections:
+        return [connector._format_section_chunk(cells, section, sheet_name, global_total) for section in sections]
+    return [
+        connector._format_row_chunk(cells, start, min(start + CHUNK_SIZE, len(dataframe)), sheet_name, global_total)
+        for start in range(0, len(dataframe), CHUNK_SIZE)
+    ]
+
+
+def vectorized_dqe_totals(dataframe: pd.DataFrame) -> List[tuple]:
+    insights = DQETotalExtractor()._extract_from_sheet(Path("bench.xlsx"), "DQE", dataframe)
+    return [(insight.metadata["row_index"], insight.value) for insight in insights]
+
+
+# --- Données synthétiques ---------------------------------------------------
+
+def synthetic_dqe(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Feuille DQE : titres de lots, lignes de prix, sous-totaux, total général."""
+    rng = np.random.default_rng(seed)
+    records: List[Dict[str, object]] = []
+    lot = 0
+    while len(records) < rows - 1:
+        lot += 1
+        records.append({"Code": None, "Désignation": f"LOT {lot} - TRAVAUX DE VOIRIE"})
+        subtotal = 0.0
+        for line in range(int(rng.integers(5, 40))):
+            quantity = float(rng.integers(1, 500))
+            unit_price = round(float(rng.uniform(0.5, 3000)), 2)
+            amount = round(quantity * unit_price, 2)
+            subtotal += amount
+            records.append({
+                "Code": f"{lot}.{line + 1}",
+                "Désignation": f"Prestation {lot}.{line + 1}   " if line % 7 == 0 else f"Article {line + 1}",
+                "Unité": rng.choice(["m²", "ml", "u", "ens", None]),
+                "Quantité": quantity,
+                "PU HT": unit_price,
+                "Montant HT": amount if line % 11 else None,
+                "Unnamed: 6": "  " if line % 13 == 0 else None,
+            })
+        records.append({"Désignation": f"Sous-total lot {lot}", "Montant HT": round(subtotal, 2)})
+    records.append({"Désignation": "TOTAL GÉNÉRAL HT", "Montant HT": 1234567.89})
+    return pd.DataFrame.from_records(records)
+
+
+# --- Exécution --------------------------------------------------------------
+
+def _timed(label: str, func: Callable[[], object], repeat: int) -> tuple:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<28} {best * 1000:10.1f} ms")
+    return result, best
+
+
+def run(frames: Dict[str, pd.DataFrame], repeat: int) -> None:
+    connector = ExcelConnector(ConnectorConfig(enabled=True), ExcelConnectorOptions())
+    for sheet_name, dataframe in frames.items():
+        print(f"\n{sheet_name}: {len(dataframe)} lignes x {len(dataframe.columns)} colonnes")
+        legacy, legacy_time = _timed("chunks iterrows", lambda: legacy_chunks(dataframe, sheet_name), repeat)
+        fast, fast_time = _timed("chunks vectorisés", lambda: vectorized_chunks(connector, dataframe, sheet_name), repeat)
+        assert legacy == fast, "sortie des chunks différente"
+        print(f"{'gain':<28} {legacy_time / fast_time:10.1f} x")
+
+        raw = dataframe.T.reset_index().T.reset_index(drop=True)  # comme header=None
+        legacy, legacy_time = _timed("totaux DQE iterrows", lambda: legacy_dqe_totals(raw), repeat)
+        fast, fast_time = _timed("totaux DQE vectorisés", lambda: vectorized_dqe_totals(raw), repeat)
+        assert legacy == fast, "totaux DQE différents"
+        print(f"{'gain':<28} {legacy_time / fast_time:10.1f} x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="Lignes de la feuille synthétique")
+    parser.add_argument("--xlsx", type=Path, help="Classeur réel à utiliser à la place")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.xlsx:
+        frames = pd.read_excel(args.xlsx, sheet_name=None)
+    else:
+        frames = {"DQE synthétique": synthetic_dqe(args.rows)}
+    run(frames, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,34 +6,8 @@ from pathlib import Path
 sys.path.append(os.getcwd())
 
 from ingestion.pipeline import IngestionPipeline, IngestionConfig
-from indexation.qdrant_indexer import QdrantIndexer
-from llm_pipeline.elastic_client import index_document as es_index_document
-from llama_index.core import Document
-
-def _build_documents(chunks):
-    return [
-        Document(text=chunk.text, metadata=dict(chunk.metadata), doc_id=chunk.id)
-        for chunk in chunks
-        if chunk.text.strip()
-    ]
-
-def _build_es_body(chunk) -> dict:
-    metadata = dict(chunk.metadata)
-    metadata.pop("content", None)
-    body = {
-        "content": chunk.text,
-    }
-    for key in ("source", "service", "role", "doc_hint", "chunk_index", "page"):
-        if key in metadata:
-            body[key] = metadata[key]
-    for key, value in metadata.items():
-        if key in body:
-            continue
-        try:
-            body[key] = value
-        except Exception:
-            body[key] = str(value)
-    return body
+from indexation.qdrant_indexer import QdrantIndexer, index_stream
+from llm_pipeline.elastic_client import record_index_stamps
 
 # Files to re-ingest
 FILES = [
@@ -77,32 +51,24 @@ def main():
     # Run pipeline
     print("Running ingestion pipeline...")
     pipeline = IngestionPipeline(ingestion_config)
-    chunks = list(pipeline.run())
-    print(f"Generated {len(chunks)} chunks.")
-    
-    if not chunks:
+    indexer = QdrantIndexer(qdrant_url="http://qdrant:6333")
+    print("Indexing into Qdrant and Elasticsearch...")
+    report = index_stream(pipeline.run(), indexer)
+    print(f"Generated {report.chunks} chunks.")
+
+    if not report.chunks:
         print("No chunks generated.")
         return
 
-    # Index Qdrant
-    print("Indexing into Qdrant...")
-    documents = _build_documents(chunks)
-    indexer = QdrantIndexer(qdrant_url="http://qdrant:6333")
-    indexer.index_documents(documents)
-    print("Qdrant indexing complete.")
+    print(f"Qdrant indexing complete ({report.documents} documents, {report.batches} batch(es)).")
+    if report.elastic.failed_ids:
+        print(f"Rejected by ES: {', '.join(report.elastic.failed_ids)}")
+    for error in report.elastic.errors:
+        print(f"  {error}")
+    print(f"Elasticsearch indexing complete. Indexed: {report.elastic.indexed}, failures: {report.elastic.failed}")
 
-    # Index Elasticsearch
-    print("Indexing into Elasticsearch...")
-    failures = 0
-    for chunk in chunks:
-        body = _build_es_body(chunk)
-        try:
-            es_index_document(str(chunk.id), body=body)
-        except Exception as e:
-            print(f"Error indexing {chunk.id} in ES: {e}")
-            failures += 1
-    
-    print(f"Elasticsearch indexing complete. Failures: {failures}")
+    # Invalide les réponses en cache côté Gateway pour ces fichiers
+    record_index_stamps(str(p) for p in valid_paths)
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,83 @@
+"""Tests pour le cache de réponses."""
+import time
+
+from llm_pipeline.answer_cache import AnswerCache, CachedAnswer, cache_scope, normalize_question, retrieval_degraded
+
+
+def _answer(source="/data/dqe.xlsx"):
+    return CachedAnswer(answer="42 EUR", citations=[{"source": source, "chunk": 0}], hits=None)
+
+
+def test_normalize_question():
+    assert normalize_question("  Quel est le PRIX  du BPU ?") == "quel est le prix du bpu"
+
+
+def test_exact_hit_ignores_case_and_punctuation():
+    cache = AnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=1.0)
+    scope = cache_scope("mistral", None, True, "question_chiffree")
+    cache.put("Quel est le prix ?", scope, _answer())
+    assert cache.get("quel est le prix", scope).answer == "42 EUR"
+    assert cache.get("quel est le prix", cache_scope("phi3-mini", None, True, "question_chiffree")) is None
+
+
+def test_semantic_hit_requires_similar_embedding():
+    cache = AnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.9)
+    scope = cache_scope("mistral", None, False, "autre")
+    cache.put("question A", scope, _answer(), embedding=[1.0, 0.0])
+    assert cache.get("question B", scope, embedding=[0.99, 0.05]) is not None
+    assert cache.get("question C", scope, embedding=[0.0, 1.0]) is None
+    assert cache.stats["semantic_hits"] == 1
+
+
+def test_semantic_hit_requires_same_numbers():
+    cache = AnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.9)
+    scope = cache_scope("mistral", None, False, "question_chiffree")
+    cache.put("Montant du DQE du lot 1", scope, _answer(), embedding=[1.0, 0.0])
+    assert cache.get("Montant du DQE du lot 2", scope, embedding=[1.0, 0.0]) is None
+    assert cache.get("Quel est le montant du DQE pour le lot 1", scope, embedding=[0.99, 0.05]) is not None
+
+
+def test_semantic_scan_is_bounded_to_recent_entries():
+    cache = AnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.9, semantic_scan=1)
+    scope = cache_scope("mistral", None, False, "autre")
+    cache.put("question A", scope, _answer(), embedding=[1.0, 0.0])
+    cache.put("question B", scope, _answer(), embedding=[0.0, 1.0])
+    assert cache.get("question C", scope, embedding=[1.0, 0.0]) is None
+
+
+def test_semantic_tier_is_opt_in():
+    assert not AnswerCache().semantic_enabled
+
+
+def test_ttl_and_lru_eviction():
+    cache = AnswerCache(max_entries=2, ttl_seconds=0.01, similarity_threshold=1.0)
+    cache.put("a", "s", _answer())
+    time.sleep(0.02)
+    assert cache.get("a", "s") is None
+
+    cache = AnswerCache(max_entries=2, ttl_seconds=60, similarity_threshold=1.0)
+    cache.put("a", "s", _answer())
+    cache.put("b", "s", _answer())
+    cache.get("a", "s")
+    cache.put("c", "s", _answer())
+    assert cache.get("b", "s") is None
+    assert cache.get("a", "s") is not None
+
+
+def test_invalidate_sources():
+    cache = AnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=1.0)
+    cache.put("a", "s", _answer("/data/a.xlsx"))
+    cache.put("b", "s", _answer("/data/b.xlsx"))
+    assert cache.invalidate_sources({"/data/a.xlsx"}) == 1
+    assert cache.get("a", "s") is None
+    assert cache.get("b", "s") is not None
+    cache.invalidate_sources({"*"})
+    assert len(cache) == 0
+
+
+def test_retrieval_degraded_flags_slow_or_failed_legs():
+    healthy = {"dense_ms": 12.0, "dense_timed_out": False, "bm25_ms": 8.0, "bm25_timed_out": False}
+    assert not retrieval_degraded(None)
+    assert not retrieval_degraded([{"timings": healthy}, {"timings": {}}])
+    assert retrieval_degraded([{"timings": dict(healthy, bm25_ms=None, bm25_timed_out=True)}])
+    assert retrieval_degraded([{"timings": dict(healthy, bm25_failed=True)}])
@@ -0,0 +1,40 @@
+"""Tests du format SSE renvoyé par /v1/chat/completions en mode stream."""
+import asyncio
+import json
+
+from llm_pipeline.api import _sse_chat_events
+from llm_pipeline.pipeline import RagStreamResult
+
+
+async def _tokens(*parts):
+    for part in parts:
+        yield part
+
+
+def _collect(stream):
+    async def run():
+        return [event async for event in _sse_chat_events(stream, "mistral")]
+
+    return asyncio.run(run())
+
+
+def test_sse_events_stream_tokens_then_sources():
+    citations = [{"source": "/data/doc.pdf", "chunk": 0, "snippet": "extrait"}]
+    events = _collect(RagStreamResult(tokens=_tokens("Bon", "jour"), citations=citations))
+
+    assert events[-1] == "data: [DONE]\n\n"
+    payloads = [json.loads(event[len("data: "):]) for event in events[:-1]]
+    assert payloads[0]["choices"][0]["delta"]["role"] == "assistant"
+    assert "".join(p["choices"][0]["delta"].get("content", "") for p in payloads) == "Bonjour"
+    assert all(p["object"] == "chat.completion.chunk" for p in payloads)
+    assert payloads[-1]["choices"][0]["finish_reason"] == "stop"
+    assert payloads[-1]["sources"]
+
+
+def test_sse_events_hide_sources_when_unavailable():
+    citations = [{"source": "/data/doc.pdf", "chunk": 0, "snippet": "extrait"}]
+    stream = RagStreamResult.from_answer("Non disponible dans les documents.", citations)
+    events = _collect(stream)
+
+    last = json.loads(events[-2][len("data: "):])
+    assert "sources" not in last
@@ -0,0 +1,110 @@
+"""Tests pour le parcours unique de l'arborescence d'ingestion."""
+from pathlib import Path
+
+from ingestion import discovery
+from ingestion.config import ConnectorConfig, ExcelConnectorOptions
+from ingestion.connectors.docx import DocxConnector
+from ingestion.connectors.excel import ExcelConnector
+from ingestion.connectors.pdf import PDFConnector
+from ingestion.connectors.text import TextConnector
+from ingestion.metadata_utils import should_exclude_path
+
+FILES = [
+    "AO/ED1 - Reims - Voirie/01-DCE/RC.pdf",
+    "AO/ED1 - Reims - Voirie/01-DCE/CCTP.docx",
+    "AO/ED1 - Reims - Voirie/01-DCE/~$CCTP.docx",
+    "AO/ED1 - Reims - Voirie/05-Etude/DQE.xlsx",
+    "AO/ED1 - Reims - Voirie/05-Etude/ancien.xls",
+    "AO/ED1 - Reims - Voirie/Sauvegarde/DQE.xlsx",
+    "AO/ED1 - Reims - Voirie/archives/notes.txt",
+    "AO/ED1 - Reims - Voirie/archives/photo.png",
+    "lisezmoi.txt",
+    "backup/vieux.pdf",
+]
+
+
+def _tree(root: Path) -> None:
+    for relative in FILES:
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x", encoding="utf-8")
+
+
+def _connectors(root: Path, txt_recursive: bool = True):
+    config = lambda **kw: ConnectorConfig(enabled=True, paths=[root], **kw)  # noqa: E731
+    return [
+        TextConnector(config(recursive=txt_recursive, extra={"excluded_keywords": ["archives"]}), 1200, 200),
+        DocxConnector(config()),
+        PDFConnector(config()),
+        ExcelConnector(config(), ExcelConnectorOptions()),
+    ]
+
+
+def _legacy_discover(connector, root: Path):
+    """Découverte historique : un rglob par extension puis should_exclude_path."""
+    found = set()
+    for ext in connector.extensions:
+        iterator = root.rglob(f"*{ext}") if connector.config.recursive else root.glob(f"*{ext}")
+        for path in iterator:
+            if connector.accepts(path) and not should_exclude_path(path, connector.config):
+                found.add(path)
+    return found
+
+
+def test_single_walk_matches_legacy_discovery(tmp_path, monkeypatch):
+    _tree(tmp_path)
+    scanned = []
+    real_entries = discovery._sorted_entries
+    monkeypatch.setattr(discovery, "_sorted_entries", lambda path: scanned.append(path) or real_entries(path))
+
+    connectors = _connectors(tmp_path, txt_recursive=False)
+    found = list(discovery.discover_files(connectors))
+
+    for connector in connectors:
+        assert {path for owner, path in found if owner is connector} == _legacy_discover(connector, tmp_path)
+    # chaque dossier au plus une fois, dossiers exclus pour tous non parcourus
+    assert len(scanned) == len(set(scanned))
+    assert tmp_path / "backup" not in scanned
+    assert tmp_path / "AO/ED1 - Reims - Voirie/Sauvegarde" not in scanned
+    # ordre déterministe
+    assert found == list(discovery.discover_files(connectors))
+
+
+def test_connector_discover_uses_shared_walker(tmp_path):
+    _tree(tmp_path)
+    docx = _connectors(tmp_path)[1]
+    assert [p.name for p in docx.discover()] == ["CCTP.docx"]
+
+
+def test_symlinked_directories_are_not_followed(tmp_path):
+    _tree(tmp_path)
+    dce = tmp_path / "AO/ED1 - Reims - Voirie/01-DCE"
+    (dce / "boucle").symlink_to(tmp_path, target_is_directory=True)
+    (tmp_path / "lien.pdf").symlink_to(dce / "RC.pdf")
+
+    connectors = _connectors(tmp_path)
+    found = list(discovery.discover_files(connectors))
+    discovery.clear_listing_cache()
+    listed = discovery.list_files(tmp_path)
+    discovery.clear_listing_cache()
+
+    assert not any("boucle" in path.parts for _, path in found)
+    assert not any("boucle" in path.parts for path in listed)
+    assert tmp_path / "lien.pdf" in {path for _, path in found}
+    assert {path for owner, path in found if owner is connectors[2]} == _legacy_discover(connectors[2], tmp_path)
+
+
+def test_list_files_is_cached(tmp_path, monkeypatch):
+    _tree(tmp_path)
+    discovery.clear_listing_cache()
+    first = discovery.list_files(tmp_path)
+
+    def rescan(path):
+        raise AssertionError(f"rescan de {path}")
+
+    monkeypatch.setattr(discovery, "_sorted_entries", rescan)
+
+    assert discovery.list_files(tmp_path) is first
+    assert len(first) == len(FILES)
+    assert list(discovery.iter_files([tmp_path, str(tmp_path)])) == list(first)
+    discovery.clear_listing_cache()
@@ -0,0 +1,80 @@
+"""Tests pour l'indexation Elasticsearch en masse."""
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("elasticsearch")
+
+from elasticsearch import helpers  # noqa: E402
+
+from llm_pipeline import elastic_client  # noqa: E402
+
+
+def test_bulk_index_reports_rejected_documents(monkeypatch):
+    client = MagicMock()
+    client.indices.get_settings.return_value = {}
+    monkeypatch.setattr(elastic_client, "_get_client", lambda: client)
+
+    def fake_streaming_bulk(es, actions, chunk_size, **kwargs):
+        for action in actions:
+            ok = action["_id"] not in {"c3", "c4"}
+            yield ok, {"index": {"_id": action["_id"], "error": None if ok else "mapper_parsing_exception"}}
+
+    monkeypatch.setattr(helpers, "streaming_bulk", fake_streaming_bulk)
+
+    docs = ((f"c{i}", {"content": f"texte {i}"}) for i in range(6))
+    report = elastic_client.bulk_index_documents(docs, chunk_size=2, thread_count=1, max_errors=1)
+
+    assert report.indexed == 4
+    assert report.failed == 2
+    assert report.failed_ids == ["c3", "c4"]
+    assert len(report.errors) == 1
+    client.options.assert_called_once_with(ignore_status=400)
+    # refresh suspendu pendant le chargement puis rétabli
+    settings = [call.kwargs["body"]["index"]["refresh_interval"] for call in client.indices.put_settings.call_args_list]
+    assert settings == ["-1", None]
+    client.indices.refresh.assert_called_once()
+
+
+def test_bulk_index_without_client(monkeypatch):
+    monkeypatch.setattr(elastic_client, "_get_client", lambda: None)
+    report = elastic_client.bulk_index_documents([("c1", {})])
+    assert report.skipped and report.indexed == 0
+
+
+def test_bulk_index_batches_share_refresh_suspension(monkeypatch):
+    client = MagicMock()
+    client.indices.get_settings.return_value = {}
+    monkeypatch.setattr(elastic_client, "_get_client", lambda: client)
+
+    def fake_streaming_bulk(es, actions, chunk_size, **kwargs):
+        for action in actions:
+            ok = action["_id"] != "c5"
+            yield ok, {"index": {"_id": action["_id"]}}
+
+    monkeypatch.setattr(helpers, "streaming_bulk", fake_streaming_bulk)
+
+    total = elastic_client.BulkIndexReport()
+    with elastic_client.bulk_loading():
+        for offset in (0, 3):
+            docs = [(f"c{i}", {}) for i in range(offset, offset + 3)]
+            total.merge(elastic_client.bulk_index_documents(docs, chunk_size=2, thread_count=1, suspend_refresh=False))
+
+    assert (total.indexed, total.failed) == (5, 1)
+    assert total.failed_ids == ["c5"]
+    assert client.indices.put_settings.call_count == 2
+    client.indices.refresh.assert_called_once()
+
+
+def test_delete_documents_ignores_missing_ids(monkeypatch):
+    monkeypatch.setattr(elastic_client, "_get_client", lambda: MagicMock())
+
+    def fake_streaming_bulk(es, actions, chunk_size, **kwargs):
+        for action in actions:
+            assert action["_op_type"] == "delete"
+            found = action["_id"] != "absent"
+            yield found, {"delete": {"_id": action["_id"], "status": 200 if found else 404}}
+
+    monkeypatch.setattr(helpers, "streaming_bulk", fake_streaming_bulk)
+
+    assert elastic_client.delete_documents(["c1", "absent", "c2"]) == 2
@@ -0,0 +1,50 @@
+"""Tests pour le cache d'embeddings de questions."""
+import asyncio
+from typing import List
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+
+from llm_pipeline.embedding_cache import CachedEmbedding
+
+
+class CountingEmbedding(BaseEmbedding):
+    calls: int = 0
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CountingEmbedding"
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        self.calls += 1
+        return [float(len(query)), 1.0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return [float(len(text)), 0.0]
+
+
+def test_query_embedding_is_cached():
+    inner = CountingEmbedding(model_name="fake")
+    cached = CachedEmbedding(inner, max_entries=2)
+    assert cached.get_query_embedding("prix du lot 2") == [13.0, 1.0]
+    assert cached.get_query_embedding("prix  du lot 2 ") == [13.0, 1.0]
+    assert asyncio.run(cached.aget_query_embedding("prix du lot 2")) == [13.0, 1.0]
+    assert inner.calls == 1
+    assert cached.stats == {"hits": 2, "disk_hits": 0, "misses": 1}
+
+
+def test_lru_eviction_and_disk_tier(tmp_path):
+    db = tmp_path / "embeddings.sqlite"
+    inner = CountingEmbedding(model_name="fake")
+    cached = CachedEmbedding(inner, max_entries=1, disk_path=str(db))
+    cached.get_query_embedding("a")
+    cached.get_query_embedding("bb")
+    cached.get_query_embedding("a")
+    assert inner.calls == 2
+    assert cached.stats["disk_hits"] == 1
+
+    restarted = CachedEmbedding(CountingEmbedding(model_name="fake"), max_entries=4, disk_path=str(db))
+    assert restarted.get_query_embedding("bb") == [2.0, 1.0]
+    assert restarted.inner.calls == 0
@@ -0,0 +1,63 @@
+"""Import à froid de la Gateway (``python -X importtime``).
+
+On vérifie les modules chargés, puis une durée : le coût propre de l'API, hors
+FastAPI mesuré dans le même import, doit rester sous ``GATEWAY_IMPORT_BUDGET``
+secondes (généreux par défaut, ajustable sur une CI lente).
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+ROOT = Path(__file__).resolve().parents[1]
+IMPORT_BUDGET_SECONDS = float(os.getenv("GATEWAY_IMPORT_BUDGET", "2"))
+
+# Chargés à la construction du premier pipeline, jamais à l'import de l'API
+HEAVY_PACKAGES = {
+    "elasticsearch",
+    "llama_index",
+    "mariadb",
+    "openai",
+    "qdrant_client",
+    "sentence_transformers",
+    "torch",
+    "transformers",
+}
+
+
+def _import_times(module: str) -> dict:
+    """Temps cumulé (µs) de chaque module importé par ``import module``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times.setdefault(name.strip(), int(cumulative))
+    return times
+
+
+def test_api_import_defers_heavy_dependencies():
+    times = _import_times("llm_pipeline.api")
+
+    assert "llm_pipeline.api" in times
+    assert not {name.split(".")[0] for name in times} & HEAVY_PACKAGES
+
+
+def test_api_import_time_within_budget():
+    times = _import_times("llm_pipeline.api")
+
+    # FastAPI/pydantic servent de référence : leur coût varie avec la machine
+    own_seconds = (times["llm_pipeline.api"] - times.get("fastapi", 0)) / 1e6
+    assert own_seconds < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,36 @@
+"""Tests du watcher de tampons d'indexation."""
+from llm_pipeline import elastic_client
+from llm_pipeline.index_stamps import IndexStampWatcher
+
+
+def test_watcher_starts_from_latest_stamp_in_index(monkeypatch):
+    since = []
+    monkeypatch.setattr(elastic_client, "latest_index_stamp", lambda: 1_700_000_000_123)
+    monkeypatch.setattr(elastic_client, "fetch_index_stamps", lambda last: since.append(last) or [])
+    watcher = IndexStampWatcher(poll_seconds=0)
+
+    assert watcher.poll_once() == set()  # premier passage : calage sur l'index
+    assert watcher.poll_once() == set()
+    assert since == [1_700_000_000_123]
+
+
+def test_new_stamps_are_notified_once(monkeypatch):
+    stamps = [
+        {"source": "a.pdf", "indexed_at": 1_700_000_000_500},
+        {"source": "b.xlsx", "indexed_at": 1_700_000_000_900},
+    ]
+    since = []
+    monkeypatch.setattr(elastic_client, "latest_index_stamp", lambda: 1_700_000_000_000)
+    monkeypatch.setattr(
+        elastic_client,
+        "fetch_index_stamps",
+        lambda last: since.append(last) or [s for s in stamps if s["indexed_at"] > last],
+    )
+    watcher = IndexStampWatcher(poll_seconds=0)
+    notified = []
+    watcher.subscribe(notified.append)
+
+    assert watcher.poll_once() == {"a.pdf", "b.xlsx"}
+    assert watcher.poll_once() == set()
+    assert notified == [{"a.pdf", "b.xlsx"}]
+    assert since == [1_700_000_000_000, 1_700_000_000_900]
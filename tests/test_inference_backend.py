@@ -0,0 +1,60 @@
+"""Parité du backend ONNX (int8) avec les modèles PyTorch."""
+import pytest
+
+pytest.importorskip("optimum.onnxruntime")
+pytest.importorskip("sentence_transformers")
+
+from llm_pipeline import inference_backend  # noqa: E402
+from llm_pipeline.inference_backend import build_cross_encoder, build_embedding, export_onnx  # noqa: E402
+
+RERANKER_MODEL = "amberoad/bert-multilingual-passage-reranking-msmarco"
+EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+QUESTION = "Quel est le montant total du DQE pour le lot 2 ?"
+PASSAGES = [
+    "Le montant total du DQE du lot 2 s'élève à 125 430,00 EUR HT.",
+    "Lot 2 - terrassements : détail quantitatif estimatif, total HT 125 430,00 EUR.",
+    "La visite du site est obligatoire avant la remise des offres.",
+    "Le mémoire technique décrit l'organisation du chantier et les moyens humains.",
+    "Les pénalités de retard sont fixées à 1/1000 du montant du marché par jour.",
+    "Le planning prévisionnel prévoit un démarrage des travaux en mars.",
+]
+
+
+@pytest.fixture(scope="module")
+def onnx_dir(tmp_path_factory):
+    root = tmp_path_factory.mktemp("onnx")
+    original = inference_backend.ONNX_MODELS_DIR
+    inference_backend.ONNX_MODELS_DIR = str(root)
+    export_onnx(RERANKER_MODEL, "cross-encoder", quantize=True)
+    export_onnx(EMBEDDING_MODEL, "embedding", quantize=True)
+    yield root
+    inference_backend.ONNX_MODELS_DIR = original
+
+
+def _first_logit(scores):
+    return [float(row[0]) if getattr(row, "__len__", None) else float(row) for row in scores]
+
+
+def _ranking(scores):
+    return sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_cross_encoder_rank_agreement(onnx_dir, backend):
+    pairs = [[QUESTION, passage] for passage in PASSAGES]
+    reference = _first_logit(build_cross_encoder(RERANKER_MODEL, backend="torch").predict(pairs))
+    candidate = _first_logit(build_cross_encoder(RERANKER_MODEL, backend=backend).predict(pairs))
+    assert _ranking(candidate)[:3] == _ranking(reference)[:3]
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8"])
+def test_embedding_rank_agreement(onnx_dir, backend):
+    reference = build_embedding(EMBEDDING_MODEL, backend="torch")
+    candidate = build_embedding(EMBEDDING_MODEL, backend=backend)
+
+    def similarities(model):
+        query = model.get_query_embedding(QUESTION)
+        return [sum(a * b for a, b in zip(query, model.get_text_embedding(p))) for p in PASSAGES]
+
+    assert _ranking(similarities(candidate))[:3] == _ranking(similarities(reference))[:3]
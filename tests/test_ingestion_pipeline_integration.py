@@ -1,4 +1,5 @@
 """Tests d'intégration pour le pipeline d'ingestion."""
+import os
 from unittest.mock import MagicMock
 from ingestion.pipeline import IngestionPipeline
 from ingestion.connectors.base import BaseConnector, DocumentChunk
@@ -48,3 +49,84 @@ def test_ingestion_pipeline_flow():
     section_chunks = [c for c in results if c.metadata.get("section_label") == "Designation"]
     assert len(section_chunks) == 1
     assert "Voici un contenu" in section_chunks[0].text
+
+
+class FilesConnector(BaseConnector):
+    """Connecteur factice : un chunk par nom de fichier, ``casse.xlsx`` est corrompu."""
+
+    def __init__(self, names):
+        self.names = names
+
+    def discover(self):
+        return list(self.names)
+
+    def load(self, item):
+        if item == "casse.xlsx":
+            raise ValueError("classeur corrompu")
+        text = f"Le fichier {item} décrit les travaux de voirie prévus pour le lot principal du marché public."
+        return [DocumentChunk(id=item, text=text, metadata={"source": item})]
+
+
+def _parse(workers):
+    config = IngestionConfig(workers=workers)
+    pipeline = IngestionPipeline(config)
+    pipeline.connectors = [FilesConnector([f"doc{i}.txt" for i in range(5)] + ["casse.xlsx", "fin.txt"])]
+    return list(pipeline.parse())
+
+
+def test_parallel_parsing_keeps_order_and_isolates_errors():
+    sequential = _parse(workers=1)
+    parallel = _parse(workers=3)
+
+    assert [p.item for p in parallel] == [p.item for p in sequential]
+    assert [[c.id for c in p.chunks] for p in parallel] == [[c.id for c in p.chunks] for p in sequential]
+    failed = [p for p in parallel if p.error]
+    assert [p.item for p in failed] == ["casse.xlsx"]
+    assert "classeur corrompu" in failed[0].error
+    # les fichiers suivants sont bien parsés
+    assert parallel[-1].item == "fin.txt" and parallel[-1].chunks
+
+
+class CrashingConnector(FilesConnector):
+    """Simule un crash natif (segfault, OOM killer) du worker sur un fichier."""
+
+    def load(self, item):
+        if item == "crash.pdf":
+            os._exit(1)
+        return super().load(item)
+
+
+def test_dead_worker_only_loses_its_own_file():
+    pipeline = IngestionPipeline(IngestionConfig(workers=2))
+    names = [f"f{i}.txt" for i in range(3)] + ["crash.pdf"] + [f"g{i}.txt" for i in range(6)]
+    pipeline.connectors = [CrashingConnector(names)]
+
+    parsed = list(pipeline.parse())
+
+    assert [p.item for p in parsed] == names
+    assert [p.item for p in parsed if p.error] == ["crash.pdf"]
+    assert "BrokenProcessPool" in parsed[3].error
+    assert all(p.chunks for p in parsed if p.item != "crash.pdf")
+
+
+def test_sequential_parsing_streams_chunks_and_isolates_errors():
+    loaded = []
+
+    class StreamingConnector(FilesConnector):
+        def load(self, item):
+            loaded.append(item)
+            yield from super().load(item)
+
+    pipeline = IngestionPipeline(IngestionConfig(workers=1))
+    pipeline.connectors = [StreamingConnector(["a.txt", "casse.xlsx", "b.txt"])]
+
+    parsed_items = pipeline.parse()
+    first = next(parsed_items)
+    # rien n'est parsé tant que les chunks ne sont pas lus
+    assert loaded == []
+    assert [c.metadata["source"] for c in first.chunks] == ["a.txt"]
+    failed = next(parsed_items)
+    assert list(failed.chunks) == [] and "classeur corrompu" in failed.error
+    last = next(parsed_items)
+    assert [c.metadata["source"] for c in last.chunks] == ["b.txt"] and last.error is None
+    assert loaded == ["a.txt", "casse.xlsx", "b.txt"]
@@ -0,0 +1,64 @@
+"""Tests pour la couche de journalisation."""
+import logging
+import subprocess
+import sys
+from pathlib import Path
+
+from llm_pipeline import logging_utils
+from llm_pipeline.logging_utils import (
+    CorrelationIdFilter,
+    get_correlation_id,
+    new_correlation_id,
+    payload_logging_enabled,
+    reset_correlation_id,
+)
+
+
+def test_correlation_id_is_attached_to_records():
+    token = new_correlation_id("req-42")
+    try:
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "msg", None, None)
+        CorrelationIdFilter().filter(record)
+        assert record.correlation_id == "req-42"
+    finally:
+        reset_correlation_id(token)
+    assert get_correlation_id() == "-"
+
+
+def test_payload_logging_requires_debug_and_sampling(monkeypatch):
+    logger = logging.getLogger("llm_pipeline.test_payload")
+    logger.setLevel(logging.DEBUG)
+
+    monkeypatch.setattr(logging_utils, "LOG_PAYLOAD_SAMPLE_RATE", 0.0)
+    token = new_correlation_id()
+    assert payload_logging_enabled(logger) is False
+    reset_correlation_id(token)
+
+    monkeypatch.setattr(logging_utils, "LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+    token = new_correlation_id()
+    assert payload_logging_enabled(logger) is True
+    reset_correlation_id(token)
+
+    logger.setLevel(logging.INFO)
+    assert payload_logging_enabled(logger) is False
+
+
+def test_queued_records_are_flushed_at_exit():
+    script = (
+        "import logging\n"
+        "from llm_pipeline.logging_utils import configure_logging\n"
+        "configure_logging('INFO')\n"
+        "log = logging.getLogger('flush')\n"
+        "for i in range(20000):\n"
+        "    log.info('line %d', i)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    lines = result.stderr.splitlines()
+    assert len(lines) == 20000
+    assert lines[-1].endswith("flush: line 19999")
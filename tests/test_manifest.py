@@ -0,0 +1,71 @@
+"""Tests pour le manifeste d'indexation incrémentale."""
+import os
+
+from indexation.manifest import IndexManifest, file_sha256
+
+MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+
+def _index_all(manifest, plan):
+    for _, item, state in plan.to_index:
+        manifest.record(state, [f"{item.stem}-0", f"{item.stem}-1"], MODEL)
+
+
+def test_plan_detects_new_changed_unchanged_and_removed(tmp_path):
+    kept = tmp_path / "kept.txt"
+    touched = tmp_path / "touched.txt"
+    edited = tmp_path / "edited.txt"
+    gone = tmp_path / "gone.txt"
+    for path in (kept, touched, edited, gone):
+        path.write_text(f"contenu {path.stem}", encoding="utf-8")
+
+    manifest = IndexManifest(tmp_path / "state" / "manifest.json")
+    plan = manifest.plan([(None, p) for p in (kept, touched, edited, gone)], MODEL)
+    assert len(plan.to_index) == 4 and not plan.stale_chunks
+    _index_all(manifest, plan)
+    manifest.save()
+
+    os.utime(touched, (1_000_000, 1_000_000))
+    edited.write_text("nouveau contenu, plus long", encoding="utf-8")
+    gone.unlink()
+
+    reloaded = IndexManifest.load(tmp_path / "state" / "manifest.json")
+    plan = reloaded.plan([(None, p) for p in (kept, touched, edited)], MODEL)
+
+    assert [item for _, item, _ in plan.to_index] == [edited]
+    assert plan.unchanged == 2
+    assert [entry.path for entry in plan.removed] == [str(gone)]
+    assert plan.stale_chunks == {
+        str(edited): ["edited-0", "edited-1"],
+        str(gone): ["gone-0", "gone-1"],
+    }
+    assert plan.sources == {str(edited), str(gone)}
+    # le simple "touch" met à jour le mtime sans réindexation
+    assert reloaded.entries[str(touched)].mtime == 1_000_000
+    assert plan.to_index[0][2].content_hash == file_sha256(edited)
+
+
+def test_plan_reindexes_everything_when_model_changes_or_full(tmp_path):
+    doc = tmp_path / "doc.txt"
+    doc.write_text("texte", encoding="utf-8")
+    manifest = IndexManifest(tmp_path / "manifest.json")
+    _index_all(manifest, manifest.plan([(None, doc)], MODEL))
+
+    other_model = manifest.plan([(None, doc)], "intfloat/multilingual-e5-small")
+    full = manifest.plan([(None, doc)], MODEL, incremental=False)
+
+    for plan in (other_model, full):
+        assert len(plan.to_index) == 1
+        assert plan.stale_chunks == {str(doc): ["doc-0", "doc-1"]}
+
+
+def test_non_file_items_are_always_indexed(tmp_path):
+    plan = IndexManifest(tmp_path / "manifest.json").plan([(None, "SELECT * FROM offres")], MODEL)
+    assert plan.to_index == [(None, "SELECT * FROM offres", None)]
+    assert plan.sources == set()
+
+
+def test_unreadable_manifest_starts_from_scratch(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text("{pas du json", encoding="utf-8")
+    assert IndexManifest.load(path).entries == {}
@@ -0,0 +1,45 @@
+"""Tests pour les règles d'exclusion compilées et la mémoïsation des métadonnées AO."""
+from pathlib import Path
+
+from ingestion import metadata_utils
+from ingestion.config import ConnectorConfig
+from ingestion.metadata_utils import compile_exclusion_rules, extract_ao_metadata, should_exclude_path
+
+AO_DIR = Path("/data/AO/ED257730 - MONTMIRAIL - AV DE L EMPEREUR")
+
+
+def test_exclusion_rules_are_compiled_once_per_config():
+    config = ConnectorConfig(enabled=True, excluded_extensions=[".CSV"], extra={"excluded_keywords": "Archives"})
+    rules = compile_exclusion_rules(config)
+
+    assert compile_exclusion_rules(ConnectorConfig(enabled=True, excluded_extensions=[".CSV"], extra={"excluded_keywords": "Archives"})) is rules
+    assert should_exclude_path(Path("/data/export.csv"), config)
+    assert should_exclude_path(Path("/data/archives/offre.pdf"), config)
+    assert should_exclude_path(Path("/data/Sauvegarde/offre.pdf"), config)
+    assert not should_exclude_path(Path("/data/offre.pdf"), config)
+    assert not should_exclude_path(Path("/data/archives/offre.pdf"), ConnectorConfig(enabled=True))
+
+
+def test_ao_metadata_is_memoized_and_returned_as_copy():
+    path = AO_DIR / "05-Etude-Devis-SPIGAO" / "EN.07.01 - BPU signature 2.xlsx"
+    first = extract_ao_metadata(path)
+    first["ao_id"] = "modifié"
+
+    again = extract_ao_metadata(path)
+    assert again["ao_id"] == "ED257730"
+    assert again["ao_commune"] == "MONTMIRAIL"
+    assert again["ao_phase_code"] == "05"
+    assert again["ao_doc_code"] == "BPU"
+    assert again["ao_signature_label"] == "2"
+    assert metadata_utils._ao_metadata.cache_info().hits >= 1
+
+
+def test_ao_root_lookup_is_shared_by_sibling_files():
+    metadata_utils._directory_ao_root.cache_clear()
+    folder = AO_DIR / "09-Offre remise" / "OFFRE 1702"
+    for name in ("DQE.xlsx", "Memoire technique.docx", "RC.pdf"):
+        assert extract_ao_metadata(folder / name)["ao_section"] == "OFFRE"
+
+    info = metadata_utils._directory_ao_root.cache_info()
+    assert info.misses == 3  # OFFRE 1702, 09-Offre remise, dossier AO
+    assert extract_ao_metadata(Path("/data/divers/note.txt"))["ao_is_global_doc"] is True
@@ -0,0 +1,61 @@
+"""Tests pour les mesures par étape et l'export Prometheus."""
+from llm_pipeline.answer_cache import AnswerCache, CachedAnswer
+from llm_pipeline.metrics import (
+    Histogram,
+    collect_stage_timings,
+    observe_stage,
+    register_counter_source,
+    render_prometheus,
+    untracked,
+)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value)
+    cumulative, total, count = histogram.snapshot()
+    assert cumulative == [1, 3, 4]
+    assert count == 4
+    assert round(total, 2) == 4.25
+
+
+def test_request_timings_accumulate_per_stage():
+    with collect_stage_timings() as timings:
+        observe_stage("citations", 0.002)
+        observe_stage("citations", 0.003)
+        observe_stage("rerank", 0.1)
+    observe_stage("rerank", 0.1)  # hors requête : histogramme seulement
+    assert timings == {"citations": 5.0, "rerank": 100.0}
+
+
+def test_request_timings_can_be_resumed():
+    with collect_stage_timings() as timings:
+        observe_stage("rerank", 0.1)
+    # fin d'une réponse streamée, consommée hors du contexte de la requête
+    with collect_stage_timings(timings) as resumed:
+        observe_stage("total", 0.5)
+    assert resumed is timings
+    assert timings == {"rerank": 100.0, "total": 500.0}
+
+
+def test_render_prometheus():
+    observe_stage("generation", 0.3)
+    register_counter_source("rag_test_events_total", "Test.", "event", lambda: {"hits": 2})
+    text = render_prometheus()
+    assert "# TYPE rag_stage_duration_seconds histogram" in text
+    assert 'rag_stage_duration_seconds_bucket{stage="generation",le="+Inf"}' in text
+    assert 'rag_test_events_total{event="hits"} 2' in text
+
+
+def test_untracked_block_skips_metrics_and_caches():
+    cache = AnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=1.0)
+    with collect_stage_timings() as timings, untracked():
+        observe_stage("rag_test_untracked", 0.2)
+        cache.put("question", "scope", CachedAnswer(answer="42", citations=[], hits=None))
+        assert cache.get("question", "scope") is None
+
+    assert timings == {}
+    assert "rag_test_untracked" not in render_prometheus()
+    assert cache.get("question", "scope") is None
+    assert cache.stats["misses"] == 1
@@ -0,0 +1,68 @@
+"""Tests du registre de composants partagés."""
+import threading
+import time
+
+from llm_pipeline import model_registry
+from llm_pipeline.metrics import render_prometheus
+from llm_pipeline.model_registry import ModelRegistry, get_model_registry
+
+
+class _FakeParameter:
+    def __init__(self, count):
+        self.count = count
+
+    def numel(self):
+        return self.count
+
+    def element_size(self):
+        return 4
+
+
+class _FakeModel:
+    def parameters(self):
+        return [_FakeParameter(10), _FakeParameter(6)]
+
+
+class _FakeCrossEncoder:
+    def __init__(self):
+        self.model = _FakeModel()
+
+
+def test_component_is_loaded_once_and_shared():
+    registry = ModelRegistry()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.01)
+        return _FakeCrossEncoder()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("cross_encoder", factory))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert "cross_encoder" in registry
+    stats = registry.loaded()["cross_encoder"]
+    assert stats.parameter_bytes == 64
+    assert stats.load_seconds >= 0.01
+
+
+def test_components_without_parameters():
+    registry = ModelRegistry()
+    registry.get("query_router", object)
+    assert registry.loaded()["query_router"].parameter_bytes is None
+
+
+def test_memory_gauges_exported(monkeypatch):
+    monkeypatch.setattr(model_registry, "_registry", None)
+    get_model_registry().get("embedding:test", _FakeCrossEncoder)
+
+    text = render_prometheus()
+    assert "# TYPE rag_model_parameter_bytes gauge" in text
+    assert 'rag_model_parameter_bytes{component="embedding:test"} 64' in text
+    assert 'rag_model_rss_bytes{component="embedding:test"}' in text
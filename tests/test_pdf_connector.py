@@ -0,0 +1,91 @@
+"""Tests du connecteur PDF (extraction page par page)."""
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pdfplumber")
+pytest.importorskip("pypdfium2")
+
+from ingestion.config import ConnectorConfig, PDFConnectorOptions  # noqa: E402
+from ingestion.connectors import pdf as pdf_module  # noqa: E402
+from ingestion.connectors.pdf import PDFConnector  # noqa: E402
+
+
+def _write_pdf(path: Path, pages) -> None:
+    """PDF minimal : ``pages`` = [(lignes de texte, nombre de traits horizontaux)]."""
+    objects = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>", b""]
+    kids = []
+    for lines, strokes in pages:
+        content = b"BT /F1 11 Tf 50 780 Td 14 TL "
+        content += b"".join(b"(" + line.encode("latin-1") + b") Tj T* " for line in lines) + b"ET "
+        content += b"".join(b"50 %d m 500 %d l S " % (400 - 8 * i, 400 - 8 * i) for i in range(strokes))
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 1 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+    objects.append(b"<< /Title (Rapport) /Author (Bureau) >>")
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, len(objects), len(objects) - 1, xref,
+    )
+    path.write_bytes(bytes(out))
+
+
+@pytest.fixture
+def report(tmp_path):
+    path = tmp_path / "rapport.pdf"
+    pages = [([f"Page {n} du rapport", "Travaux de voirie"], 50 if n == 3 else 0) for n in range(1, 8)]
+    pages[4] = ([], 0)  # page blanche
+    _write_pdf(path, pages)
+    return path
+
+
+def _load(path, **options):
+    connector = PDFConnector(ConnectorConfig(enabled=True), PDFConnectorOptions(**options))
+    return list(connector.load(path))
+
+
+def test_one_chunk_per_page_with_page_metadata(report):
+    chunks = _load(report, pages_per_task=3)
+
+    assert [chunk.id for chunk in chunks] == [f"rapport-page{n}" for n in (1, 2, 3, 4, 6, 7)]
+    assert [chunk.metadata["page"] for chunk in chunks] == [1, 2, 3, 4, 6, 7]
+    assert chunks[0].text == "Page 1 du rapport\nTravaux de voirie"
+    assert chunks[0].metadata["title"] == "Rapport"
+    assert chunks[0].metadata["parent_id"] == "rapport"
+
+
+def test_table_pages_fall_back_to_pdfplumber(report, monkeypatch):
+    fast_pages = []
+    pdfium_page_text = pdf_module._pdfium_page_text
+
+    def _spy(document, index, threshold):
+        text = pdfium_page_text(document, index, threshold)
+        if text is not None:
+            fast_pages.append(index)
+        return text
+
+    monkeypatch.setattr(pdf_module, "_pdfium_page_text", _spy)
+    chunks = _load(report)
+
+    assert fast_pages == [0, 1, 3, 4, 5, 6]  # la page 3 (index 2) est tracée comme un tableau
+    assert chunks[2].text == "Page 3 du rapport\nTravaux de voirie"
+
+
+def test_backends_and_page_workers_give_same_chunks(report):
+    sequential = [(chunk.id, chunk.text) for chunk in _load(report, pages_per_task=2)]
+
+    assert [(chunk.id, chunk.text) for chunk in _load(report, pages_per_task=2, page_workers=3)] == sequential
+    assert [(chunk.id, chunk.text) for chunk in _load(report, backend="pdfplumber")] == sequential
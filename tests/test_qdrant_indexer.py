@@ -0,0 +1,138 @@
+"""Tests pour l'indexation par lots de l'indexeur Qdrant."""
+from contextlib import nullcontext
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("typer")
+pytest.importorskip("llama_index.vector_stores.qdrant")
+
+from ingestion.connectors.base import DocumentChunk  # noqa: E402
+from ingestion.pipeline import ParsedItem  # noqa: E402
+from indexation import qdrant_indexer  # noqa: E402
+from llm_pipeline.elastic_client import BulkIndexReport  # noqa: E402
+
+
+class _RecordingIndexer:
+    def __init__(self):
+        self.batches = []
+
+    def index_documents(self, documents):
+        self.batches.append([doc.doc_id for doc in documents])
+
+
+def test_index_stream_consumes_chunks_lazily(monkeypatch):
+    produced = []
+
+    def chunks():
+        for i in range(7):
+            produced.append(i)
+            yield DocumentChunk(id=f"c{i}", text=f"texte {i}", metadata={"source": f"/data/f{i % 2}.pdf"})
+
+    indexer = _RecordingIndexer()
+    es_calls = []
+
+    def fake_bulk(documents, suspend_refresh):
+        docs = list(documents)
+        # le lot courant est poussé avant que le suivant ne soit lu
+        es_calls.append((len(produced), [doc_id for doc_id, _ in docs]))
+        return BulkIndexReport(indexed=len(docs))
+
+    monkeypatch.setattr(qdrant_indexer, "es_bulk_index", fake_bulk)
+    monkeypatch.setattr(qdrant_indexer, "es_bulk_loading", nullcontext)
+
+    report = qdrant_indexer.index_stream(chunks(), indexer, batch_size=3)
+
+    assert indexer.batches == [["c0", "c1", "c2"], ["c3", "c4", "c5"], ["c6"]]
+    assert [seen for seen, _ in es_calls] == [3, 6, 7]
+    assert (report.chunks, report.documents, report.batches) == (7, 7, 3)
+    assert report.elastic.indexed == 7
+    assert report.sources == {"/data/f0.pdf", "/data/f1.pdf"}
+
+
+def test_index_stream_stops_elastic_when_unavailable(monkeypatch):
+    chunks = [DocumentChunk(id=f"c{i}", text="texte", metadata={}) for i in range(4)]
+    calls = []
+
+    def fake_bulk(documents, **kwargs):
+        calls.append([doc_id for doc_id, _ in documents])
+        return BulkIndexReport(skipped=True)
+
+    monkeypatch.setattr(qdrant_indexer, "es_bulk_index", fake_bulk)
+    monkeypatch.setattr(qdrant_indexer, "es_bulk_loading", nullcontext)
+
+    report = qdrant_indexer.index_stream(chunks, _RecordingIndexer(), batch_size=2)
+
+    assert calls == [["c0", "c1"]]
+    assert report.elastic.skipped and report.chunks == 4
+
+
+def test_track_chunks_records_files_in_manifest(tmp_path):
+    from indexation.manifest import IndexManifest
+
+    doc = tmp_path / "offre.txt"
+    doc.write_text("texte", encoding="utf-8")
+
+    class _Pipeline:
+        def parse(self, items):
+            for connector, item in items:
+                if item == broken:
+                    yield ParsedItem(connector=connector, item=item, chunks=[], error="BadZipFile")
+                    continue
+                chunks = [
+                    DocumentChunk(id=f"{item.stem}-{i}", text="texte", metadata={"source": str(item)})
+                    for i in range(3)
+                ]
+                yield ParsedItem(connector=connector, item=item, chunks=chunks)
+
+    broken = tmp_path / "casse.xlsx"
+    broken.write_bytes(b"pas un classeur")
+    manifest = IndexManifest(tmp_path / "manifest.json")
+    plan = manifest.plan([(None, doc), (None, broken)], "model")
+
+    chunks = list(qdrant_indexer._track_chunks(_Pipeline(), plan, manifest, "model"))
+
+    assert len(chunks) == 3
+    assert manifest.entries[str(doc)].chunk_ids == ["offre-0", "offre-1", "offre-2"]
+    # le fichier en échec sera retenté au prochain passage
+    assert str(broken) not in manifest.entries
+
+
+def test_manifest_saved_per_batch_only_lists_indexed_files(monkeypatch, tmp_path):
+    from indexation.manifest import IndexManifest
+
+    files = []
+    for name in ("a.txt", "b.txt"):
+        path = tmp_path / name
+        path.write_text(name, encoding="utf-8")
+        files.append(path)
+
+    class _Pipeline:
+        def parse(self, items):
+            for connector, item in items:
+                chunks = [
+                    DocumentChunk(id=f"{item.stem}-{i}", text="texte", metadata={"source": str(item)})
+                    for i in range(3)
+                ]
+                yield ParsedItem(connector=connector, item=item, chunks=chunks)
+
+    monkeypatch.setattr(qdrant_indexer, "es_bulk_index", lambda documents, **kwargs: BulkIndexReport(skipped=True))
+    monkeypatch.setattr(qdrant_indexer, "es_bulk_loading", nullcontext)
+    manifest = IndexManifest(tmp_path / "manifest.json")
+    plan = manifest.plan([(None, path) for path in files], "model")
+    indexer = _RecordingIndexer()
+    saved = []
+
+    def save():
+        manifest.save()
+        indexed = {doc_id for batch in indexer.batches for doc_id in batch}
+        on_disk = IndexManifest.load(manifest.path).entries
+        # un arrêt ici ne laisse dans le manifeste que des chunks présents dans Qdrant
+        assert all(set(entry.chunk_ids) <= indexed for entry in on_disk.values())
+        saved.append(sorted(Path(key).name for key in on_disk))
+
+    qdrant_indexer.index_stream(
+        qdrant_indexer._track_chunks(_Pipeline(), plan, manifest, "model"), indexer, batch_size=2, on_batch=save
+    )
+
+    assert saved == [[], ["a.txt"], ["a.txt"]]
@@ -0,0 +1,77 @@
+"""Tests du cache d'extraction et de l'appel LLM du QueryRouter."""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+pytest.importorskip("llama_index.core")
+
+from llm_pipeline.query_router import ROUTER_JSON_SCHEMA, QueryRouter, RouterExtractionCache  # noqa: E402
+
+QUESTION = "Quels documents pour la commune de Bordeaux ?"
+
+
+def _llm(response='{"ao_commune": "BORDEAUX"}'):
+    llm = MagicMock()
+    llm.predict.return_value = response
+    llm.apredict = AsyncMock(return_value=response)
+    return llm
+
+
+def test_extraction_cache_is_keyed_by_normalized_question():
+    cache = RouterExtractionCache(max_entries=2)
+    cache.put("Montant du lot 1 ?", {"ao_doc_code": "DQE"})
+    assert cache.get("  montant du LOT 1") == {"ao_doc_code": "DQE"}
+    cache.put("b", {})
+    cache.put("c", {})
+    assert cache.get("montant du lot 1") is None
+    assert cache.get("b") == {}
+    assert cache.stats == {"hits": 2, "misses": 1}
+
+
+def test_repeated_question_does_not_call_the_llm_again():
+    router = QueryRouter(cache_size=8)
+    llm = _llm()
+
+    first = router.analyze(QUESTION, llm=llm)
+    second = asyncio.run(router.aanalyze(QUESTION.lower(), llm=llm))
+
+    assert first.filters["ao_commune"] == second.filters["ao_commune"] == "BORDEAUX"
+    llm.predict.assert_called_once()
+    llm.apredict.assert_not_awaited()
+    # Extraction connue : plus besoin de lancer la recherche spéculative
+    assert router.speculate(QUESTION, llm=llm)[1] is False
+
+
+def test_llm_failures_are_not_cached():
+    router = QueryRouter(cache_size=8)
+    llm = _llm()
+    llm.predict.side_effect = [TimeoutError("vllm"), '{"ao_commune": "BORDEAUX"}']
+
+    assert "ao_commune" not in router.analyze(QUESTION, llm=llm).filters
+    assert router.analyze(QUESTION, llm=llm).filters["ao_commune"] == "BORDEAUX"
+
+
+def test_invalid_json_is_not_cached():
+    router = QueryRouter(cache_size=8)
+    llm = _llm()
+    llm.predict.side_effect = ["Bordeaux", '["BORDEAUX"]', '{"ao_commune": "BORDEAUX"}']
+
+    assert "ao_commune" not in router.analyze(QUESTION, llm=llm).filters
+    assert "ao_commune" not in router.analyze(QUESTION, llm=llm).filters
+    assert router.extraction_cache.get(QUESTION) is None
+    assert router.analyze(QUESTION, llm=llm).filters["ao_commune"] == "BORDEAUX"
+    assert llm.predict.call_count == 3
+
+
+def test_router_prompt_has_no_model_specific_tags():
+    from llm_pipeline.prompts import get_router_prompt
+
+    prompt = get_router_prompt()
+    assert "[INST]" not in prompt and "[/INST]" not in prompt
+    assert "{question}" in prompt
+
+
+def test_schema_matches_router_prompt_fields():
+    assert set(ROUTER_JSON_SCHEMA["properties"]) == {"ao_id", "ao_commune", "ao_doc_code", "ao_phase_label", "ao_signed"}
+    assert ROUTER_JSON_SCHEMA["additionalProperties"] is False
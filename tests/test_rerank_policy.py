@@ -0,0 +1,33 @@
+"""Tests pour le reranking adaptatif."""
+from types import SimpleNamespace
+
+from llm_pipeline.query_router import QueryRouterResult
+from llm_pipeline.rerank_policy import RerankPolicy, rerank_path_counts, top_by_retrieval_score
+
+
+def _nodes(*scores):
+    return [SimpleNamespace(score=score, name=f"n{i}") for i, score in enumerate(scores)]
+
+
+def test_candidate_depth_shrinks_for_specific_router_filters():
+    policy = RerankPolicy(top_k=3, full_depth=9, adaptive=True)
+    exact = QueryRouterResult(intent="recherche_doc_ao", filters={"ao_id": "ED257730", "ao_doc_code": "DQE"}, confidence=0.9)
+    vague = QueryRouterResult(intent="recherche_generique")
+    assert policy.candidate_depth(exact) == 5
+    assert policy.candidate_depth(vague) == 9
+    assert RerankPolicy(top_k=3, full_depth=9, adaptive=False).candidate_depth(exact) == 9
+
+
+def test_choose_path():
+    policy = RerankPolicy(top_k=2, full_depth=6, adaptive=True, skip_gap=0.3)
+    assert policy.choose_path(_nodes(0.8, 0.7), depth=6) == "skipped_few_candidates"
+    assert policy.choose_path(_nodes(0.9, 0.8, 0.3, 0.2), depth=6) == "skipped_score_gap"
+    assert policy.choose_path(_nodes(0.9, 0.8, 0.75, 0.2), depth=6) == "full"
+    assert policy.choose_path(_nodes(0.9, 0.8, 0.75), depth=4) == "shallow"
+    assert RerankPolicy(top_k=2, full_depth=6).choose_path(_nodes(0.8), depth=6) == "full"
+
+
+def test_top_by_retrieval_score_and_counters():
+    nodes = _nodes(0.2, 0.9, 0.5)
+    assert [n.name for n in top_by_retrieval_score(nodes, 2)] == ["n1", "n2"]
+    assert set(rerank_path_counts()) >= {"full", "shallow", "skipped_few_candidates", "skipped_score_gap"}
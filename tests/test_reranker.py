@@ -54,3 +54,61 @@ def test_reranker_basic_reranking():
     assert len(result) == 3
     # Verify predict was called
     assert reranker.cross_encoder.predict.called
+
+
+def test_rerank_batcher_coalesces_concurrent_requests():
+    """Les paires de requêtes concurrentes partent dans un seul predict."""
+    import threading
+    from llm_pipeline.reranker import RerankBatcher
+
+    calls = []
+
+    def predict(pairs):
+        calls.append(len(pairs))
+        return [float(len(passage)) for _, passage in pairs]
+
+    batcher = RerankBatcher(predict, max_batch_pairs=64, max_wait_ms=200)
+    results = {}
+
+    def worker(name, passages):
+        results[name] = batcher.score([["q", p] for p in passages])
+
+    threads = [
+        threading.Thread(target=worker, args=("a", ["x", "xx"])),
+        threading.Thread(target=worker, args=("b", ["xxx"])),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {"a": [1.0, 2.0], "b": [3.0]}
+    assert calls == [3]
+    assert batcher.stats["jobs"] == 2
+
+
+def test_reranker_score_cache_only_scores_unseen_chunks():
+    """Les chunks déjà scorés pour la même question ne repassent pas dans le modèle."""
+    from llm_pipeline.reranker import RerankScoreCache
+
+    cache = RerankScoreCache(max_entries=10)
+    reranker = CrossEncoderReranker(batching=False, score_cache=cache)
+
+    def make_node(i, source):
+        node = Mock()
+        node.node.id_ = f"n{i}"
+        node.node.get_content = lambda i=i: f"Document {i}"
+        node.metadata = {"source": source}
+        return node
+
+    nodes = [make_node(0, "/data/a.pdf"), make_node(1, "/data/b.pdf")]
+    reranker.cross_encoder.predict = Mock(return_value=[0.2, 0.8])
+    assert reranker.rerank(nodes, "Prix du lot ?", top_k=2) == [nodes[1], nodes[0]]
+
+    nodes.append(make_node(2, "/data/a.pdf"))
+    reranker.cross_encoder.predict = Mock(return_value=[0.5])
+    assert reranker.rerank(nodes, "prix du lot", top_k=3) == [nodes[1], nodes[2], nodes[0]]
+    assert len(reranker.cross_encoder.predict.call_args[0][0]) == 1
+
+    assert cache.invalidate_sources({"/data/a.pdf"}) == 2
+    assert len(cache) == 1
@@ -66,3 +66,90 @@ def test_hybrid_query_fusion():
         ids = [n.id_ for n in nodes]
         assert "vec1" in ids
         assert "bm1" in ids
+
+def test_ahybrid_query_fusion():
+    import asyncio
+    from llm_pipeline.retrieval import ahybrid_query
+
+    pipeline = MagicMock()
+    pipeline.initial_top_k = 5
+
+    async def fake_dense(question, filters, top_k, embedding=None):
+        return [MockNode("vec1", "vec text", score=0.5)]
+
+    async def fake_bm25(question, size=10, filters=None, **kwargs):
+        return [{"_id": "bm1", "_score": 2.0, "_source": {"content": "bm text"}}]
+
+    pipeline.adense_retrieve = fake_dense
+    with patch("llm_pipeline.retrieval.abm25_search", side_effect=fake_bm25):
+        nodes, hits = asyncio.run(ahybrid_query(pipeline, "question"))
+
+    ids = [n.id_ for n in nodes]
+    assert "vec1" in ids
+    assert "bm1" in ids
+
+
+def test_hybrid_query_slow_bm25_degrades_to_dense():
+    import time
+
+    pipeline = MagicMock()
+    pipeline.initial_top_k = 5
+    pipeline.index.as_retriever.return_value.retrieve.return_value = [
+        MockNode("vec1", "vector text", score=0.9)
+    ]
+
+    def slow_bm25(*args, **kwargs):
+        time.sleep(0.5)
+        return [{"_id": "bm1", "_score": 2.0, "_source": {"content": "bm text"}}]
+
+    with patch("llm_pipeline.retrieval.bm25_search", side_effect=slow_bm25), \
+            patch("llm_pipeline.retrieval.HYBRID_BM25_TIMEOUT", 0.05):
+        nodes, hits = hybrid_query(pipeline, "question")
+
+    assert [n.id_ for n in nodes] == ["vec1"]
+    assert hits[0]["timings"]["bm25_timed_out"] is True
+    assert hits[0]["timings"]["dense_ms"] is not None
+
+
+def test_hybrid_query_bm25_error_is_flagged():
+    pipeline = MagicMock()
+    pipeline.initial_top_k = 5
+    pipeline.index.as_retriever.return_value.retrieve.return_value = [
+        MockNode("vec1", "vector text", score=0.9)
+    ]
+
+    with patch("llm_pipeline.retrieval.bm25_search", side_effect=ConnectionError("es down")) as mock_bm25:
+        nodes, hits = hybrid_query(pipeline, "question")
+
+    assert [n.id_ for n in nodes] == ["vec1"]
+    assert hits[0]["timings"]["bm25_failed"] is True
+    assert mock_bm25.call_args.kwargs["timeout"] is not None
+
+
+def test_hybrid_query_dense_error_propagates():
+    pipeline = MagicMock()
+    pipeline.initial_top_k = 5
+    pipeline.index.as_retriever.return_value.retrieve.side_effect = ConnectionError("qdrant down")
+
+    with patch("llm_pipeline.retrieval.bm25_search", return_value=[]):
+        with pytest.raises(ConnectionError):
+            hybrid_query(pipeline, "question")
+
+
+def test_ahybrid_query_dense_error_propagates():
+    import asyncio
+    from llm_pipeline.retrieval import ahybrid_query
+
+    pipeline = MagicMock()
+    pipeline.initial_top_k = 5
+
+    async def failing_dense(question, filters, top_k, embedding=None):
+        raise ConnectionError("qdrant down")
+
+    async def fake_bm25(question, size=10, filters=None, **kwargs):
+        return []
+
+    pipeline.adense_retrieve = failing_dense
+    with patch("llm_pipeline.retrieval.abm25_search", side_effect=fake_bm25):
+        with pytest.raises(ConnectionError):
+            asyncio.run(ahybrid_query(pipeline, "question"))
@@ -0,0 +1,59 @@
+"""Tests pour le retrieval spéculatif pendant l'appel LLM du router."""
+from types import SimpleNamespace
+
+from llm_pipeline.router_speculation import narrowed_filters, reuse_speculative, speculation_counts
+
+
+def _nodes(*communes):
+    return [SimpleNamespace(metadata={"ao_commune": commune}, name=f"n{i}") for i, commune in enumerate(communes)]
+
+
+def test_narrowed_filters():
+    assert narrowed_filters({"ao_id": "ED1"}, {"ao_id": "ED1", "ao_commune": "Reims"}) == {"ao_commune": "Reims"}
+    assert narrowed_filters({"ao_doc_code": ["RC", "CCTP"]}, {"ao_doc_code": "CCTP"}) == {"ao_doc_code": "CCTP"}
+    assert narrowed_filters({"ao_id": "ED1"}, {}) is None
+    assert narrowed_filters({"ao_commune": "Reims"}, {"ao_commune": "Troyes"}) is None
+
+
+def test_empty_filter_values_are_ignored():
+    nodes = _nodes("Reims")
+    assert narrowed_filters({"ao_id": "ED1", "ao_commune": ""}, {"ao_id": "ED1", "ao_phase_label": None}) == {}
+    assert reuse_speculative(nodes, {"ao_id": "ED1"}, {"ao_id": "ED1", "ao_doc_code": []}, 1, 1, exact_filtering=False) == (
+        "kept",
+        nodes,
+    )
+
+
+def test_list_tuple_and_set_values_compare_as_sets():
+    assert narrowed_filters({"ao_doc_code": ["RC", "CCTP"]}, {"ao_doc_code": ("CCTP", "RC")}) == {}
+    assert narrowed_filters({"ao_doc_code": "CCTP"}, {"ao_doc_code": ["CCTP"]}) == {}
+    assert narrowed_filters({"ao_doc_code": ("RC", "CCTP", "CCAP")}, {"ao_doc_code": {"RC", "CCTP"}}) == {
+        "ao_doc_code": {"RC", "CCTP"}
+    }
+    assert narrowed_filters({"ao_doc_code": ("RC",)}, {"ao_doc_code": ["RC", "CCTP"]}) is None
+
+    nodes = [SimpleNamespace(metadata={"ao_doc_code": code}, name=code) for code in ("RC", "BPU", "CCTP")]
+    outcome, refined = reuse_speculative(nodes, {}, {"ao_doc_code": ("CCTP", "RC")}, 3, 2, exact_filtering=True)
+    assert outcome == "refined"
+    assert [n.name for n in refined] == ["RC", "CCTP"]
+
+
+def test_unchanged_filters_keep_speculative_results():
+    nodes = _nodes("Reims", "Troyes")
+    assert reuse_speculative(nodes, {"ao_id": "ED1"}, {"ao_id": "ED1"}, 2, 2, exact_filtering=False) == ("kept", nodes)
+
+
+def test_narrowed_dense_results_are_refined_when_enough_survive():
+    nodes = _nodes("Reims", "Troyes", "Reims", "Reims")
+    outcome, refined = reuse_speculative(nodes, {}, {"ao_commune": "Reims"}, 4, 2, exact_filtering=True)
+    assert outcome == "refined"
+    assert [n.name for n in refined] == ["n0", "n2"]
+
+    assert reuse_speculative(nodes, {}, {"ao_commune": "Reims"}, 4, 4, exact_filtering=True) == ("requeried", None)
+    assert reuse_speculative(nodes, {}, {"ao_commune": "Reims"}, 4, 2, exact_filtering=False) == ("requeried", None)
+
+
+def test_deeper_final_plan_requeries():
+    nodes = _nodes("Reims")
+    assert reuse_speculative(nodes, {}, {}, 1, 3, exact_filtering=True) == ("requeried", None)
+    assert set(speculation_counts()) >= {"kept", "refined", "requeried"}
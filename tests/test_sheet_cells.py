@@ -0,0 +1,73 @@
+"""Tests du découpage Excel vectorisé (parité avec l'implémentation iterrows)."""
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from scripts.bench_excel import (  # noqa: E402
+    legacy_chunks,
+    legacy_dqe_totals,
+    synthetic_dqe,
+    vectorized_chunks,
+    vectorized_dqe_totals,
+)
+from ingestion.config import ConnectorConfig, ExcelConnectorOptions  # noqa: E402
+from ingestion.connectors.excel import ExcelConnector  # noqa: E402
+from ingestion.sheet_cells import SheetCells  # noqa: E402
+
+
+@pytest.fixture
+def connector():
+    return ExcelConnector(ConnectorConfig(enabled=True), ExcelConnectorOptions())
+
+
+def _assert_same_output(connector, dataframe):
+    assert vectorized_chunks(connector, dataframe, "Feuil1") == legacy_chunks(dataframe, "Feuil1")
+    assert vectorized_dqe_totals(dataframe) == legacy_dqe_totals(dataframe)
+
+
+def test_synthetic_dqe_matches_iterrows(connector):
+    _assert_same_output(connector, synthetic_dqe(600, seed=3))
+
+
+def test_row_chunks_without_sections(connector):
+    dataframe = pd.DataFrame({
+        "Article": [f"Pièce {i}" if i % 4 else None for i in range(120)],
+        "Prix": [float(i * 37) if i % 5 else None for i in range(120)],
+        "Unnamed: 2": [" " if i % 3 == 0 else "note" for i in range(120)],
+    })
+    _assert_same_output(connector, dataframe)
+
+
+def test_numeric_only_sheet_upcasts_like_iterrows(connector):
+    # Colonnes int et float mélangées : iterrows voit des float, pas des int
+    dataframe = pd.DataFrame({"Quantité": [1, 2000, 3], "Montant": [1500.0, 0.0, -4.0]})
+    _assert_same_output(connector, dataframe)
+    assert SheetCells(dataframe).row_items(1) == ["Quantité: 2000.0 (lisible: 2 000)", "Montant: 0.0"]
+    # Entiers numpy seuls : pas de forme « lisible » (np.int64 n'est pas un int)
+    assert SheetCells(dataframe[["Quantité"]]).row_items(1) == ["Quantité: 2000"]
+
+
+def test_datetimes_and_custom_index(connector):
+    dataframe = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2024-01-01", None, "2024-03-01"]),
+            "Libellé": ["Lot 1 travaux", "Total général", "x"],
+            "Montant": [None, 1234.5, 12.0],
+        },
+        index=[10, 11, 12],
+    )
+    _assert_same_output(connector, dataframe)
+    _assert_same_output(connector, dataframe[["Date"]])
+
+
+def test_sections_and_subtotal(connector):
+    dataframe = pd.DataFrame({
+        "Désignation": ["LOT 1 Terrassement", "Déblais", "Sous-total", "LOT 2 Chaussée", "Enrobés"],
+        "Montant": [None, 2500.0, 2500.0, None, 900.0],
+    })
+    cells = SheetCells(dataframe)
+    sections = connector._detect_sections(cells, cells.row_texts())
+    assert [(s["name"], s["start_row"], s["end_row"], s["total"]) for s in sections] == [
+        ("Lot 1 Terrassement", 0, 2, "2 500.00 EUR"),
+        ("Lot 2 Chaussée", 3, 4, None),
+    ]
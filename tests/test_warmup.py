@@ -0,0 +1,112 @@
+"""Tests du préchauffage de la Gateway."""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+pytest.importorskip("starlette")
+
+from llm_pipeline.warmup import GatewayWarmup  # noqa: E402
+
+
+def _pipeline():
+    pipeline = MagicMock()
+    pipeline.aquery = AsyncMock()
+    pipeline.llm.acomplete = AsyncMock()
+    return pipeline
+
+
+def test_warmup_runs_every_stage_then_turns_ready():
+    pipeline = _pipeline()
+    warmup = GatewayWarmup(lambda model: pipeline, ["mistral"], query="Montant du lot 1 ?", enabled=True)
+    assert not warmup.ready
+    assert warmup.status()["status"] == "warming_up"
+
+    asyncio.run(warmup.run())
+
+    assert warmup.ready
+    assert warmup.status()["stages"] == {
+        "mistral:load": "ok",
+        "mistral:retrieval": "ok",
+        "mistral:rerank": "ok",
+        "mistral:llm": "ok",
+    }
+    pipeline.aquery.assert_awaited_once_with("Montant du lot 1 ?", use_hybrid=True, return_hits_only=True)
+    pipeline.reranker.warm_up.assert_called_once_with("Montant du lot 1 ?")
+    pipeline.llm.acomplete.assert_awaited_once()
+
+
+def test_warmup_traffic_is_untracked():
+    from llm_pipeline.metrics import is_tracked
+
+    seen = []
+    pipeline = _pipeline()
+    pipeline.aquery.side_effect = lambda *args, **kwargs: seen.append(is_tracked())
+    warmup = GatewayWarmup(lambda model: pipeline, ["mistral"], enabled=True)
+
+    asyncio.run(warmup.run())
+
+    assert seen == [False]
+    assert is_tracked()
+
+
+def test_failed_stage_is_retried_alone():
+    pipeline = _pipeline()
+    pipeline.llm.acomplete.side_effect = [ConnectionError("vllm down"), None]
+    warmup = GatewayWarmup(lambda model: pipeline, ["mistral"], enabled=True, retry_seconds=0)
+
+    asyncio.run(warmup.run())
+
+    assert warmup.ready and not warmup.degraded
+    assert warmup.attempts == 2
+    assert pipeline.aquery.await_count == 1
+    assert pipeline.llm.acomplete.await_count == 2
+
+
+def test_timeout_declares_degraded_readiness():
+    pipeline = _pipeline()
+    pipeline.aquery.side_effect = ConnectionError("qdrant down")
+    warmup = GatewayWarmup(lambda model: pipeline, ["mistral"], enabled=True, retry_seconds=0, ready_timeout=0)
+
+    asyncio.run(warmup.run())
+
+    status = warmup.status()
+    assert warmup.ready
+    assert status["status"] == "degraded"
+    assert status["stages"]["mistral:retrieval"] == "ConnectionError: qdrant down"
+
+
+def test_disabled_warmup_is_ready_immediately():
+    warmup = GatewayWarmup(lambda model: None, ["mistral"], enabled=False)
+    assert warmup.ready
+    assert warmup.status()["status"] == "ready"
+
+
+def test_failed_model_load_keeps_gateway_unready_after_timeout():
+    pipeline = _pipeline()
+    loads = [ConnectionError("qdrant down"), ConnectionError("qdrant down"), pipeline, pipeline]
+
+    def get_pipeline(model):
+        result = loads.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    warmup = GatewayWarmup(get_pipeline, ["mistral"], enabled=True, retry_seconds=0, ready_timeout=0)
+
+    asyncio.run(warmup.run())
+
+    # prête seulement une fois le modèle chargé, pas dès l'expiration du délai
+    assert warmup.ready and not warmup.degraded
+    assert warmup.attempts == 3
+
+
+def test_unknown_warmup_models_fall_back_to_default(monkeypatch, caplog):
+    from llm_pipeline import warmup as warmup_module
+
+    monkeypatch.setattr(warmup_module, "MODEL_ENDPOINTS", {"mistral": "http://vllm", "phi3-mini": "http://phi"})
+    monkeypatch.setattr(warmup_module, "RAG_MODEL_ID", "mistral")
+
+    assert warmup_module.warmup_models("phi3-mini, inconnu") == ["phi3-mini"]
+    assert warmup_module.warmup_models("inconnu") == ["mistral"]
+    assert "inconnu" in caplog.text
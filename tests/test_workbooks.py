@@ -0,0 +1,111 @@
+"""Tests de la lecture partagée des classeurs Excel."""
+import datetime
+import os
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+openpyxl = pytest.importorskip("openpyxl")
+
+from ingestion import workbooks  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache(monkeypatch):
+    monkeypatch.setattr(workbooks, "WORKBOOK_CACHE_DIR", "")
+    workbooks.clear_workbook_cache()
+    yield
+    workbooks.clear_workbook_cache()
+
+
+@pytest.fixture
+def dqe_path(tmp_path):
+    book = openpyxl.Workbook()
+    sheet = book.active
+    sheet.title = "DQE"
+    sheet.append(["Code", "Désignation", None, "Qté", "PU", "Date", "Code", "NA"])
+    sheet.append([1, "Lot 1", None, 3, 2.5, datetime.datetime(2024, 1, 2), "x", 5])
+    sheet.append([None] * 8)
+    sheet.append(["1.1", "  ", 7, 4, 1000, datetime.datetime(2024, 1, 3), "NA", 1.5])
+    sheet.append([2, "Total", None, 10, 3.0, None, True, None])
+    numbers = book.create_sheet("Num")
+    for value in range(4):
+        numbers.append([None, value, value * 1.5])
+    book.create_sheet("Vide")
+    path = tmp_path / "dqe.xlsx"
+    book.save(path)
+    return path
+
+
+def test_frames_match_read_excel(dqe_path):
+    workbook = workbooks.load_workbook(dqe_path, engine="openpyxl")
+
+    assert workbook.sheet_names == ["DQE", "Num", "Vide"]
+    for header in (0, None):
+        expected = pd.read_excel(dqe_path, sheet_name=None, header=header, engine="openpyxl")
+        frames = workbook.sheets(header=header == 0)
+        for name, frame in expected.items():
+            pd.testing.assert_frame_equal(frames[name], frame, check_exact=True)
+
+
+def test_workbook_is_read_once_per_version(dqe_path, monkeypatch):
+    reads = []
+    read_grids = workbooks._read_grids
+    monkeypatch.setattr(workbooks, "_read_grids", lambda path, engine: reads.append(path) or read_grids(path, engine))
+
+    first = workbooks.load_workbook(dqe_path)
+    assert workbooks.load_workbook(dqe_path) is first
+    assert first.sheet("DQE") is first.sheet("DQE")
+
+    stat = dqe_path.stat()
+    os.utime(dqe_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert workbooks.load_workbook(dqe_path) is not first
+    assert reads == [dqe_path, dqe_path]
+
+
+def test_disk_cache_is_shared_between_processes(dqe_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(workbooks, "WORKBOOK_CACHE_DIR", str(tmp_path / "cache"))
+    first = workbooks.load_workbook(dqe_path)
+    workbooks.clear_workbook_cache()
+
+    monkeypatch.setattr(workbooks, "_read_grids", lambda path, engine: pytest.fail("workbook re-read"))
+    second = workbooks.load_workbook(dqe_path)
+
+    assert second is not first
+    assert second.grids == first.grids
+    pd.testing.assert_frame_equal(second.sheet("DQE"), first.sheet("DQE"), check_exact=True)
+
+
+def test_disk_cache_evicts_least_recently_used(dqe_path, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(workbooks, "WORKBOOK_CACHE_DIR", str(cache_dir))
+    workbooks.load_workbook(dqe_path)
+    (old,) = cache_dir.glob("*.json")
+    os.utime(old, (0, 0))
+    monkeypatch.setattr(workbooks, "WORKBOOK_CACHE_MAX_MB", old.stat().st_size * 1.5 / (1024 * 1024))
+
+    copy = tmp_path / "copie.xlsx"
+    copy.write_bytes(dqe_path.read_bytes())
+    workbooks.load_workbook(copy)
+
+    remaining = list(cache_dir.glob("*.json"))
+    assert len(remaining) == 1 and remaining[0] != old
+
+
+def test_unknown_sheet(dqe_path):
+    with pytest.raises(ValueError):
+        workbooks.load_workbook(dqe_path).sheet("Absent")
+
+
+def test_excel_connector_does_not_mutate_cached_frames(dqe_path):
+    from ingestion.config import ConnectorConfig, ExcelConnectorOptions
+    from ingestion.connectors.excel import ExcelConnector
+
+    connector = ExcelConnector(ConnectorConfig(enabled=True, paths=[dqe_path.parent]), ExcelConnectorOptions())
+    cached = workbooks.load_workbook(dqe_path).sheet("DQE")
+
+    truncated = connector._truncate(cached)
+
+    assert truncated.attrs == {"formulas": True}
+    assert cached.attrs == {}
+    assert workbooks.load_workbook(dqe_path).sheet("DQE").attrs == {}